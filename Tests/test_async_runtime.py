@@ -0,0 +1,48 @@
+import sys
+import os
+import asyncio
+
+import pytest
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.async_runtime import AsyncRuntime
+
+
+def test_sync_and_async_callers_share_one_loop():
+    runtime = AsyncRuntime(http_pool_size=2)
+    try:
+        async def which_loop():
+            await asyncio.sleep(0)
+            return asyncio.get_running_loop()
+
+        assert runtime.run(which_loop()) is runtime.loop
+
+        async def from_another_loop():
+            return await asyncio.gather(*(runtime.run_async(which_loop()) for _ in range(3)))
+
+        assert set(asyncio.run(from_another_loop())) == {runtime.loop}
+
+        async def sessions():
+            return await runtime.http_session()
+
+        assert runtime.run(sessions()) is runtime.run(sessions())
+    finally:
+        runtime.close()
+
+
+def test_blocking_call_from_the_loop_is_rejected():
+    runtime = AsyncRuntime()
+    try:
+        async def nested():
+            async def inner():
+                return 1
+            with pytest.raises(RuntimeError):
+                runtime.run(inner())
+            return True
+
+        assert runtime.run(nested())
+    finally:
+        runtime.close()
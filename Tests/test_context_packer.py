@@ -0,0 +1,84 @@
+import sys
+import os
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.context_packer import pack_context
+from services.retrieval import SearchHit
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def hit(chunk_id, text, filename, score=1.0):
+    return SearchHit(chunk_id, text, {"filename": filename}, score)
+
+
+def test_overlapping_chunks_merge_into_one_passage():
+    hits = [
+        hit("a1", "Decorators wrap functions. They run at definition time. Closures capture scope.", "py.md"),
+        hit("a2", "Closures capture scope. Late binding bites in loops.", "py.md"),
+        hit("b1", "Gradient descent follows the slope.", "ml.md"),
+    ]
+    passages = pack_context(hits, token_budget=200, token_counter=word_count)
+
+    assert len(passages) == 2
+    assert passages[0].startswith("[py.md]\n")
+    assert passages[0].count("Closures capture scope.") == 1
+    assert "Late binding bites in loops." in passages[0]
+    assert passages[1] == "[ml.md]\nGradient descent follows the slope."
+
+
+def test_budget_is_respected_at_sentence_boundaries():
+    text = " ".join(f"Sentence {i} has five words." for i in range(20))
+    hits = [hit("a", text, "a.md"), hit("b", "Other file gets a share too.", "b.md")]
+    passages = pack_context(hits, token_budget=20, token_counter=word_count)
+
+    assert sum(word_count(p) for p in passages) <= 20
+    assert all(p.endswith(".") for p in passages)
+    # The lower-ranked hit still gets its share of the budget
+    assert passages[1] == "[b.md]\nOther file gets a share too."
+
+
+def test_oversize_best_sentence_is_truncated():
+    hits = [hit("a", " ".join(["word"] * 100), "a.md")]
+    passages = pack_context(hits, token_budget=10, token_counter=word_count)
+
+    assert passages[0].endswith("...")
+    assert word_count(passages[0]) <= 10
+    assert pack_context([], token_budget=10) == []
+
+
+def test_markdown_line_structure_is_kept():
+    text = (
+        "---\ntags: python\n---\n# Decorators\n\n"
+        "- Wrap functions.\n- Run at definition time.\n\n"
+        "```python\n@cache\ndef f(x):\n    return x\n```\nDone."
+    )
+    hits = [
+        hit("a", text, "py.md"),
+        # A copied line is dropped, a sentence that merely occurs inside one is not
+        hit("b", "- Run at definition time.\nDefinition time.", "other.md"),
+    ]
+    passages = pack_context(hits, token_budget=200, token_counter=word_count)
+
+    assert passages[0] == "[py.md]\n" + text
+    assert passages[1] == "[other.md]\nDefinition time."
+
+    code = "```\n" + "\n".join(f"line {i}" for i in range(50)) + "\n```"
+    passages = pack_context([hit("c", code, "code.md")], token_budget=20, token_counter=word_count)
+    assert passages[0].endswith("\nline 7\n...")
+
+
+def test_files_sharing_a_name_get_separate_passages():
+    hits = [
+        SearchHit("a", "Project plan.", {"filename": "README.md", "filepath": "/v/Projects/README.md", "folder": "Projects"}, 1.0),
+        SearchHit("b", "Old notes.", {"filename": "README.md", "filepath": "/v/Archive/README.md", "folder": "Archive"}, 0.9),
+        hit("c", "Other file.", "other.md"),
+    ]
+    passages = pack_context(hits, token_budget=200, token_counter=word_count)
+
+    assert passages == ["[Projects/README.md]\nProject plan.", "[Archive/README.md]\nOld notes.", "[other.md]\nOther file."]
@@ -0,0 +1,48 @@
+import sys
+import os
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.dedup import ChunkDeduplicator
+
+ARTICLE = (
+    "Vector databases store embeddings and answer nearest neighbour queries. "
+    "Approximate indexes such as HNSW trade a little recall for much faster search, "
+    "while brute force scans every vector and is exact for small collections. "
+)
+
+
+def test_exact_and_near_duplicates_share_one_stored_chunk(tmp_path):
+    path = str(tmp_path / "dedup_index.json")
+    dedup = ChunkDeduplicator(path)
+
+    assert dedup.add("a", ARTICLE, "article.md") == "a"
+    # Reformatted copy, then a lightly edited clipping
+    assert dedup.add("b", "  " + ARTICLE.upper(), "copy.md") == "a"
+    assert dedup.add("c", ARTICLE.replace("little", "small") + " Clipped.", "clip.md") == "a"
+    assert dedup.add("d", "Gradient descent minimises a loss function step by step.", "ml.md") == "d"
+    assert dedup.stats()["exact_duplicates_skipped"] == 1
+    assert dedup.stats()["near_duplicates_skipped"] == 1
+
+    dedup.save()
+    reloaded = ChunkDeduplicator(path)
+    assert reloaded.sources("a") == ["article.md", "copy.md", "clip.md"]
+
+    # Removing the canonical copy hands the group to the next source
+    assert reloaded.remove("b") is None
+    assert reloaded.group_of("a") == "a"
+    reloaded.remove("a", text_of={"c": ARTICLE.replace("little", "small") + " Clipped."}.get)
+    assert reloaded.group_of("c") == "c"
+    assert reloaded.sources("c") == ["clip.md"]
+    assert reloaded.add("e", ARTICLE, "again.md") == "c"
+    reloaded.remove("c")
+    assert reloaded.group_of("e") == "e"
+    reloaded.remove("e")
+    assert reloaded.sources("e") == []
+    assert reloaded.add("f", ARTICLE, "again.md") == "f"
+
+    # Chunks the index never saw (indexed before dedup) are their own group
+    assert reloaded.remove("unknown") is None
+    assert reloaded.group_of("unknown") == "unknown"
@@ -0,0 +1,55 @@
+import sys
+import os
+import time
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.embedding_cache import EmbeddingCache, QueryEmbeddingLRU
+
+
+def test_cache_hits_misses_and_persistence(tmp_path):
+    """Stored vectors come back after reopening and lookups are counted"""
+    path = str(tmp_path / "embedding_cache.sqlite")
+    cache = EmbeddingCache(path)
+    assert cache.get("voyage-3-large", "text", "hello") is None
+    cache.put_many("voyage-3-large", "text", ["hello", "world"], [[0.5, 1.0], [0.25, -2.0]])
+    cache.close()
+
+    cache = EmbeddingCache(path)
+    assert cache.get_many("voyage-3-large", "text", ["world", "other", "hello"]) == [[0.25, -2.0], None, [0.5, 1.0]]
+    # Query embeddings and other models live in separate namespaces
+    assert cache.get("voyage-3-large", "query", "hello") is None
+    assert cache.get("voyage-3-lite", "text", "hello") is None
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.put("m", "text", "a", [1.0])
+    cache.put("m", "text", "b", [2.0])
+    cache.get("m", "text", "a")  # "b" is now the least recently used
+    cache.put("m", "text", "c", [3.0])
+    assert len(cache) == 2
+    assert cache.get("m", "text", "b") is None
+    assert cache.get("m", "text", "a") == [1.0]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_query_lru_normalizes_and_expires():
+    lru = QueryEmbeddingLRU(max_entries=2, ttl_seconds=60)
+    lru.put("What is  Python?", [1.0])
+    assert lru.get("what is python?") == [1.0]
+    lru.put("b", [2.0])
+    lru.put("c", [3.0])  # evicts the least recently used entry
+    assert lru.get("WHAT IS PYTHON?") is None
+    assert lru.stats()["hits"] == 1
+
+    expired = QueryEmbeddingLRU(ttl_seconds=0)
+    expired.put("q", [1.0])
+    time.sleep(0.01)
+    assert expired.get("q") is None
+    assert expired.stats()["expirations"] == 1
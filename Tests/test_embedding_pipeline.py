@@ -0,0 +1,48 @@
+import sys
+import os
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.embedding_pipeline import EmbeddingPipeline, TokenBucket
+
+
+def fake_embed(texts):
+    return [[float(len(text))] for text in texts]
+
+
+def test_batches_respect_token_budget_and_item_count():
+    pipeline = EmbeddingPipeline(fake_embed, batch_tokens=10, batch_max_items=3, token_counter=len)
+    texts = ["aaaa", "bbbb", "cc", "d", "eeeeeeeeeeee", "f"]
+    assert pipeline.make_batches(texts) == [[0, 1, 2], [3], [4], [5]]
+
+
+def test_embed_preserves_order_and_reports_throughput():
+    pipeline = EmbeddingPipeline(fake_embed, batch_tokens=5, max_concurrency=3, token_counter=len)
+    texts = ["x" * n for n in range(1, 12)]
+    assert pipeline.embed(texts) == [[float(n)] for n in range(1, 12)]
+    stats = pipeline.stats()
+    assert stats["chunks"] == 11
+    assert stats["tokens"] == sum(range(1, 12))
+    assert stats["chunks_per_sec"] > 0
+
+
+def test_failed_batches_are_retried():
+    calls = []
+
+    def flaky_embed(texts):
+        calls.append(texts)
+        if len(calls) < 3:
+            raise RuntimeError("429 rate limited")
+        return fake_embed(texts)
+
+    pipeline = EmbeddingPipeline(flaky_embed, max_retries=3, backoff_base=0.001)
+    assert pipeline.embed(["hello"]) == [[5.0]]
+    assert pipeline.stats()["retries"] == 2
+
+
+def test_token_bucket_waits_when_empty():
+    bucket = TokenBucket(rate_per_minute=6000, capacity=1)  # 100 tokens per second
+    assert bucket.acquire(1) == 0.0
+    assert bucket.acquire(1) > 0.0
@@ -0,0 +1,103 @@
+import sys
+import os
+import shutil
+
+import numpy as np
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from core.config import config
+from services.embedding_providers import HashingEmbedding, OnnxEmbedding, embedding_namespace
+
+
+def test_hashing_embedding_is_deterministic_and_topical():
+    model = HashingEmbedding(dim=256)
+    query = np.array(model.get_query_embedding("decorators and closures"))
+    python = np.array(model.get_text_embedding("Python decorators wrap functions, closures capture variables."))
+    ml = np.array(model.get_text_embedding("Gradient descent optimizes neural network weights."))
+
+    assert len(query) == 256 and np.isclose(np.linalg.norm(query), 1.0)
+    assert np.array_equal(query, HashingEmbedding(dim=256).get_query_embedding("decorators and closures"))
+    assert query @ python > query @ ml
+    assert embedding_namespace(model) == "hashing-256"
+
+
+def test_vector_store_service_runs_offline(tmp_path, monkeypatch):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "python.md").write_text("# Python\nPython decorators wrap functions and closures capture variables.")
+    (vault / "ml.md").write_text("# ML\nGradient descent optimizes neural network weights with backpropagation.")
+    monkeypatch.setattr(config, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(config, "OBSIDIAN_VAULT_PATH", str(vault))
+    monkeypatch.setattr(config, "CHROMA_PERSIST_DIR", str(tmp_path / "index"))
+
+    from services.vector_store import VectorStoreService
+    service = VectorStoreService()
+    assert service.get_index_stats()["documents"] == 2
+
+    _, files = service.search_obsidian("decorators and closures", mode="dense")
+    assert files == ["python.md"]
+    _, files = service.search_obsidian("neural network training", mode="dense")
+    assert files == ["ml.md"]
+    # Vectors from different models live in different collections
+    assert service.manifest.store.endswith("_hashing-512_v1")
+
+    # A build with nothing to do reports an empty diff, not the previous one
+    (vault / "new.md").write_text("# New\nA freshly added note about something else entirely.")
+    assert service.build_obsidian_index()
+    assert service.get_index_stats()["last_update"]["files"] == 1
+    assert service.build_obsidian_index()
+    assert service.get_index_stats()["last_update"]["files"] == 0
+
+    # Chunks of deleted notes count as removed
+    (vault / "new.md").unlink()
+    assert service.build_obsidian_index()
+    assert service.get_index_stats()["last_update"]["chunks_removed"] == 1
+    assert service.delete_documents([str(vault / "ml.md")])
+    assert service.get_index_stats()["last_update"]["chunks_removed"] == 1
+    assert service.get_index_stats()["documents"] == 1
+
+
+def test_onnx_namespace_follows_model_contents(tmp_path):
+    namespaces = []
+    for parent, weights in (("a", b"first"), ("b", b"second model")):
+        model_dir = tmp_path / parent / "MiniLM"
+        model_dir.mkdir(parents=True)
+        (model_dir / "model.onnx").write_bytes(weights)
+        namespaces.append(embedding_namespace(OnnxEmbedding(str(model_dir))))
+    # Different models in same-named folders are kept apart
+    assert namespaces[0] != namespaces[1] and namespaces[0].startswith("onnx-")
+
+    # A copy elsewhere, or a touched file, is still the same model
+    copy = tmp_path / "elsewhere" / "copied-model"
+    shutil.copytree(tmp_path / "a" / "MiniLM", copy)
+    os.utime(copy / "model.onnx", (1, 1))
+    assert embedding_namespace(OnnxEmbedding(str(copy))) == namespaces[0]
+
+
+def test_related_queries_add_context_instead_of_sharing_it(tmp_path, monkeypatch):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "python.md").write_text("# Python\n" + " ".join(
+        f"Python decorators wrap functions and closures capture variable {i}." for i in range(8)))
+    (vault / "ml.md").write_text("# ML\n" + " ".join(
+        f"Gradient descent optimizes neural network weight {i} with backpropagation." for i in range(8)))
+    monkeypatch.setattr(config, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(config, "OBSIDIAN_VAULT_PATH", str(vault))
+    monkeypatch.setattr(config, "CHROMA_PERSIST_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(config, "CONTEXT_TOKEN_BUDGET", 60)
+
+    from services.vector_store import VectorStoreService
+    from services.embedding_pipeline import estimate_tokens
+    service = VectorStoreService()
+    single = service.search_obsidian_many(["decorators and closures"], mode="lexical")
+    both = service.search_obsidian_many(["decorators and closures", "gradient descent backpropagation"], mode="lexical")
+
+    assert sum(estimate_tokens(p) for p in single["results"]) <= 60
+    # The primary query keeps its full share, the related one adds its own
+    assert both["results"][0] == single["results"][0]
+    assert any(p.startswith("[ml.md]") for p in both["results"])
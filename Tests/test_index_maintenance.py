@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+import numpy as np
+from llama_index.core.schema import TextNode
+
+from services.index_maintenance import IdleScheduler
+from services.numpy_vector_store import NumpyVectorStore
+
+
+def test_idle_scheduler_waits_for_idle_and_interval():
+    last_activity = [time.monotonic()]
+    runs = []
+    scheduler = IdleScheduler(
+        lambda: runs.append(1), lambda: last_activity[0],
+        idle_seconds=0.2, interval_seconds=60, check_seconds=0.05
+    )
+    assert not scheduler.due()
+
+    scheduler.start()
+    try:
+        time.sleep(0.5)
+    finally:
+        scheduler.stop()
+    # Ran once the activity went quiet, then not again within the interval
+    assert len(runs) == 1
+    assert scheduler.stats()["runs"] == 1
+    assert not scheduler.due()
+
+
+def test_compact_drops_deleted_rows_and_retrains_clusters(tmp_path):
+    rng = np.random.default_rng(0)
+    store = NumpyVectorStore(persist_dir=str(tmp_path), index_type="ivf", ivf_lists=4, ivf_min_rows=10)
+    store.add([
+        TextNode(id_=f"n{i}", text=f"chunk {i}", embedding=rng.standard_normal(8).tolist())
+        for i in range(40)
+    ])
+    store.persist()
+    store.delete_nodes(node_ids=[f"n{i}" for i in range(30)])
+
+    store.compact()
+    stats = store.stats()
+    assert stats["rows"] == 10 and stats["tombstones"] == 0
+    assert stats["ivf"]["trained_rows"] == 10
+    assert sorted(store.node_ids()) == sorted(f"n{i}" for i in range(30, 40))
+
+
+def test_health_reads_the_dimension_from_the_index(tmp_path, monkeypatch):
+    from core.config import config
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "note.md").write_text("# Note\nMaintenance is local housekeeping.")
+    monkeypatch.setattr(config, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(config, "OBSIDIAN_VAULT_PATH", str(vault))
+    monkeypatch.setattr(config, "CHROMA_PERSIST_DIR", str(tmp_path / "index"))
+
+    from services.vector_store import VectorStoreService
+    service = VectorStoreService()
+
+    def offline(query):
+        raise RuntimeError("no embedding calls during maintenance")
+    monkeypatch.setattr(service, "_embed_query", offline)
+    health = service.index_health()
+    assert health["dimension"] == config.HASHING_EMBED_DIM
+    assert health["query_p50_ms"] is not None
+
+    assert NumpyVectorStore(persist_dir=str(tmp_path / "empty")).dimension() is None
@@ -0,0 +1,36 @@
+import sys
+import os
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.index_manifest import IndexManifest, hash_content
+
+
+def test_manifest_round_trip(tmp_path):
+    """Entries survive a save/load cycle"""
+    path = str(tmp_path / "chroma_db" / "index_manifest.json")
+    manifest = IndexManifest(path)
+    manifest.update("vault/a.md", 1700000000.25, 120, hash_content("hello"), ["c1", "c2"])
+    manifest.save()
+
+    reloaded = IndexManifest(path)
+    assert reloaded.paths() == ["vault/a.md"]
+    assert reloaded.get("vault/a.md")["chunk_ids"] == ["c1", "c2"]
+    assert reloaded.is_unchanged("vault/a.md", 1700000000.25, 120)
+    assert not reloaded.is_unchanged("vault/a.md", 1700000001.0, 120)
+    assert reloaded.chunk_count() == 2
+
+
+def test_manifest_remove_and_corrupt_file(tmp_path):
+    """Removed entries return their chunk IDs and a corrupt file starts empty"""
+    path = str(tmp_path / "index_manifest.json")
+    manifest = IndexManifest(path)
+    manifest.update("b.md", 1.0, 10, hash_content("b"), ["x"])
+    assert manifest.remove("b.md")["chunk_ids"] == ["x"]
+    assert manifest.remove("b.md") is None
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert IndexManifest(path).files == {}
@@ -0,0 +1,77 @@
+import sys
+import os
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+import numpy as np
+
+from services.index_snapshot import (
+    incompatibilities, read_header, read_snapshot, to_absolute, to_relative, write_snapshot
+)
+
+HEADER = {
+    "manifest_version": 2,
+    "embedding_provider": "hashing",
+    "embed_model": "hashing-8",
+    "chunk_size": 512,
+    "chunk_overlap": 50,
+}
+
+
+def test_snapshot_round_trip(tmp_path):
+    vault = str(tmp_path / "vault")
+    note = os.path.join(vault, "Folder", "note.md")
+    relative = to_relative(note, vault)
+    assert relative == "Folder/note.md"
+    assert to_absolute(relative, str(tmp_path / "elsewhere")) == os.path.join(str(tmp_path / "elsewhere"), "Folder", "note.md")
+
+    embeddings = np.random.default_rng(0).standard_normal((5, 8)).astype(np.float32)
+    pages = [
+        ([{"id": f"c{i}", "text": f"chunk {i}", "metadata": {"filepath": relative}, "doc_id": relative} for i in range(3)],
+         embeddings[:3]),
+        ([{"id": f"c{i}", "text": f"chunk {i}", "metadata": {}, "doc_id": None} for i in range(3, 5)], embeddings[3:]),
+    ]
+    path = str(tmp_path / "snapshot.zip")
+    header = write_snapshot(path, HEADER, iter(pages), {relative: {"chunk_ids": ["c0", "c1", "c2"]}})
+
+    assert read_header(path) == header
+    assert header["chunks"] == 5 and header["dimension"] == 8
+    header, chunks, loaded, manifest_files, dedup = read_snapshot(path)
+    assert [chunk["id"] for chunk in chunks] == [f"c{i}" for i in range(5)]
+    assert np.array_equal(loaded, embeddings)
+    assert manifest_files == {relative: {"chunk_ids": ["c0", "c1", "c2"]}}
+    assert dedup is None
+
+
+def test_incompatible_snapshots_are_rejected():
+    header = {**HEADER, "format": 1}
+    assert incompatibilities(header, header) == []
+    problems = incompatibilities(header, {**header, "embed_model": "voyage-3-large", "chunk_size": 256})
+    assert len(problems) == 2
+    assert problems[0].startswith("embed_model")
+
+
+def test_imported_index_has_note_vectors_and_a_vault_tree(tmp_path, monkeypatch):
+    from core.config import config
+    vault = tmp_path / "vault"
+    (vault / "Topics").mkdir(parents=True)
+    (vault / "Topics" / "python.md").write_text("# Python\nDecorators wrap functions.")
+    (vault / "ml.md").write_text("# ML\nGradient descent optimizes weights.")
+    monkeypatch.setattr(config, "EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(config, "RETRIEVAL_STRATEGY", "two_stage")
+    monkeypatch.setattr(config, "OBSIDIAN_VAULT_PATH", str(vault))
+    monkeypatch.setattr(config, "CHROMA_PERSIST_DIR", str(tmp_path / "index"))
+
+    from services.vector_store import VectorStoreService
+    service = VectorStoreService()
+    snapshot = str(tmp_path / "snapshot.zip")
+    service.export_snapshot(snapshot)
+    assert service.import_snapshot(snapshot)
+
+    assert len(service.state.note_index) == 2
+    assert service.state.vault_tree.root_hash is not None
+    assert service.build_obsidian_index()
+    assert service.get_index_stats()["last_update"]["files"] == 0
@@ -0,0 +1,37 @@
+import sys
+import os
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.index_versions import IndexVersions
+
+
+def test_activate_keeps_previous_and_retires_older(tmp_path):
+    path = str(tmp_path / "index_versions.json")
+    versions = IndexVersions(path)
+    assert versions.active_version == 0
+    assert versions.next_version() == 1
+
+    assert versions.activate(1, "chroma:notes_v1") is None
+    assert versions.activate(2, "chroma:notes_v2") is None
+    retired = versions.activate(3, "numpy:notes_v3")
+    assert retired == {"version": 1, "store": "chroma:notes_v1"}
+    assert versions.stats() == {"active": 3, "previous": 2}
+
+    reloaded = IndexVersions(path)
+    assert reloaded.active == {"version": 3, "store": "numpy:notes_v3"}
+    assert reloaded.next_version() == 4
+
+
+def test_rollback_swaps_active_and_previous(tmp_path):
+    versions = IndexVersions(str(tmp_path / "index_versions.json"))
+    assert not versions.rollback()
+
+    versions.activate(1, "chroma:notes_v1")
+    versions.activate(2, "chroma:notes_v2")
+    assert versions.rollback()
+    assert IndexVersions(versions.path).stats() == {"active": 1, "previous": 2}
+    # Numbers of kept versions are never reused
+    assert versions.next_version() == 3
@@ -0,0 +1,107 @@
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from llama_index.core.node_parser import SimpleNodeParser
+
+from services.ingestion import VaultFile, VaultIngestor, bounded_map, batched, chunk_file, split_sections
+
+
+def test_bounded_map_is_lazy_and_ordered():
+    consumed = []
+
+    def source():
+        for i in range(10):
+            consumed.append(i)
+            yield i
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = bounded_map(executor, lambda x: x * x, source(), window=3)
+        assert next(results) == 0
+        # Only a window's worth of input has been pulled so far
+        assert len(consumed) == 3
+        assert list(results) == [x * x for x in range(1, 10)]
+
+
+def test_ingestor_streams_chunked_files(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"note{i}.md"
+        path.write_text(f"# Note {i}\n" + "Some words about the topic. " * 200, encoding="utf-8")
+        paths.append(str(path))
+    (tmp_path / "empty.md").write_text("   ", encoding="utf-8")
+    paths.append(str(tmp_path / "empty.md"))
+
+    parser = SimpleNodeParser.from_defaults(chunk_size=128, chunk_overlap=10)
+    ingestor = VaultIngestor(parser, chunk_size=128, chunk_overlap=10, read_workers=2, queue_size=2)
+    files = list(ingestor.iter_files(paths, skip=lambda path, stat: path.endswith("note0.md")))
+
+    assert [f.path for f in files] == paths[1:]
+    assert all(len(f.nodes) > 1 for f in files[:-1])
+    assert files[-1].nodes == []
+    assert files[1].nodes[0].metadata["filename"] == "note2.md"
+
+    groups = list(batched(files, max_chunks=len(files[0].nodes) + 1))
+    assert sum(len(group) for group in groups) == len(files)
+
+
+
+def test_process_pool_matches_inline_chunking(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"note{i}.md"
+        path.write_text(f"# Note {i}\n" + f"Words about topic {i}. " * 150, encoding="utf-8")
+        paths.append(str(path))
+
+    parser = SimpleNodeParser.from_defaults(chunk_size=128, chunk_overlap=10)
+    inline = VaultIngestor(parser, chunk_size=128, chunk_overlap=10, vault_root=str(tmp_path))
+    pooled = VaultIngestor(
+        parser, chunk_size=128, chunk_overlap=10, chunk_workers=2, process_min_files=1, vault_root=str(tmp_path)
+    )
+    # Workers are never forked from the (threaded) indexing process
+    with pooled._process_pool(len(paths)) as pool:
+        assert pool._mp_context.get_start_method() != "fork"
+
+    expected = [[node.node_id for node in f.nodes] for f in inline.iter_files(paths)]
+    assert [[node.node_id for node in f.nodes] for f in pooled.iter_files(paths)] == expected
+
+def test_split_sections_ignores_headings_in_code():
+    text = "---\ntags: [a]\n---\n# Title\nIntro\n## One\n```python\n# comment\n```\n## Two\nBody\n"
+    sections = split_sections(text)
+    assert [section.splitlines()[0] for section in sections] == ["---", "## One", "## Two"]
+    assert "".join(sections) == text
+
+
+def test_chunk_ids_only_change_for_edited_sections(tmp_path):
+    parser = SimpleNodeParser.from_defaults(chunk_size=64, chunk_overlap=0)
+    sections = [f"## Part {i}\n" + f"Words about part {i}. " * 40 for i in range(3)]
+
+    def chunk_ids(text):
+        path = str(tmp_path / "note.md")
+        vault_file = VaultFile(path, 0.0, len(text), text, "hash")
+        return [node.node_id for node in chunk_file(vault_file, parser, str(tmp_path)).nodes]
+
+    before = chunk_ids("\n".join(sections))
+    assert before == chunk_ids("\n".join(sections))
+    assert len(set(before)) == len(before)
+
+    sections[1] = sections[1].replace("Words about part 1.", "Edited words about part 1.", 1)
+    after = chunk_ids("\n".join(sections))
+    unchanged = set(before) & set(after)
+    # Only the edited section's chunks get new IDs
+    assert 0 < len(unchanged) < len(before)
+    assert before[0] in unchanged and before[-1] in unchanged
+
+
+    # Moving the vault keeps the IDs (same-length roots, as chunk boundaries depend on metadata size)
+    text = "\n".join(sections)
+    moved = []
+    for root in (tmp_path / "v1", tmp_path / "v2"):
+        root.mkdir()
+        vault_file = VaultFile(str(root / "note.md"), 0.0, len(text), text, "hash")
+        moved.append([node.node_id for node in chunk_file(vault_file, parser, str(root)).nodes])
+    assert moved[0] == moved[1]
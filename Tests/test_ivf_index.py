@@ -0,0 +1,67 @@
+import sys
+import os
+
+import numpy as np
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import MetadataFilter, MetadataFilters, VectorStoreQuery
+
+from services.ivf_index import IVFIndex
+from services.numpy_vector_store import NumpyVectorStore
+
+
+def clustered_vectors(n_clusters=8, per_cluster=50, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32) * 5
+    labels = np.repeat(np.arange(n_clusters), per_cluster)
+    vectors = centers[labels] + 0.1 * rng.standard_normal((len(labels), dim)).astype(np.float32)
+    return vectors, labels
+
+
+def test_probe_finds_the_query_cluster():
+    vectors, labels = clustered_vectors()
+    ivf = IVFIndex.train(vectors, n_lists=8)
+    assert ivf.stats()["lists"] == 8 and ivf.stats()["rows"] == len(vectors)
+
+    rows = ivf.probe(vectors[0], nprobe=1)
+    # Well separated clusters are recovered exactly
+    assert set(labels[rows]) == {labels[0]}
+    assert len(ivf.probe(vectors[0], nprobe=8)) == len(vectors)
+
+    ivf.add(vectors[:3])
+    assert ivf.stats()["rows"] == len(vectors) + 3
+    assert ivf.needs_retrain(2 * len(vectors), growth=2.0)
+
+
+def test_ivf_store_matches_flat_and_persists(tmp_path):
+    vectors, labels = clustered_vectors()
+    nodes = [
+        TextNode(id_=f"n{i}", text=f"chunk {i}", metadata={"cluster": int(label)}, embedding=vector.tolist())
+        for i, (vector, label) in enumerate(zip(vectors, labels))
+    ]
+    flat = NumpyVectorStore(persist_dir=str(tmp_path / "flat"))
+    ivf = NumpyVectorStore(persist_dir=str(tmp_path / "ivf"), index_type="ivf", ivf_lists=8, ivf_min_rows=100)
+    for store in (flat, ivf):
+        store.add(nodes)
+    # Queries scan flat until a save trains the clusters
+    query = VectorStoreQuery(query_embedding=(vectors[7] + 0.01).tolist(), similarity_top_k=5)
+    assert ivf.query(query).ids == flat.query(query).ids
+    assert ivf.stats()["ivf"] is None
+    for store in (flat, ivf):
+        store.persist()
+    assert ivf.stats()["ivf"]["lists"] == 8
+
+    assert ivf.query(query, nprobe=1).ids == flat.query(query).ids
+
+    reopened = NumpyVectorStore(persist_dir=str(tmp_path / "ivf"), index_type="ivf", ivf_lists=8, ivf_min_rows=100)
+    assert reopened.stats()["ivf"]["lists"] == 8
+    assert reopened.query(query, nprobe=1).ids == flat.query(query).ids
+
+    # Matches outside the probed clusters are still found by falling back to a full scan
+    filters = MetadataFilters(filters=[MetadataFilter(key="cluster", value=int(labels[-1]))])
+    filtered = VectorStoreQuery(query_embedding=query.query_embedding, similarity_top_k=3, filters=filters)
+    assert reopened.query(filtered, nprobe=1).ids == flat.query(filtered).ids
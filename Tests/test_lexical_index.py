@@ -0,0 +1,92 @@
+import sys
+import os
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.lexical_index import BM25Index, tokenize
+from services.retrieval import SearchHit, expand_query, reciprocal_rank_fusion
+
+
+def test_tokenize_keeps_identifiers_and_parts():
+    assert tokenize("Call build_obsidian_index()") == ["call", "build_obsidian_index", "build", "obsidian", "index"]
+
+
+def test_stopwords_and_weak_matches_are_not_returned():
+    assert tokenize("What is the GIL of CPython?") == ["gil", "cpython"]
+    index = BM25Index()
+    for i in range(20):
+        index.add(f"py{i}", f"The Python notes, part {i}: the interpreter and the standard library", {})
+    index.add("gil", "The GIL serializes bytecode execution in CPython", {})
+
+    # Filler words match nothing, and a term in every chunk scores too low to count
+    assert index.search("what is the capital of france") == []
+    assert index.search("python", min_score=1.0) == []
+    assert [chunk_id for chunk_id, _ in index.search("python gil", min_score=1.0)] == ["gil"]
+
+
+def test_bm25_ranks_exact_terms_and_persists(tmp_path):
+    path = str(tmp_path / "lexical_index.json")
+    index = BM25Index(path)
+    index.add("a", "HNSW graphs power approximate nearest neighbour search", {"filename": "ann.md"})
+    index.add("b", "Gradient descent and backpropagation", {"filename": "ml.md"})
+    index.add("c", "Nearest neighbour search is also called kNN", {"filename": "knn.md"})
+
+    assert [chunk_id for chunk_id, _ in index.search("hnsw")] == ["a"]
+    assert [chunk_id for chunk_id, _ in index.search("nearest neighbour", top_k=5)][:2] in (["a", "c"], ["c", "a"])
+    assert index.search("transformers") == []
+
+    index.save()
+    reloaded = BM25Index(path)
+    assert len(reloaded) == 3
+    assert reloaded.get("b")["metadata"] == {"filename": "ml.md"}
+    assert reloaded.search("backpropagation")[0][0] == "b"
+
+    reloaded.remove("b")
+    assert reloaded.search("backpropagation") == []
+    assert "backpropagation" not in reloaded.postings
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    dense = [SearchHit("x", "x"), SearchHit("y", "y")]
+    lexical = [SearchHit("y", "y"), SearchHit("z", "z")]
+    fused = reciprocal_rank_fusion([dense, lexical])
+    assert [hit.chunk_id for hit in fused] == ["y", "x", "z"]
+
+
+def test_expand_query_adds_keyword_and_sub_question_variants():
+    assert expand_query("What is the difference between HNSW and IVF?", max_variants=4) == [
+        "What is the difference between HNSW and IVF?",
+        "difference between HNSW IVF",
+        "difference between HNSW",
+        "IVF",
+    ]
+    assert expand_query("backpropagation") == ["backpropagation"]
+
+
+def test_saves_append_changes_and_compact_rewrites(tmp_path):
+    path = str(tmp_path / "lexical_index.json")
+    index = BM25Index(path)
+    index.add_many((f"c{i}", f"chunk number {i} about topic{i}", {}) for i in range(5))
+    index.save()
+    base = os.path.getmtime(path), os.path.getsize(path)
+
+    index.add("c5", "a new chunk about gradients", {})
+    index.remove("c0")
+    index.save()
+    # Only the two changes were written, to the log
+    assert (os.path.getmtime(path), os.path.getsize(path)) == base
+    with open(path + ".log", encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+    # A save cut off mid-record loses only that record
+    with open(path + ".log", "a", encoding="utf-8") as f:
+        f.write('{"id": "c6", "te')
+    reloaded = BM25Index(path)
+    assert sorted(reloaded.chunks) == ["c1", "c2", "c3", "c4", "c5"]
+    assert reloaded.search("gradients")[0][0] == "c5"
+
+    reloaded.save()
+    assert not os.path.exists(path + ".log")
+    assert sorted(BM25Index(path).chunks) == ["c1", "c2", "c3", "c4", "c5"]
@@ -0,0 +1,71 @@
+import sys
+import os
+
+import numpy as np
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import (
+    FilterOperator, MetadataFilter, MetadataFilters, VectorStoreQuery
+)
+
+from services.ingestion import note_outline
+from services.note_index import NoteIndex
+from services.numpy_vector_store import NumpyVectorStore
+
+
+def test_note_search_and_persistence(tmp_path):
+    index = NoteIndex(str(tmp_path / "notes.npz"))
+    index.update("a.md", [2.0, 0.0, 0.0])
+    index.update("b.md", [0.0, 1.0, 0.0])
+    index.update("c.md", [1.0, 1.0, 0.0])
+    index.update("empty.md", [0.0, 0.0, 0.0])
+    assert len(index) == 3
+
+    results = index.search([1.0, 0.1, 0.0], top_k=2)
+    assert [path for path, _ in results] == ["a.md", "c.md"]
+    assert np.isclose(results[0][1], 1.0 / np.linalg.norm([1.0, 0.1]), atol=1e-6)
+
+    index.remove("a.md")
+    index.save()
+    reloaded = NoteIndex(str(tmp_path / "notes.npz"))
+    assert len(reloaded) == 2
+    assert reloaded.search([1.0, 0.1, 0.0], top_k=1)[0][0] == "c.md"
+
+    text = "---\ntags: [x]\n---\n# Intro\nbody\n```\n# not a heading\n```\n## Details\n"
+    assert note_outline("/vault/My Note.md", text) == "My Note\nIntro\nDetails"
+
+
+def test_numpy_store_narrows_to_filtered_files(tmp_path):
+    store = NumpyVectorStore(persist_dir=str(tmp_path))
+    rng = np.random.default_rng(0)
+    store.add([
+        TextNode(id_=f"n{i}", text=f"chunk {i}", embedding=rng.standard_normal(4).tolist(),
+                 metadata={"filepath": f"note{i % 20}.md", "tags": "a" if i % 2 else "b"})
+        for i in range(200)
+    ])
+    embedding = rng.standard_normal(4).tolist()
+
+    def search(filters):
+        result = store.query(VectorStoreQuery(query_embedding=embedding, similarity_top_k=3, filters=filters))
+        return result.ids
+
+    notes = ["note3.md", "note7.md"]
+    within = MetadataFilters(filters=[MetadataFilter(key="filepath", operator=FilterOperator.IN, value=notes)])
+    ids = search(within)
+    assert len(ids) == 3 and all(int(i[1:]) % 20 in (3, 7) for i in ids)
+    # Same answer as ranking every row of those files by hand
+    rows = [i for i in range(200) if i % 20 in (3, 7)]
+    vectors = np.array([store.get_embeddings([f"n{i}"])[0] for i in rows])
+    best = np.argsort(((vectors - np.array(embedding)) ** 2).sum(axis=1))[:3]
+    assert ids == [f"n{rows[i]}" for i in best]
+
+    # Other filters still apply within the files, and a re-added node moves files
+    both = MetadataFilters(filters=[*within.filters, MetadataFilter(key="tags", value="a")])
+    assert all(int(i[1:]) % 20 in (3, 7) for i in search(both))
+    assert all(int(i[1:]) % 2 for i in search(both))
+    store.add([TextNode(id_="n0", text="moved", embedding=embedding, metadata={"filepath": "note3.md", "tags": "a"})])
+    assert search(within)[0] == "n0"
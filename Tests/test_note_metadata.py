@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.note_metadata import SearchFilters, note_metadata, parse_frontmatter
+from services.numpy_vector_store import metadata_matches
+
+SESSION_NOTE = """---
+created: 2025-01-02T10:30:00
+type: learning_session_summary
+daily_folder: 2025-01-02
+tags: [Python, list comprehensions]
+---
+
+# Learning Session Summary
+"""
+
+
+def test_frontmatter_and_folder_become_flat_metadata(tmp_path):
+    path = os.path.join(str(tmp_path), "Daily Notes", "2025-01-02", "session.md")
+    metadata = note_metadata(path, SESSION_NOTE, vault_root=str(tmp_path), mtime=0.0)
+
+    assert parse_frontmatter("no frontmatter") == {}
+    assert metadata["note_type"] == "learning_session_summary"
+    assert metadata["tags"] == "python,list-comprehensions"
+    assert metadata["tag_python"] == 1 and metadata["tag_list-comprehensions"] == 1
+    assert metadata["folder"] == "Daily Notes/2025-01-02"
+    assert metadata["folder_1"] == "Daily Notes" and metadata["folder_2"] == "Daily Notes/2025-01-02"
+    assert metadata["created"] > 0
+    assert all(isinstance(value, (str, int, float)) for value in metadata.values())
+
+    plain = note_metadata(os.path.join(str(tmp_path), "inbox.md"), "# Inbox\ntext", str(tmp_path), mtime=42.0)
+    assert plain["note_type"] == "note" and plain["folder"] == "" and plain["created"] == 42.0
+
+
+def test_search_filters_match_metadata(tmp_path):
+    session = note_metadata(os.path.join(str(tmp_path), "Daily Notes", "s.md"), SESSION_NOTE, str(tmp_path), 0.0)
+    topic = note_metadata(
+        os.path.join(str(tmp_path), "Topics", "ML", "gd.md"), "---\ntags: ml\n---\ntext", str(tmp_path), 0.0
+    )
+
+    def matching(filters):
+        metadata_filters = filters.to_metadata_filters()
+        return [name for name, m in (("session", session), ("topic", topic)) if metadata_matches(m, metadata_filters)]
+
+    assert SearchFilters().is_empty()
+    assert matching(SearchFilters(tags=["#PYTHON", "ml"])) == ["session", "topic"]
+    assert matching(SearchFilters(tags=["python"])) == ["session"]
+    assert matching(SearchFilters(folder="Topics/")) == ["topic"]
+    assert matching(SearchFilters(folder="Topics/ML")) == ["topic"]
+    assert matching(SearchFilters(folder="Top")) == []
+    assert matching(SearchFilters(exclude_sessions=True)) == ["topic"]
+    assert matching(SearchFilters(created_after="2025-01-01", created_before="2025-01-03")) == ["session"]
@@ -0,0 +1,118 @@
+import sys
+import os
+
+import numpy as np
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.types import MetadataFilter, MetadataFilters, VectorStoreQuery
+
+from services.numpy_vector_store import NumpyVectorStore
+
+
+def make_node(node_id, embedding, filename):
+    node = TextNode(id_=node_id, text=f"text of {node_id}", metadata={"filename": filename}, embedding=embedding)
+    node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id=filename)
+    return node
+
+
+def query(store, embedding, top_k=2, **kwargs):
+    return store.query(VectorStoreQuery(query_embedding=embedding, similarity_top_k=top_k, **kwargs))
+
+
+def test_query_ranks_by_distance_and_persists(tmp_path):
+    store = NumpyVectorStore(persist_dir=str(tmp_path))
+    store.add([
+        make_node("a", [1.0, 0.0, 0.0], "a.md"),
+        make_node("b", [0.0, 1.0, 0.0], "b.md"),
+        make_node("c", [0.7, 0.7, 0.0], "c.md"),
+    ])
+
+    result = query(store, [1.0, 0.0, 0.0])
+    assert result.ids == ["a", "c"]
+    # Same exp(-squared L2) scale as ChromaVectorStore
+    assert np.isclose(result.similarities[0], 1.0)
+    assert np.isclose(result.similarities[1], np.exp(-(0.3 ** 2 + 0.7 ** 2)))
+
+    store.persist()
+    reloaded = NumpyVectorStore(persist_dir=str(tmp_path))
+    assert all(isinstance(part, np.memmap) for part in reloaded._matrix.parts)
+    assert reloaded.count() == 3
+    assert query(reloaded, [0.0, 1.0, 0.0], top_k=1).nodes[0].text == "text of b"
+
+
+def test_delete_upsert_and_filters(tmp_path):
+    store = NumpyVectorStore(persist_dir=str(tmp_path), dtype="float16")
+    store.add([make_node("a", [1.0, 0.0], "a.md"), make_node("b", [0.0, 1.0], "b.md")])
+
+    store.delete_nodes(node_ids=["a"])
+    assert query(store, [1.0, 0.0]).ids == ["b"]
+
+    # Re-adding an ID replaces the old vector
+    store.add([make_node("b", [1.0, 0.0], "b.md"), make_node("c", [0.0, 1.0], "c.md")])
+    filters = MetadataFilters(filters=[MetadataFilter(key="filename", value="c.md")])
+    assert query(store, [1.0, 0.0], filters=filters).ids == ["c"]
+
+    store.delete("b.md")
+    store.persist()
+    reloaded = NumpyVectorStore(persist_dir=str(tmp_path), dtype="float16")
+    assert [node.node_id for node in reloaded.get_nodes()] == ["c"]
+    assert reloaded.stats()["tombstones"] == 0
+
+
+def test_quantized_search_reranks_with_exact_scores(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 64)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    nodes = [make_node(f"n{i}", vector.tolist(), f"{i}.md") for i, vector in enumerate(vectors)]
+    probe = vectors[7] + 0.05 * rng.standard_normal(64).astype(np.float32)
+
+    exact = NumpyVectorStore(persist_dir=str(tmp_path / "exact"))
+    exact.add(nodes)
+    expected = query(exact, probe.tolist(), top_k=3)
+
+    for mode in ("int8", "binary"):
+        store = NumpyVectorStore(persist_dir=str(tmp_path / mode), quantization=mode)
+        store.add(nodes)
+        result = query(store, probe.tolist(), top_k=3)
+        assert result.ids[0] == "n7"
+        # Re-ranked scores are the exact ones, so the similarity threshold is unaffected
+        assert np.allclose(result.similarities[0], expected.similarities[0], atol=1e-5)
+
+        store.persist()
+        reloaded = NumpyVectorStore(persist_dir=str(tmp_path / mode), quantization=mode)
+        assert 0 < reloaded.stats()["code_bytes"] < reloaded.stats()["matrix_bytes"]
+        assert query(reloaded, probe.tolist(), top_k=1).ids == ["n7"]
+
+
+def test_saves_append_to_a_log_until_compaction(tmp_path):
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((30, 16)).astype(np.float32)
+    store = NumpyVectorStore(persist_dir=str(tmp_path), quantization="int8")
+    store.add([make_node(f"n{i}", vectors[i].tolist(), f"{i}.md") for i in range(20)])
+    store.persist()
+    base = os.path.join(str(tmp_path), "embeddings.npy")
+    written = os.path.getmtime(base), os.path.getsize(base)
+
+    # Re-adding n3 and deleting n4 only appends to the log, the base files are untouched
+    store.add([make_node("n3", vectors[20].tolist(), "3.md"), make_node("n20", vectors[21].tolist(), "20.md")])
+    store.delete_nodes(node_ids=["n4"])
+    store.persist()
+    assert (os.path.getmtime(base), os.path.getsize(base)) == written
+    assert store.stats()["log_rows"] == 3
+
+    reloaded = NumpyVectorStore(persist_dir=str(tmp_path), quantization="int8")
+    assert reloaded.count() == 20
+    assert all(isinstance(part, np.memmap) for part in reloaded._matrix.parts)
+    assert query(reloaded, vectors[20].tolist(), top_k=1).ids == ["n3"]
+    assert query(reloaded, vectors[4].tolist(), top_k=1).ids != ["n4"]
+    assert np.allclose(reloaded.get_embeddings(["n20"])[0], vectors[21])
+
+    reloaded.compact()
+    assert not os.path.exists(os.path.join(str(tmp_path), "log.jsonl"))
+    compacted = NumpyVectorStore(persist_dir=str(tmp_path), quantization="int8")
+    assert compacted.stats()["tombstones"] == 0 and compacted.count() == 20
+    assert query(compacted, vectors[21].tolist(), top_k=1).ids == ["n20"]
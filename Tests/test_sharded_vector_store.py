@@ -0,0 +1,68 @@
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import MetadataFilter, MetadataFilters, VectorStoreQuery
+
+from services.numpy_vector_store import NumpyVectorStore
+from services.sharded_vector_store import ShardedVectorStore, shard_for_path
+
+VAULT = os.path.join(os.sep, "vault")
+
+
+def make_node(node_id, embedding, relative_path):
+    folder = os.path.dirname(relative_path)
+    metadata = {"filepath": os.path.join(VAULT, relative_path), "folder": folder}
+    if folder:
+        metadata["folder_1"] = folder.split("/")[0]
+    return TextNode(id_=node_id, text=f"text of {node_id}", metadata=metadata, embedding=embedding)
+
+
+def make_store(tmp_path, sharding="folder"):
+    return ShardedVectorStore(
+        shards={},
+        route=lambda node: shard_for_path(node.metadata["filepath"], VAULT, sharding, 4),
+        open_shard=lambda shard: NumpyVectorStore(persist_dir=str(tmp_path / shard)),
+        sharding=sharding,
+        executor=ThreadPoolExecutor(max_workers=2),
+    )
+
+
+def test_shard_for_path():
+    assert shard_for_path(os.path.join(VAULT, "Daily Notes", "2025", "a.md"), VAULT, "folder") == "daily-notes"
+    assert shard_for_path(os.path.join(VAULT, "a.md"), VAULT, "folder") == "root"
+    bucket = shard_for_path(os.path.join(VAULT, "Topics", "a.md"), VAULT, "hash", 4)
+    assert bucket in {"h00", "h01", "h02", "h03"}
+    assert bucket == shard_for_path(os.path.join(VAULT, "Topics", "a.md"), VAULT, "hash", 4)
+
+
+def test_routes_nodes_and_merges_fan_out_results(tmp_path):
+    store = make_store(tmp_path)
+    store.add([
+        make_node("a", [1.0, 0.0], "Topics/a.md"),
+        make_node("b", [0.0, 1.0], "Daily Notes/b.md"),
+        make_node("c", [0.9, 0.1], "c.md"),
+    ])
+    assert {name: shard.count() for name, shard in store.shards.items()} == {"topics": 1, "daily-notes": 1, "root": 1}
+
+    # The global top-k is merged from every shard's results by score
+    result = store.query(VectorStoreQuery(query_embedding=[1.0, 0.0], similarity_top_k=2))
+    assert result.ids == ["a", "c"]
+    assert result.similarities == sorted(result.similarities, reverse=True)
+
+    # A folder filter only queries that folder's shard
+    filters = MetadataFilters(filters=[MetadataFilter(key="folder_1", value="Daily Notes")])
+    result = store.query(VectorStoreQuery(query_embedding=[1.0, 0.0], similarity_top_k=2, filters=filters))
+    assert result.ids == ["b"]
+
+    # Deletes only reach the shard holding the node
+    store.delete_nodes(node_ids=["a"])
+    assert store.shards["topics"].count() == 0 and store.count() == 2
+    store.persist()
+    assert NumpyVectorStore.exists(str(tmp_path / "daily-notes"))
+    assert store.stats()["shards"]["root"]["chunks"] == 1
@@ -0,0 +1,40 @@
+import sys
+import os
+import threading
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from core.startup import LazyService, lazy_import, startup_timer
+
+
+def test_lazy_service_builds_once_on_first_use():
+    built = []
+
+    class Service:
+        def __init__(self):
+            built.append(self)
+            self.name = "service"
+
+    proxy = LazyService("test_service", Service)
+    assert not proxy.loaded and not built
+
+    threads = [threading.Thread(target=lambda: proxy.name) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert proxy.loaded and proxy.get() is built[0]
+    assert "test_service init" in startup_timer.report()
+
+
+def test_lazy_import_defers_the_module():
+    sys.modules.pop("services.retrieval", None)
+    proxy = lazy_import("services.retrieval", "expand_query")
+    assert "services.retrieval" not in sys.modules
+
+    assert proxy.get()("what is python")[0] == "what is python"
+    assert "services.retrieval" in sys.modules
+    assert "import services.retrieval" in startup_timer.report()
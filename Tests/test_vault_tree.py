@@ -0,0 +1,53 @@
+import sys
+import os
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.vault_tree import VaultTree
+
+
+def write(root, relative, text):
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return os.path.normpath(str(path))
+
+
+def test_diff_finds_changed_files_and_folders(tmp_path):
+    write(tmp_path, "A/one.md", "one")
+    write(tmp_path, "A/Deep/two.md", "two")
+    removed = write(tmp_path, "B/three.md", "three")
+    write(tmp_path, ".obsidian/hidden.md", "hidden")
+    write(tmp_path, "A/image.png", "not a note")
+
+    before = VaultTree.scan(str(tmp_path))
+    assert len(before.paths()) == 3
+    assert before.diff(VaultTree.scan(str(tmp_path))) == ([], [])
+
+    edited = write(tmp_path, "A/Deep/two.md", "two, edited")
+    os.remove(removed)
+    added = write(tmp_path, "C/four.md", "four")
+    changed_dirs, changed_files = before.diff(VaultTree.scan(str(tmp_path)))
+    assert sorted(changed_files) == sorted([edited, removed, added])
+    # The root, A, A/Deep, B and C, each on the path to a change
+    assert os.path.normpath(str(tmp_path / "A" / "Deep")) in changed_dirs
+    assert len(changed_dirs) == 5
+
+
+def test_saved_tree_and_forget(tmp_path):
+    vault = tmp_path / "vault"
+    note = write(vault, "A/Deep/note.md", "note")
+    write(vault, "other.md", "other")
+
+    tree = VaultTree(str(tmp_path / "tree.json"))
+    tree.adopt(VaultTree.scan(str(vault)))
+    tree.save()
+    loaded = VaultTree(str(tmp_path / "tree.json"))
+    assert loaded.root_hash == tree.root_hash
+
+    # A forgotten note shows up as changed against the next scan
+    loaded.forget([note])
+    assert loaded.root_hash != tree.root_hash
+    assert loaded.diff(VaultTree.scan(str(vault)))[1] == [note]
@@ -0,0 +1,55 @@
+import sys
+import os
+import time
+
+# Add the parent directory (LearningAssistant) to the Python path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from services.vault_watcher import VaultWatcher
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run_watcher(tmp_path, use_inotify):
+    batches = []
+    (tmp_path / ".obsidian").mkdir()
+    watcher = VaultWatcher(
+        str(tmp_path),
+        on_change=batches.append,
+        debounce_seconds=0.3,
+        poll_interval=0.1,
+        use_inotify=use_inotify,
+    )
+    watcher.start()
+    try:
+        # A burst of edits to one note is indexed once
+        note = tmp_path / "note.md"
+        for i in range(3):
+            note.write_text(f"edit {i}", encoding="utf-8")
+            time.sleep(0.05)
+        (tmp_path / ".obsidian" / "workspace.md").write_text("ignored", encoding="utf-8")
+        (tmp_path / "image.png").write_bytes(b"ignored")
+
+        assert wait_for(lambda: batches)
+        assert batches[0] == [os.path.normpath(str(note))]
+        assert wait_for(lambda: watcher.stats()["batches_indexed"] == 1)
+        assert watcher.stats()["pending_files"] == 0
+    finally:
+        watcher.stop()
+    return watcher
+
+
+def test_polling_watcher_debounces_edits(tmp_path):
+    assert run_watcher(tmp_path, use_inotify=False).backend_name == "polling"
+
+
+def test_inotify_watcher_debounces_edits(tmp_path):
+    run_watcher(tmp_path, use_inotify=True)
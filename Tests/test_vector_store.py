@@ -33,20 +33,20 @@ def test_vector_store():
     
     # Test document loading
     print("\n2. Loading documents...")
-    documents = service._load_obsidian_documents()
+    files = [f for f in service.ingestor.iter_files(service._list_vault_files()) if f.nodes]
     
-    if not documents:
+    if not files:
         print("❌ No documents found. Please add some .md files to your Obsidian vault.")
         return
     
-    print(f"✅ Loaded {len(documents)} documents")
+    print(f"✅ Loaded {len(files)} documents")
     
     # Show first document preview
-    if documents:
-        first_doc = documents[0]
+    if files:
+        first_chunk = files[0].nodes[0]
         print(f"\n📄 First document preview:")
-        print(f"   Filename: {first_doc.metadata['filename']}")
-        print(f"   Content preview: {first_doc.text[:200]}...")
+        print(f"   Filename: {first_chunk.metadata['filename']}")
+        print(f"   Content preview: {first_chunk.text[:200]}...")
     
     # Test indexing
     print("\n3. Building vector index...")
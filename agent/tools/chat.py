@@ -1,10 +1,16 @@
+from core.config import config
+
 # agent/tools/chat.py
 def chat_with_context(
     vector_service,
-    user_message: str
+    user_message: str,
+    related_queries: list = None,
+    filters=None
 ) -> dict:
     """
     The LLM, when reasoning, can call this tool to fetch additional context from the vault.
+    related_queries are searched alongside user_message in one batched lookup, and
+    filters (a SearchFilters) limits the search to matching notes.
     Returns: {
         "vault_context": list,
         "referenced_files": list,
@@ -13,7 +19,11 @@ def chat_with_context(
     vault_context = []
     referenced_files = []
     try:
-        vault_context, referenced_files = vector_service.search_obsidian(user_message)
+        if related_queries or config.QUERY_EXPANSION_ENABLED:
+            result = vector_service.search_obsidian_many([user_message] + list(related_queries or []), filters=filters)
+            vault_context, referenced_files = result["results"], result["referenced_files"]
+        else:
+            vault_context, referenced_files = vector_service.search_obsidian(user_message, filters=filters)
     except Exception as e:
         print("I encountered an error using chat_with_context tool")
     return {
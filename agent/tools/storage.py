@@ -15,8 +15,10 @@ def save_session(
     subject = summary_data.get("subject", "")
     session_summary = summary_data.get("summary", "")
     topics = summary_data.get("topics", [])
-    path = obsidian_service.save_session_notes(session_summary, subject, topics, referenced_files)
-    if (vector_service.build_obsidian_index()):
+    saved_files = obsidian_service.save_session_notes(session_summary, subject, topics, referenced_files)
+    path = saved_files[0] if saved_files else ""
+    # Only the new note and the files that received backlinks changed
+    if (vector_service.upsert_documents(saved_files)):
         print("Vault successfully reindexed.")
     else:
         print("Error indexing vault.")
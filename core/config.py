@@ -22,12 +22,92 @@ class AgentConfig:
         self.ENABLE_TOOL_DEBUGGING: bool = False
         
         # Vector Store Settings
+        self.VECTOR_BACKEND: str = "chroma"           # "chroma" or "numpy" (memory-mapped brute force)
+        self.NUMPY_VECTOR_DTYPE: str = "float32"      # "float32" or "float16" storage for the numpy backend
+        self.VECTOR_QUANTIZATION: str = "none"        # "none", "int8" or "binary" codes for the numpy backend
+        self.QUANTIZATION_RERANK_MULTIPLIER: int = 10 # Quantized candidates per result re-ranked with exact vectors
+        self.NUMPY_INDEX_TYPE: str = "flat"           # "flat" (scan every chunk) or "ivf" (k-means inverted file) for the numpy backend
+        self.IVF_LISTS: int = 0                       # k-means clusters, 0 = sqrt(chunks)
+        self.IVF_NPROBE: int = 8                      # Clusters scanned per query, more = better recall, slower
+        self.IVF_MIN_CHUNKS: int = 20_000             # Smaller stores are scanned flat
+        self.IVF_RETRAIN_GROWTH: float = 2.0          # Retrain the clusters once the store has grown by this factor
         self.CHROMA_COLLECTION_NAME: str = "obsidian_notes"
         self.EMBED_MODEL: str = "voyage-3-large"
+        self.EMBEDDING_PROVIDER: str = "voyage"       # "voyage", "hashing" (offline, deterministic) or "onnx" (local CPU model)
+        self.HASHING_EMBED_DIM: int = 512             # Dimensions of the hashing embedder
+        self.ONNX_MODEL_DIR: str = ""                 # Folder with model.onnx and tokenizer.json for the onnx provider
         self.VECTOR_SEARCH_TOP_K: int = 3
         self.VECTOR_SIMILARITY_THRESHOLD: float = 0.4
+        self.LOCAL_SIMILARITY_THRESHOLD: float = 0.2  # Used instead with the hashing and onnx providers, whose scores run lower
+        self.CONTEXT_TOKEN_BUDGET: int = 400          # Estimated tokens of vault context per search
         self.NODE_CHUNK_SIZE: int = 512
         self.NODE_CHUNK_OVERLAP: int = 50
+        self.SEARCH_MODE: str = "dense"               # "dense", "lexical" or "hybrid"
+        self.LEXICAL_MIN_SCORE: float = 1.0           # BM25 score a chunk needs to be returned by lexical search
+        self.RETRIEVAL_STRATEGY: str = "flat"         # "flat" (all chunks) or "two_stage" (closest notes first, then their chunks)
+        self.NOTE_CANDIDATES: int = 8                 # Notes picked by the first stage of two-stage retrieval
+        self.NOTE_VECTOR: str = "mean"                # Note vectors: "mean" of chunk embeddings or embedded "headings" (title and headings)
+        self.HYBRID_CANDIDATE_MULTIPLIER: int = 4     # Candidates per retriever = top_k * this
+        self.RRF_K: int = 60                          # Reciprocal rank fusion damping constant
+        self.QUERY_EMBED_TIMEOUT_SECONDS: float = 10.0  # Fall back to lexical search after this
+        self.SEARCH_MAX_WORKERS: int = 4              # Concurrent lookups in search_obsidian_many
+        self.QUERY_EXPANSION_ENABLED: bool = False    # Also retrieve keyword / sub-question variants of queries
+        self.QUERY_EXPANSION_MAX_VARIANTS: int = 3    # Variants per query, including the original
+        self.CHROMA_PERSIST_DIR: str = "./chroma_db"
+        self.INDEX_MANIFEST_FILE: str = "index_manifest.json"  # Stored inside CHROMA_PERSIST_DIR
+        self.LEXICAL_INDEX_FILE: str = "lexical_index.json"    # Stored inside CHROMA_PERSIST_DIR
+        self.INDEX_VERSIONS_FILE: str = "index_versions.json"  # Active index version, stored inside CHROMA_PERSIST_DIR
+        self.VAULT_TREE_FILE: str = "vault_tree.json"          # Merkle tree of the vault, stored with each index version
+        self.NOTE_INDEX_FILE: str = "note_index.npz"           # Note-level vectors for two-stage retrieval, stored with each index version
+        self.SHARDING: str = "none"                   # "none", "folder" (a collection per top-level folder) or "hash"
+        self.SHARD_HASH_BUCKETS: int = 8              # Shards in "hash" mode
+        self.SHARD_SEARCH_WORKERS: int = 4            # Shards queried at once per search
+        
+        # Vault Watcher Settings
+        self.WATCH_VAULT: bool = False                # Re-index edits in the background
+        self.WATCH_DEBOUNCE_SECONDS: float = 2.0      # Quiet period before indexing a burst of edits
+        self.WATCH_MAX_DELAY_SECONDS: float = 30.0    # Index anyway if edits keep coming
+        self.WATCH_POLL_INTERVAL_SECONDS: float = 5.0 # Used when inotify is unavailable
+        
+        # Index Maintenance Settings
+        self.MAINTENANCE_ENABLED: bool = False        # Clean up and compact the index in the background while idle
+        self.MAINTENANCE_IDLE_SECONDS: float = 600.0  # Quiet period (no searches or updates) before it runs
+        self.MAINTENANCE_INTERVAL_SECONDS: float = 86400.0  # At most one run per interval
+        self.COMPACT_FRAGMENTATION_THRESHOLD: float = 0.2   # Compact once this share of stored chunks were deleted
+        self.MAINTENANCE_LATENCY_SAMPLES: int = 20    # Probe queries timed for the health report
+        
+        # Async Runtime Settings
+        self.HTTP_POOL_SIZE: int = 20                 # Pooled connections shared by async API calls
+        
+        # Embedding Cache Settings
+        self.EMBEDDING_CACHE_ENABLED: bool = True
+        self.EMBEDDING_CACHE_FILE: str = "embedding_cache.sqlite"  # Stored inside CHROMA_PERSIST_DIR
+        self.EMBEDDING_CACHE_MAX_ENTRIES: int = 200_000
+        self.QUERY_CACHE_SIZE: int = 256              # In-memory query embeddings (0 disables)
+        self.QUERY_CACHE_TTL_SECONDS: int = 3600
+        
+        # Deduplication Settings (index builds)
+        self.DEDUP_ENABLED: bool = True               # Embed repeated chunks once
+        self.DEDUP_NEAR_THRESHOLD: float = 0.85       # Estimated Jaccard similarity of word shingles
+        self.DEDUP_NUM_PERM: int = 64                 # MinHash signature length
+        self.DEDUP_LSH_BANDS: int = 8                 # LSH bands (num_perm / bands rows each)
+        self.DEDUP_SHINGLE_SIZE: int = 5              # Words per shingle
+        self.DEDUP_INDEX_FILE: str = "dedup_index.json"  # Stored inside CHROMA_PERSIST_DIR
+        
+        # Embedding Pipeline Settings (index builds)
+        self.EMBED_BATCH_TOKENS: int = 32_000         # Estimated tokens per request
+        self.EMBED_BATCH_MAX_ITEMS: int = 128         # Texts per request
+        self.EMBED_MAX_CONCURRENCY: int = 4           # Requests in flight at once
+        self.EMBED_REQUESTS_PER_MINUTE: int = 300
+        self.EMBED_TOKENS_PER_MINUTE: int = 1_000_000
+        self.EMBED_MAX_RETRIES: int = 5
+        
+        # Ingestion Settings (index builds)
+        self.INGEST_READ_WORKERS: int = 8             # Threads reading files
+        self.INGEST_CHUNK_WORKERS: int = os.cpu_count() or 1  # Processes parsing and chunking (0 = inline)
+        self.INGEST_QUEUE_SIZE: int = 64              # Files in flight per stage
+        self.INGEST_PROCESS_MIN_FILES: int = 32       # Smaller jobs are chunked inline
+        self.INGEST_BATCH_CHUNKS: int = 512           # Chunks embedded and stored per batch
         
         # Load from environment (self = this specific config instance)
         self.OBSIDIAN_VAULT_PATH: str = os.getenv("OBSIDIAN_VAULT_PATH", "")
@@ -48,7 +128,7 @@ class AgentConfig:
         if not self.ANTHROPIC_API_KEY:  # self = this instance
             errors.append("ANTHROPIC_API_KEY not found in environment variables")
         
-        if not self.VOYAGE_API_KEY:
+        if self.EMBEDDING_PROVIDER == "voyage" and not self.VOYAGE_API_KEY:
             errors.append("VOYAGE_API_KEY not found in environment variables")
         
         if not self.OBSIDIAN_VAULT_PATH:
@@ -0,0 +1,109 @@
+import time
+import importlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, List
+
+
+class StartupTimer:
+    """
+    Records how long each startup phase took (imports, client setup, index
+    load) so cold start can be broken down. Phases may nest and run on any
+    thread; report() indents nested phases under the one they ran in.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.entries: List[tuple] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            with self._lock:
+                self.entries.append((start, depth, name, time.perf_counter() - start))
+
+    def mark(self, name: str) -> None:
+        """Record a milestone, reported as the time since startup"""
+        with self._lock:
+            self.entries.append((time.perf_counter(), 0, name, None))
+
+    def report(self) -> str:
+        with self._lock:
+            entries = sorted(self.entries)
+        lines = ["Startup timing:"]
+        for start, depth, name, seconds in entries:
+            if seconds is None:
+                lines.append(f"  {name}: {start - self.started:.2f}s after start")
+            else:
+                lines.append(f"  {'  ' * depth}{name}: {seconds:.2f}s")
+        return "\n".join(lines)
+
+
+startup_timer = StartupTimer()
+
+
+class LazyService:
+    """
+    Stand-in for a service singleton that builds it on first use.
+
+    Attribute access is forwarded to the instance, so callers use the proxy
+    exactly like the service. Construction is timed and happens once, even
+    when several threads need the service at the same moment.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], phase: str = None):
+        self._factory = factory
+        self._phase = phase or f"{name} init"
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    with startup_timer.phase(self._phase):
+                        self._instance = self._factory()
+        return self._instance
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, attribute: str) -> Any:
+        if attribute.startswith("__"):
+            # Keep copy/pickle probing from building the service
+            raise AttributeError(attribute)
+        return getattr(self.get(), attribute)
+
+
+def lazy_import(module_name: str, attribute: str) -> LazyService:
+    """A proxy for module_name.attribute that only imports the module on first use"""
+    def resolve():
+        with startup_timer.phase(f"import {module_name}"):
+            module = importlib.import_module(module_name)
+        value = getattr(module, attribute)
+        return value.get() if isinstance(value, LazyService) else value
+    return LazyService(attribute, resolve, phase=f"load {attribute}")
+
+
+def warm_up(*steps: Callable[[], Any], on_done: Callable[[], Any] = None) -> threading.Thread:
+    """Run slow startup steps on a daemon thread so the UI or REPL can respond right away"""
+    def run():
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                print(f"Warm-up step failed: {e}")
+        if on_done:
+            on_done()
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
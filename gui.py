@@ -7,7 +7,7 @@ import sys
 import markdown
 from multiprocessing import Process, Queue
 from PySide6.QtCore import QTimer
-from main import process_user_input
+from main import process_user_input, warm_up_services
 
 class BackendProcess:
     def __init__(self):
@@ -19,6 +19,7 @@ class BackendProcess:
 
     @staticmethod
     def worker(input_queue, output_queue):
+        warm_up_services()
         while True:
             message = input_queue.get()
             if message == "__EXIT__":
@@ -1,18 +1,37 @@
 from agent.learning_agent import LearningAgent
 from agent.tools import chat, storage
-from services.vector_store import vector_service
-from services.llm_service import llm_service
-from services.obsidian_service import obsidian_service
+from core.startup import LazyService, lazy_import, startup_timer, warm_up
 from core.conversation import conversation_manager
+from core.config import config
 from utils.output_cleaning import clean_llm_output
 
-
-def chat_with_context_tool(user_message: str) -> dict:
+# Services (and llama_index, chromadb, langchain) load on first use, so importing main stays fast
+vector_service = lazy_import("services.vector_store", "vector_service")
+llm_service = lazy_import("services.llm_service", "llm_service")
+obsidian_service = lazy_import("services.obsidian_service", "obsidian_service")
+
+
+def chat_with_context_tool(
+    user_message: str,
+    related_queries: list = None,
+    tags: list = None,
+    folder: str = None,
+    created_after: str = None,
+    created_before: str = None,
+    exclude_sessions: bool = False
+) -> dict:
     """
     Fetch relevant context from the Obsidian vault using a semantic search.
 
     Args:
         user_message (str): The user's query or message to search for relevant context.
+        related_queries (list): Optional extra search queries (e.g. each sub-topic of a
+            compound question), searched together with user_message in one batch.
+        tags (list): Only search notes with any of these tags.
+        folder (str): Only search notes in this vault folder (and its subfolders).
+        created_after (str): Only search notes created on or after this ISO date.
+        created_before (str): Only search notes created on or before this ISO date.
+        exclude_sessions (bool): Leave out past learning session summaries.
 
     Returns:
         dict: {
@@ -20,7 +39,21 @@ def chat_with_context_tool(user_message: str) -> dict:
             "referenced_files": list of filenames referenced in the context
         }
     """
-    result = chat.chat_with_context(vector_service=vector_service, user_message=user_message)
+    # Imported here, it pulls in llama_index
+    from services.note_metadata import SearchFilters
+    filters = SearchFilters(
+        tags=tags or [],
+        folder=folder,
+        created_after=created_after,
+        created_before=created_before,
+        exclude_sessions=exclude_sessions
+    )
+    result = chat.chat_with_context(
+        vector_service=vector_service,
+        user_message=user_message,
+        related_queries=related_queries,
+        filters=None if filters.is_empty() else filters
+    )
     return result
 
 def save_session_tool(
@@ -42,8 +75,7 @@ tools = [
     save_session_tool,
 ]
 
-llm_with_tools = llm_service.llm.bind_tools(tools)
-agent = LearningAgent(llm_with_tools)
+agent = LazyService("agent", lambda: LearningAgent(llm_service.llm.bind_tools(tools)))
 
 
 
@@ -83,7 +115,15 @@ def process_user_input(user_input: str):
                     try:
                         # If the tool is chat_with_context_tool, accumulate referenced files
                         if tool_name == "chat_with_context_tool":
-                            tool_result = chat_with_context_tool(tool_input.get("user_message"))
+                            tool_result = chat_with_context_tool(
+                                tool_input.get("user_message"),
+                                related_queries=tool_input.get("related_queries"),
+                                tags=tool_input.get("tags"),
+                                folder=tool_input.get("folder"),
+                                created_after=tool_input.get("created_after"),
+                                created_before=tool_input.get("created_before"),
+                                exclude_sessions=bool(tool_input.get("exclude_sessions", False))
+                            )
                             if isinstance(tool_result, dict):
                                 new_refs = tool_result.get("referenced_files", [])
                                 conversation_manager.referenced_files_state.update(new_refs)
@@ -119,10 +159,44 @@ def process_user_input(user_input: str):
     return assistant_output, "normal"
 
 
+def start_vault_watcher():
+    """Keep the index in step with vault edits in the background, if enabled"""
+    if config.WATCH_VAULT and vector_service.start_watcher():
+        print(f"Watching vault for changes ({vector_service.watcher.backend_name})")
+
+
+def start_index_maintenance():
+    """Clean up and compact the index in the background while the assistant is idle, if enabled"""
+    if config.MAINTENANCE_ENABLED and vector_service.start_maintenance():
+        print("Index maintenance will run while idle")
+
+
+def warm_up_services():
+    """
+    Load the services in the background once the prompt is up: the index (and
+    any vault edits made while the app was closed), the watcher, idle index
+    maintenance and the LLM client. Anything used before it's ready is built
+    on the spot instead.
+    """
+    def report():
+        startup_timer.mark("warm-up done")
+        print(vector_service.get_index_stats())
+        print(startup_timer.report())
+    
+    return warm_up(
+        lambda: vector_service.build_obsidian_index(),
+        start_vault_watcher,
+        start_index_maintenance,
+        agent.get,
+        obsidian_service.get,
+        on_done=report
+    )
+
+
 def manual_reasoning_loop():
     print("Learning Assistant (type 'exit' to quit)")
-    vector_service.build_obsidian_index()
-    print(vector_service.get_index_stats())
+    startup_timer.mark("prompt ready")
+    warm_up_services()
     while True:
         user_input = input("You: ")
         output, status = process_user_input(user_input)
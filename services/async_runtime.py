@@ -0,0 +1,86 @@
+import atexit
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+import aiohttp
+import voyageai
+
+from core.config import config
+
+
+class AsyncRuntime:
+    """
+    One event loop, on a daemon thread, shared by every async service method.
+
+    Async HTTP clients are tied to the loop they were first used on, so running
+    all service coroutines here lets the Anthropic client (cached per base URL
+    by langchain_anthropic) and a single pooled aiohttp session for Voyage be
+    reused across calls instead of reconnecting each time. Sync code calls
+    run(); code on another event loop awaits run_async().
+    """
+
+    def __init__(self, http_pool_size: int = 20):
+        self.http_pool_size = http_pool_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The shared loop, started on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="async-runtime", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    async def http_session(self) -> aiohttp.ClientSession:
+        """The pooled HTTP session used for Voyage requests"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.http_pool_size))
+        return self._session
+
+    async def _with_session(self, coro: Coroutine) -> Any:
+        # voyageai reads its session from a context variable, set per task
+        voyageai.aiosession.set(await self.http_session())
+        return await coro
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the shared loop from any thread"""
+        return asyncio.run_coroutine_threadsafe(self._with_session(coro), self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and block until it finishes"""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("Blocking call made from the async runtime's own loop, await the async method instead")
+        return self.submit(coro).result(timeout)
+
+    async def run_async(self, coro: Coroutine) -> Any:
+        """Await a coroutine on the shared loop from a different event loop"""
+        if self.in_loop_thread():
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def close(self) -> None:
+        """Close the HTTP session and stop the loop"""
+        if self._loop is None:
+            return
+        if self._session is not None and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+        self._thread = None
+        self._session = None
+
+
+runtime = AsyncRuntime(http_pool_size=config.HTTP_POOL_SIZE)
+atexit.register(runtime.close)
@@ -0,0 +1,111 @@
+import io
+import sys
+import os
+import time
+import random
+import argparse
+from contextlib import redirect_stdout
+
+# Add parent directory to Python path (go up one level from services folder)
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+import numpy as np
+from dotenv import load_dotenv
+
+from core.config import config
+
+load_dotenv()
+
+
+def sample_queries(service, count: int, words: int, seed: int = 0) -> list:
+    """(query, chunk ID, file) triples: the opening words of random chunks, which should find their own note"""
+    chunks = list(service.lexical_index.chunks.items())
+    random.Random(seed).shuffle(chunks)
+    queries = []
+    for chunk_id, chunk in chunks:
+        text = " ".join(chunk["text"].split()[:words])
+        if len(text.split()) >= min(words, 5):
+            queries.append((text, chunk_id, chunk["metadata"].get("filepath")))
+        if len(queries) == count:
+            break
+    return queries
+
+
+def measure(service, queries: list, embeddings: list, top_k: int, flat_results: list = None) -> dict:
+    """Latency of dense search and how often it finds the chunk's note, the chunk itself and flat search's chunks"""
+    latencies, results = [], []
+    note_hits = chunk_hits = overlap = notes_per_result = 0
+    for (query, chunk_id, filepath), embedding in zip(queries, embeddings):
+        # Dense search prints every hit, keep the report readable
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            hits = service._dense_search(query, top_k, embedding)
+            latencies.append(time.perf_counter() - start)
+        ids = [hit.chunk_id for hit in hits]
+        files = {hit.metadata.get("filepath") for hit in hits}
+        results.append(ids)
+        note_hits += filepath in files
+        chunk_hits += chunk_id in ids
+        notes_per_result += len(files)
+        if flat_results is not None:
+            expected = flat_results[len(results) - 1]
+            overlap += len(set(ids) & set(expected)) / max(len(expected), 1)
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "note_hit": note_hits / len(queries),
+        "chunk_hit": chunk_hits / len(queries),
+        "flat_overlap": overlap / len(queries) if flat_results is not None else 1.0,
+        "notes_per_result": notes_per_result / len(queries),
+        "results": results,
+    }
+
+
+def main():
+    """Compare flat and two-stage dense retrieval over the configured vault index"""
+    parser = argparse.ArgumentParser(description="Benchmark flat against two-stage (note, then chunk) retrieval")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries sampled from indexed chunks")
+    parser.add_argument("--query-words", type=int, default=12, help="Opening words of a chunk used as its query")
+    parser.add_argument("--top-k", type=int, default=config.VECTOR_SEARCH_TOP_K)
+    parser.add_argument(
+        "--notes", type=int, nargs="+", default=[4, 8, 16, 32],
+        help="Notes picked by the first stage, two-stage retrieval reports a row for each"
+    )
+    args = parser.parse_args()
+
+    # The note index is only kept with two-stage retrieval on, it's built from the stored chunks if missing
+    config.RETRIEVAL_STRATEGY = "two_stage"
+    from services.vector_store import VectorStoreService
+    service = VectorStoreService()
+    if service.state is None:
+        print("❌ No index to benchmark")
+        return
+
+    queries = sample_queries(service, args.queries, args.query_words)
+    if not queries:
+        print("❌ No indexed chunks to sample queries from")
+        return
+    embeddings = service._embed_queries([query for query, _, _ in queries])
+    stats = service.get_index_stats()
+    print(f"📊 {stats['documents']} chunks in {len(service.state.note_index)} notes, "
+          f"{len(queries)} queries, top_k={args.top_k}, note vectors: {config.NOTE_VECTOR}")
+    print(f"{'strategy':<16}{'p50 ms':>10}{'p95 ms':>10}{'note hit':>10}{'chunk hit':>10}{'flat ovl':>10}{'notes/q':>10}")
+
+    config.RETRIEVAL_STRATEGY = "flat"
+    flat = measure(service, queries, embeddings, args.top_k)
+    runs = [("flat", flat)]
+    config.RETRIEVAL_STRATEGY = "two_stage"
+    for notes in args.notes:
+        config.NOTE_CANDIDATES = notes
+        runs.append((f"two_stage/{notes}", measure(service, queries, embeddings, args.top_k, flat["results"])))
+    for label, result in runs:
+        print(
+            f"{label:<16}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['note_hit']:>10.3f}"
+            f"{result['chunk_hit']:>10.3f}{result['flat_overlap']:>10.3f}{result['notes_per_result']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
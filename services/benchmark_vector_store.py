@@ -0,0 +1,150 @@
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+# Add parent directory to Python path (go up one level from services folder)
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+import numpy as np
+import chromadb
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+from llama_index.vector_stores.chroma import ChromaVectorStore
+
+from services.numpy_vector_store import NumpyVectorStore
+
+COLLECTION = "benchmark"
+
+
+def make_nodes(vectors: np.ndarray):
+    return [
+        TextNode(id_=f"chunk-{i}", text=f"synthetic chunk {i}", metadata={"filename": f"note_{i % 500}.md"}, embedding=vector.tolist())
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def open_chroma(directory: str) -> ChromaVectorStore:
+    client = chromadb.PersistentClient(path=directory)
+    return ChromaVectorStore(chroma_collection=client.get_or_create_collection(COLLECTION))
+
+
+def open_numpy(directory: str, variant: str) -> NumpyVectorStore:
+    """variant is a storage dtype (float32, float16), a quantization mode (int8, binary) or ivf"""
+    if variant == "ivf":
+        # Clustered however small the benchmark is, so the report always covers IVF
+        return NumpyVectorStore(persist_dir=directory, index_type="ivf", ivf_min_rows=0)
+    if variant in ("int8", "binary"):
+        return NumpyVectorStore(persist_dir=directory, quantization=variant)
+    return NumpyVectorStore(persist_dir=directory, dtype=variant or "float32")
+
+
+def open_store(backend: str, directory: str, variant: str):
+    return open_chroma(directory) if backend == "chroma" else open_numpy(directory, variant)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, top_k: int) -> list:
+    """Ground truth neighbours for recall@k"""
+    distances = -2 * queries @ vectors.T + (vectors * vectors).sum(axis=1)
+    return [set(f"chunk-{i}" for i in np.argsort(row)[:top_k]) for row in distances]
+
+
+def build(backend: str, directory: str, nodes, variant: str) -> float:
+    start = time.perf_counter()
+    store = open_store(backend, directory, variant)
+    for i in range(0, len(nodes), 1000):
+        store.add(nodes[i:i + 1000])
+    if backend != "chroma":
+        store.persist()
+    return time.perf_counter() - start
+
+
+def measure(
+    backend: str, directory: str, queries: np.ndarray, top_k: int, variant: str, truth: list, **query_kwargs
+) -> dict:
+    # Cold start: open the persisted store and answer a first query
+    start = time.perf_counter()
+    store = open_store(backend, directory, variant)
+    store.query(VectorStoreQuery(query_embedding=queries[0].tolist(), similarity_top_k=top_k), **query_kwargs)
+    cold_start = time.perf_counter() - start
+
+    latencies = []
+    found = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=top_k), **query_kwargs)
+        latencies.append(time.perf_counter() - start)
+        found += len(expected & set(result.ids))
+    latencies_ms = np.array(latencies) * 1000
+
+    # Bytes scanned per query: the full matrix, or only the codes when quantized
+    memory_mb = None
+    if isinstance(store, NumpyVectorStore):
+        stats = store.stats()
+        memory_mb = (stats["code_bytes"] or stats["matrix_bytes"]) / 1e6
+    return {
+        "cold_start_ms": cold_start * 1000,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "recall": found / (len(truth) * top_k),
+        "memory_mb": memory_mb,
+    }
+
+
+def main():
+    """Compare latency, cold start, recall@k and memory of the vector backends on synthetic vectors"""
+    parser = argparse.ArgumentParser(description="Benchmark the vector store backends")
+    parser.add_argument("--chunks", type=int, default=20000, help="Number of synthetic chunks")
+    parser.add_argument("--dim", type=int, default=1024, help="Embedding dimension (voyage-3-large is 1024)")
+    parser.add_argument("--queries", type=int, default=200, help="Number of timed queries")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=["chroma", "numpy", "numpy-float16", "numpy-int8", "numpy-binary", "numpy-ivf"],
+    )
+    parser.add_argument(
+        "--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+        help="IVF clusters scanned per query, numpy-ivf reports recall and latency for each"
+    )
+    args = parser.parse_args()
+
+    # Clustered unit vectors (topics plus per-chunk noise) resemble real embeddings
+    # far better than uniform noise, where every neighbour is equally far away
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(args.chunks // 100, 1), args.dim)).astype(np.float32)
+    vectors = centers[rng.integers(len(centers), size=args.chunks)]
+    vectors = vectors + 0.8 * rng.standard_normal(vectors.shape).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.integers(args.chunks, size=args.queries)]
+    queries = queries + 0.5 * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(args.dim)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    nodes = make_nodes(vectors)
+    truth = exact_top_k(vectors, queries, args.top_k)
+
+    print(f"📊 {args.chunks} chunks x {args.dim} dims, {args.queries} queries, top_k={args.top_k}")
+    print(f"{'backend':<16}{'build s':>10}{'cold ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'recall':>10}{'scan MB':>10}")
+    work_dir = tempfile.mkdtemp(prefix="vector_bench_")
+    try:
+        for name in args.backends:
+            backend, _, variant = name.partition("-")
+            directory = os.path.join(work_dir, name)
+            build_seconds = build(backend, directory, nodes, variant)
+            # Recall vs latency trade-off of the IVF index, one row per nprobe
+            runs = [(f"{name}/{nprobe}", {"nprobe": nprobe}) for nprobe in args.nprobe] if variant == "ivf" else [(name, {})]
+            for label, query_kwargs in runs:
+                result = measure(backend, directory, queries, args.top_k, variant, truth, **query_kwargs)
+                memory = f"{result['memory_mb']:.1f}" if result["memory_mb"] is not None else "-"
+                print(
+                    f"{label:<16}{build_seconds:>10.2f}{result['cold_start_ms']:>10.1f}{result['p50_ms']:>10.2f}"
+                    f"{result['p95_ms']:>10.2f}{result['recall']:>10.3f}{memory:>10}"
+                )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 import sys
 import os
+import argparse
 
 # Add parent directory to Python path (go up one level from services folder)
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
 
+from core.config import config
 from services.vector_store import VectorStoreService
 from dotenv import load_dotenv
 import glob
@@ -52,6 +54,18 @@ def debug_vault_contents(obsidian_path):
 
 def main():
     """Build or rebuild the vector index for your Obsidian vault"""
+    parser = argparse.ArgumentParser(description="Build the vector index for your Obsidian vault")
+    parser.add_argument("--full", action="store_true", help="Re-embed every file into a new index version")
+    parser.add_argument("--rollback", action="store_true", help="Serve the previous index version again")
+    parser.add_argument("--shard", help="Re-embed only the files of one shard (with SHARDING enabled)")
+    parser.add_argument("--maintain", action="store_true",
+                        help="Remove orphaned chunks, compact the index if fragmented and report its health")
+    parser.add_argument("--compact", action="store_true", help="With --maintain, compact regardless of fragmentation")
+    parser.add_argument("--export", metavar="PATH", help="Write the index to a portable snapshot file")
+    parser.add_argument("--import", dest="import_path", metavar="PATH",
+                        help="Load a snapshot into the configured backend instead of embedding the vault")
+    args = parser.parse_args()
+    
     print("🚀 Building Vector Index for Obsidian Vault")
     print("=" * 50)
     
@@ -63,7 +77,8 @@ def main():
         print("❌ OBSIDIAN_VAULT_PATH not set in .env file")
         return
     
-    if not voyage_key:
+    # Local embedding providers don't need an API key
+    if config.EMBEDDING_PROVIDER == "voyage" and not voyage_key:
         print("❌ VOYAGE_API_KEY not set in .env file")
         return
     
@@ -71,6 +86,58 @@ def main():
         print(f"❌ Obsidian vault path does not exist: {obsidian_path}")
         return
     
+    if args.rollback:
+        vector_service = VectorStoreService()
+        if vector_service.rollback_index():
+            print(f"✅ Rolled back to index version {vector_service.get_index_stats()['index_version']['active']}")
+        else:
+            print("❌ No previous index version to roll back to")
+        return
+    
+    if args.shard:
+        vector_service = VectorStoreService()
+        if vector_service.rebuild_shard(args.shard):
+            shard = (vector_service.get_index_stats()["shards"] or {}).get("shards", {}).get(args.shard, {})
+            print(f"✅ Rebuilt shard {args.shard}: {shard.get('files', 0)} files, {shard.get('chunks', 0)} chunks")
+        else:
+            print("❌ Shard rebuild failed, is SHARDING enabled?")
+        return
+    
+    if args.export:
+        vector_service = VectorStoreService()
+        header = vector_service.export_snapshot(args.export)
+        print(f"✅ Exported {header['chunks']} chunks ({header['embed_model']}, {header['dimension']} dimensions) to {args.export}")
+        return
+    
+    if args.import_path:
+        if not os.path.exists(args.import_path):
+            print(f"❌ Snapshot does not exist: {args.import_path}")
+            return
+        # Don't embed the vault first when there's no index yet, that's what the snapshot is for
+        vector_service = VectorStoreService(build_missing=False)
+        if not vector_service.import_snapshot(args.import_path):
+            print("❌ Snapshot import failed")
+            return
+        # Pick up files edited since the snapshot was taken
+        vector_service.build_obsidian_index()
+        stats = vector_service.get_index_stats()
+        print(f"✅ Imported snapshot: {stats.get('documents', 0)} chunks, {stats.get('indexed_files', 0)} files, "
+              f"index version {stats.get('index_version', {}).get('active', 'unknown')}")
+        return
+    
+    if args.maintain:
+        vector_service = VectorStoreService()
+        report = vector_service.maintain_index(compact=True if args.compact else None)
+        if report is None:
+            print("❌ No index to maintain")
+            return
+        print(f"🧹 Removed {report['orphan_files']} deleted files and {report['orphan_chunks']} orphaned chunks, "
+              f"re-indexed {report['missing_chunks']} missing chunks")
+        print(f"🗜️ Compacted: {'yes' if report['compacted'] else 'no'} ({report['seconds']}s)")
+        for key in report["before"]:
+            print(f"📊 {key}: {report['before'][key]} -> {report['after'][key]}")
+        return
+    
     # Debug vault contents
     debug_vault_contents(obsidian_path)
     
@@ -88,15 +155,16 @@ def main():
         vector_service = VectorStoreService()
         
         # Build index
-        print("\n🔄 Building vector index...")
-        success = vector_service.build_obsidian_index()
+        print(f"\n🔄 {'Rebuilding' if args.full else 'Updating'} vector index...")
+        success = vector_service.build_obsidian_index(full_rebuild=args.full)
         
         if success:
             stats = vector_service.get_index_stats()
             print(f"\n✅ Index built successfully!")
             print(f"📊 ChromaDB documents: {stats.get('documents', 0)}")
-            print(f"📊 Index nodes: {stats.get('nodes', 'unknown')}")
+            print(f"📊 Indexed files: {stats.get('indexed_files', 'unknown')}")
             print(f"📊 Status: {stats.get('status', 'unknown')}")
+            print(f"📊 Index version: {stats.get('index_version', {}).get('active', 'unknown')}")
             
             if stats.get('documents', 0) > 0:
                 print(f"🔍 Your knowledge base is ready for search!")
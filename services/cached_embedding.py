@@ -0,0 +1,93 @@
+from typing import Any, Callable, List, Optional
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+from services.embedding_cache import EmbeddingCache
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Embedding model wrapper that serves repeated chunks and queries from an EmbeddingCache.
+
+    Only cache misses are forwarded to the wrapped model, so re-indexing an
+    unchanged vault or repeating a query makes no embedding API calls. Document
+    misses go through batch_embed when given (e.g. an EmbeddingPipeline).
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+    _batch_embed: Optional[Callable[[List[str]], List[List[float]]]] = PrivateAttr()
+    _batch_query_embed: Optional[Callable[[List[str]], List[List[float]]]] = PrivateAttr()
+
+    def __init__(
+        self,
+        inner: BaseEmbedding,
+        cache: EmbeddingCache,
+        batch_embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        batch_query_embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        **kwargs: Any
+    ):
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs
+        )
+        self._inner = inner
+        self._cache = cache
+        self._batch_embed = batch_embed or inner.get_text_embedding_batch
+        self._batch_query_embed = batch_query_embed or (
+            lambda queries: [inner.get_query_embedding(query) for query in queries]
+        )
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        cached = self._cache.get(self.model_name, "query", query)
+        if cached is not None:
+            return cached
+        embedding = self._inner.get_query_embedding(query)
+        self._cache.put(self.model_name, "query", query, embedding)
+        return embedding
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        cached = self._cache.get(self.model_name, "query", query)
+        if cached is not None:
+            return cached
+        embedding = await self._inner.aget_query_embedding(query)
+        self._cache.put(self.model_name, "query", query, embedding)
+        return embedding
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed document texts in one pass, without re-batching by embed_batch_size"""
+        embeddings = self._cache.get_many(self.model_name, "text", texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            fresh = self._batch_embed([texts[i] for i in missing])
+            self._cache.put_many(self.model_name, "text", [texts[i] for i in missing], fresh)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+        return embeddings
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries, sending all cache misses in one batch_query_embed call"""
+        embeddings = self._cache.get_many(self.model_name, "query", queries)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            fresh = self._batch_query_embed([queries[i] for i in missing])
+            self._cache.put_many(self.model_name, "query", [queries[i] for i in missing], fresh)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+        return embeddings
@@ -0,0 +1,150 @@
+import re
+from typing import Callable, Dict, List, Tuple
+
+from services.embedding_pipeline import estimate_tokens
+from services.retrieval import SearchHit
+
+# Sentence ends within a line; lines themselves (headings, bullets) are always separate units
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])[ \t]+")
+
+# Opening or closing line of a fenced code block, kept whole like frontmatter
+FENCE = re.compile(r"^\s*(```|~~~)")
+
+# Below this many tokens of room left, stop looking for more sentences
+MIN_USEFUL_TOKENS = 8
+
+
+def split_sentences(text: str) -> List[Tuple[str, str]]:
+    """
+    Split text into (sentence, separator) pairs, where separator is the space
+    or line breaks that followed the sentence. Prose is split at sentence ends
+    and line breaks, while fenced code blocks and leading frontmatter are
+    single units, so joining kept units with their separators keeps the
+    markdown's line structure.
+    """
+    lines = text.strip("\n").split("\n")
+    units: List[Tuple[str, str]] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        end = None
+        fence = FENCE.match(line)
+        if fence:
+            # An unclosed fence (the chunk ended inside it) runs to the end
+            end = next((j for j in range(i + 1, len(lines)) if lines[j].strip().startswith(fence.group(1))), len(lines) - 1)
+        elif i == 0 and line.strip() == "---":
+            end = next((j for j in range(1, len(lines)) if lines[j].strip() == "---"), None)
+        if end is not None:
+            units.append(("\n".join(lines[i:end + 1]), "\n"))
+            i = end + 1
+            continue
+        if not line.strip():
+            # Blank lines widen the previous separator into a paragraph break
+            if units:
+                units[-1] = (units[-1][0], units[-1][1] + "\n")
+        else:
+            sentences = [s for s in SENTENCE_BOUNDARY.split(line.rstrip()) if s.strip()]
+            units.extend((sentence, " ") for sentence in sentences[:-1])
+            units.append((sentences[-1], "\n"))
+        i += 1
+    return units
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def pack_context(
+    hits: List[SearchHit],
+    token_budget: int,
+    token_counter: Callable[[str], int] = estimate_tokens,
+) -> List[str]:
+    """
+    Turn ranked hits into prompt passages that fit within token_budget.
+
+    Hits are split into sentences, lines and code blocks, and one equal
+    (after normalizing whitespace and case) to a unit already packed is
+    skipped. That drops the overlap between adjacent chunks of a file and
+    text repeated across files. Each hit first gets an equal share of the
+    budget, then whatever is left is filled in score order, and every hit
+    stops at its last whole unit that fits. Units from the same file are
+    merged into one passage headed by the filename (with its folder when
+    two files share a name), keeping their original line breaks, and
+    passages are returned best-first.
+    """
+    if not hits:
+        return []
+    sentences = [split_sentences(hit.text) for hit in hits]
+    # Passages are keyed by file path, and headed by the filename unless two files share it
+    files = [hit.metadata.get('filepath') or hit.metadata.get('filename', 'Unknown') for hit in hits]
+    files_named: Dict[str, set] = {}
+    for file, hit in zip(files, hits):
+        files_named.setdefault(_header(hit.metadata), set()).add(file)
+    filenames = [_header(hit.metadata, qualified=len(files_named[_header(hit.metadata)]) > 1) for hit in hits]
+    positions = [0] * len(hits)
+    segments: List[List[Tuple[str, str]]] = [[] for _ in hits]
+    started = set()
+    seen = set()
+    used = 0
+
+    share = max(token_budget // len(hits), MIN_USEFUL_TOKENS)
+    for limit in (share, token_budget):
+        for i in range(len(hits)):
+            allowance = min(limit - sum(token_counter(s) for s, _ in segments[i]), token_budget - used)
+            while positions[i] < len(sentences[i]) and allowance >= MIN_USEFUL_TOKENS:
+                sentence, separator = sentences[i][positions[i]]
+                normalized = _normalize(sentence)
+                if normalized in seen:
+                    # Keep the line break a skipped unit ended with
+                    if segments[i] and separator.count("\n") > segments[i][-1][1].count("\n"):
+                        segments[i][-1] = (segments[i][-1][0], separator)
+                    positions[i] += 1
+                    continue
+                cost = token_counter(sentence)
+                if files[i] not in started:
+                    cost += token_counter(f"[{filenames[i]}]")
+                if cost > allowance:
+                    break
+                segments[i].append((sentence, separator))
+                started.add(files[i])
+                seen.add(normalized)
+                positions[i] += 1
+                allowance -= cost
+                used += cost
+
+    if not any(segments) and sentences[0]:
+        # Never return nothing because the best sentence alone is too long
+        truncated = _truncate(sentences[0][0][0], token_budget - token_counter(f"[{filenames[0]}]"), token_counter)
+        if truncated:
+            segments[0].append((truncated, ""))
+
+    passages: Dict[str, List[str]] = {}
+    headers = dict(zip(files, filenames))
+    for file, segment in zip(files, segments):
+        if segment:
+            passages.setdefault(file, []).append("".join(s + separator for s, separator in segment).rstrip())
+    return [f"[{headers[file]}]\n" + "\n".join(parts) for file, parts in passages.items()]
+
+
+def _header(metadata: dict, qualified: bool = False) -> str:
+    """A passage's filename, prefixed with its vault folder when qualified"""
+    filename = metadata.get('filename', 'Unknown')
+    folder = metadata.get('folder')
+    return f"{folder}/{filename}" if qualified and folder else filename
+
+
+def _truncate(text: str, token_budget: int, token_counter: Callable[[str], int]) -> str:
+    """Cut text at a line boundary to fit token_budget, or at a word boundary within a single line"""
+    lines = text.split("\n")
+    if len(lines) > 1:
+        # Whole lines first, so a code block or list is cut between lines
+        kept = lines[:-1]
+        while kept and token_counter("\n".join(kept) + "\n...") > token_budget:
+            kept.pop()
+        if kept:
+            return "\n".join(kept) + "\n..."
+        text = lines[0]
+    words = text.split()
+    while words and token_counter(" ".join(words) + "...") > token_budget:
+        words = words[:max(1, len(words) * 3 // 4)] if len(words) > 1 else []
+    return " ".join(words) + "..." if words else ""
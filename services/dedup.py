@@ -0,0 +1,260 @@
+import os
+import re
+import json
+import base64
+import hashlib
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Mersenne prime for the universal hash family used by MinHash
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace, so reformatted copies hash the same"""
+    return " ".join(text.lower().split())
+
+
+def exact_hash(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int = 5) -> set:
+    """Word n-grams of a chunk (the whole text for chunks shorter than size words)"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from num_perm random hash functions (a * x + b) mod p"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # Below 2**31 so a * x + b stays inside uint64 for 32-bit shingle hashes
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: set) -> np.ndarray:
+        if not shingle_set:
+            return np.zeros(len(self.a), dtype=np.uint32)
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingle_set),
+            dtype=np.uint64,
+            count=len(shingle_set),
+        )
+        permuted = (hashes[:, None] * self.a + self.b) % MERSENNE_PRIME
+        return (permuted.min(axis=0) & 0xFFFFFFFF).astype(np.uint32)
+
+
+class ChunkDeduplicator:
+    """
+    Persisted registry of duplicate chunks across the vault.
+
+    Each chunk is matched first by a hash of its normalized text, then by
+    MinHash/LSH over word shingles for near-duplicates (estimated Jaccard
+    similarity >= threshold). A chunk with no match becomes the canonical copy
+    of a new group and is embedded; matches join the group and reuse the
+    canonical copy's embedding. Every source is still stored as its own
+    record with its own file's metadata, so filters and context headers see
+    the file a copy is in. When the canonical copy is removed, the group is
+    re-pointed to a remaining source, and sources() lists every file a group
+    came from.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 8,
+        shingle_size: int = 5,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+
+        # canonical chunk ID -> {"hash", "sources": {chunk ID: filename}}, signatures kept alongside
+        self.groups: Dict[str, dict] = {}
+        self.canonical_of: Dict[str, str] = {}
+        self.by_hash: Dict[str, str] = {}
+        self.buckets: Dict[tuple, set] = defaultdict(set)
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.dirty = False
+        self._lock = threading.RLock()
+        if path:
+            self.load()
+
+    def _band_keys(self, signature: np.ndarray) -> List[tuple]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _index_group(self, canonical_id: str, content_hash: str, signature: np.ndarray) -> None:
+        self.by_hash[content_hash] = canonical_id
+        self.signatures[canonical_id] = signature
+        for key in self._band_keys(signature):
+            self.buckets[key].add(canonical_id)
+
+    def _unindex_group(self, canonical_id: str, group: dict) -> None:
+        if self.by_hash.get(group["hash"]) == canonical_id:
+            del self.by_hash[group["hash"]]
+        signature = self.signatures.pop(canonical_id)
+        for key in self._band_keys(signature):
+            self.buckets[key].discard(canonical_id)
+            if not self.buckets[key]:
+                del self.buckets[key]
+
+    def _near_match(self, signature: np.ndarray) -> Optional[str]:
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        best, best_similarity = None, self.threshold
+        for candidate in candidates:
+            similarity = float(np.mean(self.signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        return best
+
+    def add(self, chunk_id: str, text: str, filename: str) -> str:
+        """
+        Register a chunk and return the ID of its canonical copy. The chunk
+        itself is canonical (and must be embedded) when the returned ID is its
+        own, otherwise it can reuse the canonical copy's embedding.
+        """
+        with self._lock:
+            if chunk_id in self.canonical_of:
+                return self.canonical_of[chunk_id]
+            self.dirty = True
+
+            content_hash = exact_hash(text)
+            canonical_id = self.by_hash.get(content_hash)
+            if canonical_id is not None:
+                self.exact_duplicates += 1
+            else:
+                signature = self.hasher.signature(shingles(text, self.shingle_size))
+                canonical_id = self._near_match(signature)
+                if canonical_id is not None:
+                    self.near_duplicates += 1
+                else:
+                    canonical_id = chunk_id
+                    self.groups[chunk_id] = {"hash": content_hash, "sources": {}}
+                    self._index_group(chunk_id, content_hash, signature)
+
+            self.groups[canonical_id]["sources"][chunk_id] = filename
+            self.canonical_of[chunk_id] = canonical_id
+            return canonical_id
+
+    def remove(self, chunk_id: str, text_of: Optional[Callable[[str], Optional[str]]] = None) -> None:
+        """
+        Forget a chunk. If it was its group's canonical copy, another source
+        takes over, matched from then on by its own text from text_of(chunk ID)
+        (or the old copy's hash and signature if that returns None).
+        """
+        with self._lock:
+            canonical_id = self.canonical_of.pop(chunk_id, None)
+            if canonical_id is None:
+                return
+            self.dirty = True
+            group = self.groups[canonical_id]
+            group["sources"].pop(chunk_id, None)
+            if chunk_id != canonical_id and group["sources"]:
+                return
+            signature = self.signatures[canonical_id]
+            self._unindex_group(canonical_id, group)
+            del self.groups[canonical_id]
+            if not group["sources"]:
+                return
+
+            successor = next(iter(group["sources"]))
+            text = text_of(successor) if text_of is not None else None
+            if text is not None:
+                group["hash"] = exact_hash(text)
+                signature = self.hasher.signature(shingles(text, self.shingle_size))
+            self.groups[successor] = group
+            self._index_group(successor, group["hash"], signature)
+            for source in group["sources"]:
+                self.canonical_of[source] = successor
+
+    def group_of(self, chunk_id: str) -> str:
+        """The canonical ID of a chunk's group, the chunk's own ID if it has none"""
+        return self.canonical_of.get(chunk_id, chunk_id)
+
+    def sources(self, chunk_id: str) -> List[str]:
+        """Every file that contains the given stored chunk, in insertion order"""
+        with self._lock:
+            group = self.groups.get(self.canonical_of.get(chunk_id, chunk_id))
+            return list(dict.fromkeys(group["sources"].values())) if group else []
+
+    def clear(self) -> None:
+        with self._lock:
+            self.groups = {}
+            self.canonical_of = {}
+            self.by_hash = {}
+            self.buckets = defaultdict(set)
+            self.signatures = {}
+            self.dirty = True
+
+    def load(self) -> None:
+        """Load groups from disk and rebuild the hash and LSH tables (starts empty if missing or unreadable)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION:
+                return
+            with self._lock:
+                self.clear()
+                for canonical_id, group in data.get("groups", {}).items():
+                    signature = np.frombuffer(base64.b64decode(group.pop("signature")), dtype=np.uint32)
+                    self.groups[canonical_id] = group
+                    self._index_group(canonical_id, group["hash"], signature)
+                    for chunk_id in group["sources"]:
+                        self.canonical_of[chunk_id] = canonical_id
+                self.dirty = False
+        except Exception as e:
+            print(f"Could not read dedup index, starting fresh: {e}")
+
+    def save(self) -> None:
+        """Write the groups atomically, skipped when nothing changed"""
+        if not self.path or not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            groups = {
+                canonical_id: {
+                    **group,
+                    "signature": base64.b64encode(self.signatures[canonical_id].tobytes()).decode("ascii"),
+                }
+                for canonical_id, group in self.groups.items()
+            }
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.VERSION, "groups": groups}, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "unique_chunks": len(self.groups),
+                "source_chunks": len(self.canonical_of),
+                "exact_duplicates_skipped": self.exact_duplicates,
+                "near_duplicates_skipped": self.near_duplicates,
+            }
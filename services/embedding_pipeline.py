@@ -0,0 +1,161 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English prose)"""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket for rate limiting.
+
+    The bucket refills continuously at rate_per_minute and holds at most
+    capacity tokens (one minute's worth by default).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> float:
+        """Block until amount tokens are available, returns seconds spent waiting"""
+        # Requests bigger than the bucket would wait forever, let them drain it instead
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class EmbeddingPipeline:
+    """
+    Batched, concurrent and rate-limited embedding stage for index builds.
+
+    Texts are grouped into batches bounded by an estimated token budget and an
+    item count, up to max_concurrency batches are in flight at once, request and
+    token rates are capped with token buckets, and failed batches are retried
+    with exponential backoff plus full jitter. Counters and throughput accumulate
+    across embed() calls until reset_stats().
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        batch_tokens: int = 32_000,
+        batch_max_items: int = 128,
+        max_concurrency: int = 4,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        token_counter: Callable[[str], int] = estimate_tokens,
+    ):
+        self.embed_fn = embed_fn
+        self.batch_tokens = batch_tokens
+        self.batch_max_items = batch_max_items
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.token_counter = token_counter
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Start a new measurement window for stats()"""
+        self._stats = {
+            "chunks": 0,
+            "tokens": 0,
+            "batches": 0,
+            "retries": 0,
+            "throttle_seconds": 0.0,
+            "elapsed_seconds": 0.0,
+        }
+
+    def make_batches(self, texts: Sequence[str]) -> List[List[int]]:
+        """Group text indices into batches bounded by token budget and item count"""
+        batches = []
+        current, current_tokens = [], 0
+        for i, text in enumerate(texts):
+            tokens = self.token_counter(text)
+            if current and (current_tokens + tokens > self.batch_tokens or len(current) >= self.batch_max_items):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        tokens = sum(self.token_counter(text) for text in texts)
+        for attempt in range(self.max_retries + 1):
+            waited = 0.0
+            if self.request_bucket:
+                waited += self.request_bucket.acquire(1)
+            if self.token_bucket:
+                waited += self.token_bucket.acquire(tokens)
+            try:
+                embeddings = self.embed_fn(texts)
+                with self._stats_lock:
+                    self._stats["chunks"] += len(texts)
+                    self._stats["tokens"] += tokens
+                    self._stats["batches"] += 1
+                    self._stats["throttle_seconds"] += waited
+                return embeddings
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                with self._stats_lock:
+                    self._stats["retries"] += 1
+                    self._stats["throttle_seconds"] += waited + delay
+                print(f"Embedding batch failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed texts, preserving input order"""
+        texts = list(texts)
+        if not texts:
+            return []
+
+        start = time.perf_counter()
+        batches = self.make_batches(texts)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+            futures = [
+                (batch, executor.submit(self._embed_batch, [texts[i] for i in batch]))
+                for batch in batches
+            ]
+            for batch, future in futures:
+                for i, embedding in zip(batch, future.result()):
+                    results[i] = embedding
+        self._stats["elapsed_seconds"] += time.perf_counter() - start
+        return results
+
+    def stats(self) -> dict:
+        """Counters and throughput since the last reset_stats()"""
+        stats = dict(self._stats)
+        elapsed = stats["elapsed_seconds"]
+        stats["chunks_per_sec"] = round(stats["chunks"] / elapsed, 1) if elapsed else 0.0
+        stats["tokens_per_sec"] = round(stats["tokens"] / elapsed, 1) if elapsed else 0.0
+        return stats
@@ -0,0 +1,213 @@
+import os
+import re
+import zlib
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+
+from core.config import config
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedding(BaseEmbedding):
+    """
+    Deterministic offline embedder, no model or network needed.
+
+    Words and their character n-grams are hashed into dim buckets with a
+    hashed sign, so unrelated features colliding in a bucket tend to cancel.
+    Counts are log-scaled and the vector is L2-normalized. Texts sharing
+    words or word pieces end up close, which is enough for tests, offline
+    use and a latency baseline, though not a substitute for a trained model.
+    """
+
+    dim: int = Field(default=512, description="Number of hashed feature buckets")
+    min_n: int = Field(default=3, description="Shortest character n-gram")
+    max_n: int = Field(default=5, description="Longest character n-gram")
+
+    def __init__(self, dim: int = 512, min_n: int = 3, max_n: int = 5, **kwargs: Any):
+        super().__init__(model_name=f"hashing-{dim}", dim=dim, min_n=min_n, max_n=max_n, **kwargs)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashingEmbedding"
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for word in WORD_PATTERN.findall(text.lower()):
+            features.append(word)
+            padded = f"<{word}>"
+            for n in range(self.min_n, self.max_n + 1):
+                features.extend(f"#{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return features
+
+    def embed(self, text: str) -> List[float]:
+        features = self._features(text)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not features:
+            return vector.tolist()
+        hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint32, count=len(features))
+        buckets, counts = np.unique(hashes, return_counts=True)
+        signs = np.where(buckets & 0x80000000, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, buckets % self.dim, signs * (1.0 + np.log(counts)))
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self.embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self.embed(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self.embed(text)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed(text) for text in texts]
+
+
+# Content hashes of model files by (path, size, mtime), so a file is read once per process
+_fingerprints: Dict[tuple, str] = {}
+_fingerprints_lock = threading.Lock()
+
+
+def model_fingerprint(model_dir: str) -> str:
+    """Short sha256 of model.onnx's contents, the same wherever the file is copied ("missing" if absent)"""
+    model_path = os.path.realpath(os.path.join(model_dir, "model.onnx"))
+    try:
+        stat = os.stat(model_path)
+    except OSError:
+        return "missing"
+    key = (model_path, stat.st_size, stat.st_mtime_ns)
+    with _fingerprints_lock:
+        if key not in _fingerprints:
+            digest = hashlib.sha256()
+            with open(model_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            _fingerprints[key] = digest.hexdigest()[:12]
+        return _fingerprints[key]
+
+
+class OnnxEmbedding(BaseEmbedding):
+    """
+    Sentence embedding model exported to ONNX, run locally on CPU.
+
+    model_dir holds model.onnx and tokenizer.json, as exported for
+    sentence-transformers models (e.g. all-MiniLM-L6-v2). Token states are
+    mean-pooled over the attention mask and L2-normalized. onnxruntime and
+    tokenizers are optional dependencies, imported when the model first runs.
+    The model is named after a hash of model.onnx's contents, so different
+    models get separate caches and collections while a copy of the same
+    model (on another machine or in another folder) shares them.
+    """
+
+    model_dir: str = Field(description="Folder with model.onnx and tokenizer.json")
+    max_length: int = Field(default=256, description="Tokens per text, longer texts are truncated")
+
+    _session: Any = PrivateAttr(default=None)
+    _tokenizer: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, model_dir: str, max_length: int = 256, **kwargs: Any):
+        super().__init__(
+            model_name=f"onnx-{model_fingerprint(model_dir)}", model_dir=model_dir, max_length=max_length, **kwargs
+        )
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "OnnxEmbedding"
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                return
+            try:
+                import onnxruntime
+                from tokenizers import Tokenizer
+            except ImportError as e:
+                raise ImportError("The onnx embedding provider needs: pip install onnxruntime tokenizers") from e
+            tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+            tokenizer.enable_truncation(max_length=self.max_length)
+            tokenizer.enable_padding()
+            self._session = onnxruntime.InferenceSession(
+                os.path.join(self.model_dir, "model.onnx"), providers=["CPUExecutionProvider"]
+            )
+            self._tokenizer = tokenizer
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        self._load()
+        encodings = self._tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        wanted = {model_input.name for model_input in self._session.get_inputs()}
+        output = self._session.run(None, {name: value for name, value in inputs.items() if name in wanted})[0]
+        if output.ndim == 3:
+            mask = inputs["attention_mask"][:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return (output / np.maximum(norms, 1e-12)).astype(np.float32).tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self.embed_batch([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self.embed_batch([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_batch(texts)
+
+
+EMBEDDING_PROVIDERS = ("voyage", "hashing", "onnx")
+
+
+def is_local_provider(provider: str = None) -> bool:
+    """Local providers make no API calls, so rate limits and query timeouts don't apply"""
+    return (provider or config.EMBEDDING_PROVIDER) != "voyage"
+
+
+def create_embed_model(provider: str = None) -> BaseEmbedding:
+    """The embedding model for a provider, defaulting to config.EMBEDDING_PROVIDER"""
+    provider = provider or config.EMBEDDING_PROVIDER
+    if provider == "voyage":
+        # Imported here so the offline providers work without the Voyage client
+        from llama_index.embeddings.voyageai import VoyageEmbedding
+        return VoyageEmbedding(
+            voyage_api_key=config.VOYAGE_API_KEY,
+            model_name=config.EMBED_MODEL,
+            embed_batch_size=config.EMBED_BATCH_MAX_ITEMS
+        )
+    if provider == "hashing":
+        return HashingEmbedding(dim=config.HASHING_EMBED_DIM, embed_batch_size=config.EMBED_BATCH_MAX_ITEMS)
+    if provider == "onnx":
+        if not config.ONNX_MODEL_DIR:
+            raise ValueError("ONNX_MODEL_DIR must be set for the onnx embedding provider")
+        return OnnxEmbedding(config.ONNX_MODEL_DIR, embed_batch_size=config.EMBED_BATCH_MAX_ITEMS)
+    raise ValueError(f"Unknown embedding provider {provider!r}, expected one of {EMBEDDING_PROVIDERS}")
+
+
+def batch_query_embedder(model: BaseEmbedding) -> Callable[[List[str]], List[List[float]]]:
+    """Embeds several queries in one call to the model"""
+    if isinstance(model, OnnxEmbedding):
+        return model.embed_batch
+    if isinstance(model, HashingEmbedding):
+        return model._get_text_embeddings
+    # Voyage embeds queries differently from documents, so ask for query embeddings explicitly
+    return lambda queries: model._embed(queries, input_type="query")
+
+
+def embedding_namespace(model: BaseEmbedding) -> str:
+    """The model name made safe for collection names, so vectors from different models are never mixed"""
+    return re.sub(r"[^a-zA-Z0-9-]+", "-", model.model_name).strip("-").lower()
@@ -0,0 +1,85 @@
+import os
+import time
+import threading
+from typing import Callable, Optional
+
+
+def directory_size(path: str) -> int:
+    """Bytes used by the files under path"""
+    total = 0
+    for directory, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(directory, filename))
+            except OSError:
+                continue
+    return total
+
+
+class IdleScheduler:
+    """
+    Runs a maintenance task in the background while the assistant is idle.
+
+    The task runs once nothing has happened for idle_seconds (as reported by
+    last_activity, a time.monotonic() timestamp) and at most once every
+    interval_seconds, on a daemon thread so chat is never blocked.
+    """
+
+    def __init__(
+        self,
+        task: Callable[[], object],
+        last_activity: Callable[[], float],
+        idle_seconds: float = 600.0,
+        interval_seconds: float = 86400.0,
+        check_seconds: float = 30.0,
+    ):
+        self.task = task
+        self.last_activity = last_activity
+        self.idle_seconds = idle_seconds
+        self.interval_seconds = interval_seconds
+        self.check_seconds = check_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.runs = 0
+        self.errors = 0
+        self.last_run: Optional[float] = None
+        self.last_result = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="index-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def due(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if now - self.last_activity() < self.idle_seconds:
+            return False
+        return self.last_run is None or now - self.last_run >= self.interval_seconds
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_seconds):
+            if not self.due():
+                continue
+            self.last_run = time.monotonic()
+            try:
+                self.last_result = self.task()
+                self.runs += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Index maintenance failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "seconds_since_last_run": round(time.monotonic() - self.last_run, 1) if self.last_run else None,
+        }
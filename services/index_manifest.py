@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+
+
+def hash_content(content: str) -> str:
+    """Return a stable hash of a file's text content"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class IndexManifest:
+    """
+    Persisted record of which vault files are in the vector index.
+
+    Each entry maps a file path to its mtime, size, content hash, the IDs of
+    the chunks it produced and when it was first indexed, so index builds can
+    skip unchanged files and delete the chunks of files that changed or
+    disappeared. store names the vector store the entries describe, and
+    deleted_chunks counts the chunks deleted from it since it was last
+    compacted.
+    """
+
+    # 2: chunks carry frontmatter and folder metadata, older indexes are rebuilt
+    # 3: duplicate chunks are stored once per file instead of once per vault
+    VERSION = 3
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, dict] = {}
+        self.store: Optional[str] = None
+        self.deleted_chunks = 0
+        self.load()
+
+    def load(self) -> None:
+        """Load the manifest from disk (starts empty if missing or unreadable)"""
+        self.files = {}
+        self.store = None
+        self.deleted_chunks = 0
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("version") == self.VERSION:
+                self.files = data.get("files", {})
+                self.store = data.get("store")
+                self.deleted_chunks = data.get("deleted_chunks", 0)
+        except Exception as e:
+            print(f"Could not read index manifest, starting fresh: {e}")
+
+    def save(self) -> None:
+        """Write the manifest atomically so a crash never leaves it half-written"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": self.VERSION,
+                "store": self.store,
+                "deleted_chunks": self.deleted_chunks,
+                "files": self.files,
+            }, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, filepath: str) -> Optional[dict]:
+        return self.files.get(filepath)
+
+    def is_unchanged(self, filepath: str, mtime: float, size: int) -> bool:
+        """Cheap check using only file stat information"""
+        entry = self.files.get(filepath)
+        return bool(entry) and entry.get("mtime") == mtime and entry.get("size") == size
+
+    def update(
+        self,
+        filepath: str,
+        mtime: float,
+        size: int,
+        content_hash: str,
+        chunk_ids: List[str],
+        created: Optional[float] = None,
+    ) -> None:
+        self.files[filepath] = {
+            "mtime": mtime,
+            "size": size,
+            "content_hash": content_hash,
+            "chunk_ids": list(chunk_ids),
+            "created": created,
+        }
+
+    def remove(self, filepath: str) -> Optional[dict]:
+        return self.files.pop(filepath, None)
+
+    def paths(self) -> List[str]:
+        return list(self.files.keys())
+
+    def chunk_count(self) -> int:
+        return sum(len(entry.get("chunk_ids", [])) for entry in self.files.values())
+
+    def clear(self) -> None:
+        self.files = {}
+        self.deleted_chunks = 0
@@ -0,0 +1,95 @@
+import io
+import os
+import json
+import zipfile
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 1: chunks.jsonl, embeddings.npy (float32), manifest.json and dedup_index.json in a zip
+SNAPSHOT_FORMAT = 1
+
+HEADER_FILE = "snapshot.json"
+CHUNKS_FILE = "chunks.jsonl"
+EMBEDDINGS_FILE = "embeddings.npy"
+MANIFEST_FILE = "manifest.json"
+DEDUP_FILE = "dedup_index.json"
+
+# Header fields that must match the importing index, vectors and chunk IDs depend on them
+COMPATIBILITY_KEYS = ("format", "manifest_version", "embedding_provider", "embed_model", "chunk_size", "chunk_overlap")
+
+
+def to_relative(path: str, vault_root: str) -> str:
+    """A vault path as a root-independent key, so snapshots move between machines"""
+    return os.path.relpath(path, vault_root).replace(os.sep, "/")
+
+
+def to_absolute(relative: str, vault_root: str) -> str:
+    return os.path.normpath(os.path.join(vault_root, *relative.split("/")))
+
+
+def write_snapshot(
+    path: str,
+    header: dict,
+    pages: Iterable[Tuple[List[dict], np.ndarray]],
+    manifest_files: dict,
+    dedup_path: Optional[str] = None,
+) -> dict:
+    """
+    Write a snapshot archive, returns its header.
+
+    pages yields lists of chunks ({"id", "text", "metadata", "doc_id"}) with
+    their embeddings, so the store is read one page at a time; chunks are
+    streamed into the archive and the embeddings saved as one matrix. The
+    archive is written next to path and renamed into place when complete.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    count, embeddings = 0, []
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(CHUNKS_FILE, "w", force_zip64=True) as f:
+            for chunks, page_embeddings in pages:
+                for chunk in chunks:
+                    f.write((json.dumps(chunk) + "\n").encode("utf-8"))
+                embeddings.append(np.asarray(page_embeddings, dtype=np.float32))
+                count += len(chunks)
+        matrix = np.vstack(embeddings) if count else np.zeros((0, 0), dtype=np.float32)
+        with archive.open(EMBEDDINGS_FILE, "w", force_zip64=True) as f:
+            np.save(f, matrix)
+        archive.writestr(MANIFEST_FILE, json.dumps(manifest_files))
+        if dedup_path and os.path.exists(dedup_path):
+            archive.write(dedup_path, DEDUP_FILE)
+        header = {**header, "format": SNAPSHOT_FORMAT, "chunks": count, "dimension": int(matrix.shape[1])}
+        archive.writestr(HEADER_FILE, json.dumps(header, indent=2))
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_header(path: str) -> dict:
+    with zipfile.ZipFile(path) as archive:
+        return json.loads(archive.read(HEADER_FILE))
+
+
+def read_snapshot(path: str) -> tuple:
+    """The header, chunks, embedding matrix, manifest entries and dedup index (or None) of a snapshot"""
+    with zipfile.ZipFile(path) as archive:
+        header = json.loads(archive.read(HEADER_FILE))
+        with archive.open(CHUNKS_FILE) as f:
+            chunks = [json.loads(line) for line in io.TextIOWrapper(f, encoding="utf-8")]
+        embeddings = np.load(io.BytesIO(archive.read(EMBEDDINGS_FILE)))
+        manifest_files = json.loads(archive.read(MANIFEST_FILE))
+        dedup = archive.read(DEDUP_FILE) if DEDUP_FILE in archive.namelist() else None
+    if len(chunks) != len(embeddings):
+        raise ValueError(f"snapshot has {len(chunks)} chunks but {len(embeddings)} embeddings")
+    return header, chunks, embeddings, manifest_files, dedup
+
+
+def incompatibilities(header: dict, expected: dict) -> List[str]:
+    """Why a snapshot can't be imported into an index with the expected settings, empty if it can"""
+    return [
+        f"{key}: snapshot has {header.get(key)!r}, this index uses {expected.get(key)!r}"
+        for key in COMPATIBILITY_KEYS
+        if header.get(key) != expected.get(key)
+    ]
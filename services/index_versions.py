@@ -0,0 +1,87 @@
+import os
+import json
+from typing import Optional
+
+
+class IndexVersions:
+    """
+    Persisted pointer to the active version of the index.
+
+    A full rebuild writes a new version (its own vector collection, manifest,
+    lexical and dedup indexes) next to the live one, and activate() switches
+    to it by atomically replacing the pointer file, so searches are served
+    from the old version until the new one is complete. The version it
+    replaced is kept for rollback(); the one before that is handed back to
+    the caller for deletion. Each entry is {"version": n, "store": store ID}.
+    Version 0 is an index built before versioning, stored under the
+    unversioned names.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.active: Optional[dict] = None
+        self.previous: Optional[dict] = None
+        self.load()
+
+    @property
+    def active_version(self) -> int:
+        return self.active["version"] if self.active else 0
+
+    def next_version(self) -> int:
+        """Number for the next rebuild, never reusing a version that is still kept"""
+        return max([entry["version"] for entry in (self.active, self.previous) if entry] + [0]) + 1
+
+    def activate(self, version: int, store: str) -> Optional[dict]:
+        """Make version the active one, returns the retired entry that can now be deleted"""
+        retired = self.previous
+        self.previous = self.active
+        self.active = {"version": version, "store": store}
+        self.save()
+        return retired
+
+    def replace_active(self, version: int, store: str) -> Optional[dict]:
+        """Swap in a rewritten copy of the active version, keeping the previous one; returns the replaced entry"""
+        replaced = self.active
+        self.active = {"version": version, "store": store}
+        self.save()
+        return replaced
+
+    def rollback(self) -> bool:
+        """Swap the active and previous versions, False if there is no previous version"""
+        if self.previous is None:
+            return False
+        self.active, self.previous = self.previous, self.active
+        self.save()
+        return True
+
+    def load(self) -> None:
+        """Load the pointer from disk (no versions if missing or unreadable)"""
+        self.active = self.previous = None
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("version") == self.VERSION:
+                self.active = data.get("active")
+                self.previous = data.get("previous")
+        except Exception as e:
+            print(f"Could not read index versions, using the unversioned index: {e}")
+
+    def save(self) -> None:
+        """Write the pointer atomically, this is the moment a new version goes live"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.VERSION, "active": self.active, "previous": self.previous}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active_version,
+            "previous": self.previous["version"] if self.previous else None,
+        }
@@ -0,0 +1,282 @@
+import os
+import re
+import json
+import hashlib
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from llama_index.core import Document
+from llama_index.core.node_parser import SimpleNodeParser
+from llama_index.core.schema import BaseNode, MetadataMode, NodeRelationship
+
+from services.index_manifest import hash_content
+from services.note_metadata import FRONTMATTER, filter_keys, note_metadata
+
+HEADING = re.compile(r"#{1,6}\s")
+FENCE = re.compile(r"(```|~~~)")
+
+# Metadata left out of chunk IDs, file_key already names the file and these would tie IDs to the vault's location
+PATH_METADATA_KEYS = ("filepath", "filename")
+
+
+@dataclass
+class VaultFile:
+    """A vault file read from disk, plus its chunks once it has been parsed"""
+    path: str
+    mtime: float
+    size: int
+    content: str
+    content_hash: str
+    nodes: List[BaseNode] = field(default_factory=list)
+    # Creation time recorded when the file was first indexed, kept for notes without a created date
+    created: Optional[float] = None
+
+
+def make_document(
+    path: str,
+    content: str,
+    vault_root: Optional[str] = None,
+    mtime: Optional[float] = None,
+) -> Optional[Document]:
+    """Create a Document for a markdown file, or None if it is too short to index"""
+    # Skip empty files and very short files (less than 10 characters)
+    if len(content.strip()) < 10:
+        return None
+
+    metadata = {
+        'filename': os.path.basename(path),
+        'filepath': path,
+        'file_type': 'markdown',
+        'source': 'obsidian'
+    }
+    # Frontmatter and folder metadata for filtered search
+    metadata.update(note_metadata(path, content, vault_root, mtime))
+    excluded = filter_keys(metadata)
+
+    # Use the file path as document ID so its chunks can be found again
+    return Document(
+        text=content,
+        id_=path,
+        metadata=metadata,
+        excluded_embed_metadata_keys=excluded,
+        excluded_llm_metadata_keys=excluded
+    )
+
+
+def split_sections(text: str) -> List[str]:
+    """
+    Split a note at its markdown headings, keeping each heading with its body
+    and the frontmatter with the first section. Headings inside code fences
+    (e.g. Python comments) don't start a section.
+    """
+    frontmatter = FRONTMATTER.match(text)
+    offset = frontmatter.end() if frontmatter else 0
+    starts = [0]
+    in_fence = False
+    position = offset
+    for line in text[offset:].splitlines(keepends=True):
+        stripped = line.lstrip()
+        if FENCE.match(stripped):
+            in_fence = not in_fence
+        elif not in_fence and HEADING.match(line) and position > offset:
+            starts.append(position)
+        position += len(line)
+    starts.append(len(text))
+    return [text[start:end] for start, end in zip(starts, starts[1:]) if text[start:end].strip()]
+
+
+def note_outline(path: str, text: str) -> str:
+    """A note's title and its headings (outside code fences), one per line"""
+    lines = [os.path.splitext(os.path.basename(path))[0]]
+    frontmatter = FRONTMATTER.match(text)
+    in_fence = False
+    for line in text[frontmatter.end() if frontmatter else 0:].splitlines():
+        if FENCE.match(line.lstrip()):
+            in_fence = not in_fence
+        elif not in_fence and HEADING.match(line):
+            lines.append(line.lstrip("#").strip())
+    return "\n".join(lines)
+
+
+def assign_chunk_ids(nodes: List[BaseNode], file_key: str) -> None:
+    """
+    Replace the parser's random node IDs with IDs derived from the file, the
+    chunk's metadata and its text, so a chunk keeps its ID across re-indexing
+    as long as none of them change. The absolute path is not part of it, so
+    IDs survive moving the vault. Repeats of a chunk within the file are
+    numbered to keep IDs unique.
+    """
+    occurrences = Counter()
+    renamed = {}
+    for node in nodes:
+        metadata = json.dumps(
+            {key: value for key, value in node.metadata.items() if key not in PATH_METADATA_KEYS},
+            sort_keys=True, default=str
+        )
+        key = f"{file_key}\n{metadata}\n{node.get_content(metadata_mode=MetadataMode.NONE)}"
+        occurrences[key] += 1
+        chunk_id = hashlib.sha256(f"{key}\n{occurrences[key]}".encode("utf-8")).hexdigest()[:32]
+        renamed[node.node_id] = chunk_id
+        node.id_ = chunk_id
+    for node in nodes:
+        for relationship in (NodeRelationship.PREVIOUS, NodeRelationship.NEXT):
+            related = node.relationships.get(relationship)
+            if related is not None and related.node_id in renamed:
+                related.node_id = renamed[related.node_id]
+
+
+# Node parser and vault root of the current worker process, set when it starts
+_worker_parser = None
+_worker_vault_root = None
+
+
+def _init_chunk_worker(chunk_size: int, chunk_overlap: int, vault_root: Optional[str]) -> None:
+    global _worker_parser, _worker_vault_root
+    _worker_parser = SimpleNodeParser.from_defaults(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    _worker_vault_root = vault_root
+
+
+def _chunk_in_worker(vault_file: VaultFile) -> VaultFile:
+    return chunk_file(vault_file, _worker_parser, _worker_vault_root)
+
+
+def chunk_file(vault_file: VaultFile, node_parser, vault_root: Optional[str] = None) -> VaultFile:
+    """
+    Parse a file into a Document and split it into nodes with content-derived IDs.
+
+    Each heading section is chunked on its own, so an edit only changes the
+    chunks of the section it is in instead of shifting every chunk boundary
+    after it.
+    """
+    created = vault_file.created if vault_file.created is not None else vault_file.mtime
+    doc = make_document(vault_file.path, vault_file.content, vault_root, created)
+    vault_file.nodes = []
+    if doc is not None:
+        sections = [
+            Document(
+                text=section,
+                id_=doc.id_,
+                metadata=dict(doc.metadata),
+                excluded_embed_metadata_keys=doc.excluded_embed_metadata_keys,
+                excluded_llm_metadata_keys=doc.excluded_llm_metadata_keys
+            )
+            for section in split_sections(doc.text)
+        ]
+        vault_file.nodes = node_parser.get_nodes_from_documents(sections)
+        file_key = os.path.relpath(vault_file.path, vault_root) if vault_root else vault_file.path
+        assign_chunk_ids(vault_file.nodes, file_key)
+    # The raw text is no longer needed once it has been chunked
+    vault_file.content = ""
+    return vault_file
+
+
+def read_file(path: str, skip: Optional[Callable[[str, os.stat_result], bool]] = None) -> Optional[VaultFile]:
+    """Read a vault file, returns None if it can't be read or skip(path, stat) says so"""
+    try:
+        stat = os.stat(path)
+        if skip and skip(path, stat):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        return VaultFile(path, stat.st_mtime, stat.st_size, content, hash_content(content))
+    except Exception as e:
+        return None
+
+
+def bounded_map(executor: Executor, fn: Callable, items: Iterable, window: int) -> Iterator:
+    """
+    Lazy, order-preserving executor.map that keeps at most window tasks in flight.
+
+    Unlike Executor.map it does not consume the whole input up front, so a
+    chain of bounded_map stages works like a pipeline of bounded queues.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def batched(items: Iterable[VaultFile], max_chunks: int) -> Iterator[List[VaultFile]]:
+    """Group chunked files so each group holds roughly max_chunks nodes"""
+    batch, count = [], 0
+    for item in items:
+        batch.append(item)
+        count += len(item.nodes)
+        if count >= max_chunks:
+            yield batch
+            batch, count = [], 0
+    if batch:
+        yield batch
+
+
+class VaultIngestor:
+    """
+    Streaming load -> parse -> chunk pipeline for vault files.
+
+    File reads run in a thread pool, parsing and chunking run in a process pool
+    for large jobs, and every stage holds at most queue_size files in flight, so
+    memory stays flat however large the vault is.
+    """
+
+    def __init__(
+        self,
+        node_parser,
+        chunk_size: int,
+        chunk_overlap: int,
+        read_workers: int = 8,
+        chunk_workers: int = 0,
+        queue_size: int = 64,
+        process_min_files: int = 32,
+        vault_root: Optional[str] = None,
+    ):
+        self.node_parser = node_parser
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.read_workers = max(1, read_workers)
+        self.chunk_workers = chunk_workers
+        self.queue_size = max(1, queue_size)
+        self.process_min_files = process_min_files
+        self.vault_root = vault_root
+
+    def _process_pool(self, file_count: int) -> Optional[ProcessPoolExecutor]:
+        """Process pool for chunking, or None when chunking inline is cheaper or unsafe"""
+        if self.chunk_workers <= 0 or file_count < self.process_min_files:
+            return None
+        # Never fork: by the time a build runs the process has event loop, executor and
+        # watcher threads and an open SQLite connection whose locks a forked child can inherit
+        methods = multiprocessing.get_all_start_methods()
+        start_method = "forkserver" if "forkserver" in methods else "spawn"
+        return ProcessPoolExecutor(
+            max_workers=self.chunk_workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_chunk_worker,
+            initargs=(self.chunk_size, self.chunk_overlap, self.vault_root),
+        )
+
+    def iter_files(
+        self,
+        paths: List[str],
+        skip: Optional[Callable[[str, os.stat_result], bool]] = None,
+        needs_chunking: Optional[Callable[[VaultFile], bool]] = None,
+    ) -> Iterator[VaultFile]:
+        """
+        Yield chunked files in input order.
+
+        skip(path, stat) drops files before they are read, needs_chunking(file)
+        drops files after reading (e.g. when the content hash is unchanged).
+        """
+        process_pool = self._process_pool(len(paths))
+        with ThreadPoolExecutor(max_workers=self.read_workers) as readers:
+            files = bounded_map(readers, lambda path: read_file(path, skip), paths, self.queue_size)
+            files = (f for f in files if f is not None and (needs_chunking is None or needs_chunking(f)))
+            if process_pool is None:
+                yield from (chunk_file(f, self.node_parser, self.vault_root) for f in files)
+                return
+            with process_pool:
+                yield from bounded_map(process_pool, _chunk_in_worker, files, self.queue_size)
@@ -0,0 +1,128 @@
+import math
+from typing import Optional
+
+import numpy as np
+
+# Rows per block when computing row-to-centroid distances, bounds the temporary matrix
+ASSIGN_BLOCK_ROWS = 16384
+
+# k-means trains on at most this many sampled rows per centroid
+TRAIN_ROWS_PER_LIST = 64
+
+
+def default_list_count(rows: int) -> int:
+    """About sqrt(rows) lists, the usual balance between centroid and list scanning cost"""
+    return max(1, int(round(math.sqrt(rows))))
+
+
+def assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid of every row, computed block by block"""
+    labels = np.empty(len(matrix), dtype=np.int32)
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    for start in range(0, len(matrix), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        # ||x||^2 is the same for every centroid, so it doesn't change the argmin
+        distances = centroid_norms - 2 * (block @ centroids.T)
+        labels[start:start + len(block)] = distances.argmin(axis=1)
+    return labels
+
+
+def kmeans_plus_plus(points: np.ndarray, n_clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Initial centroids spread out by sampling each next one in proportion to its squared distance"""
+    centroids = np.empty((n_clusters, points.shape[1]), dtype=np.float32)
+    centroids[0] = points[rng.integers(len(points))]
+    closest = ((points - centroids[0]) ** 2).sum(axis=1)
+    for i in range(1, n_clusters):
+        total = closest.sum()
+        index = rng.choice(len(points), p=closest / total) if total > 0 else rng.integers(len(points))
+        centroids[i] = points[index]
+        closest = np.minimum(closest, ((points - centroids[i]) ** 2).sum(axis=1))
+    return centroids
+
+
+def kmeans(matrix: np.ndarray, n_clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Lloyd's k-means on a sample of the rows, returns the centroids.
+
+    Centroids start from k-means++ seeding, and a cluster that ends up
+    empty is re-seeded with the row farthest from its current centroid.
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(matrix))
+    sample_size = min(len(matrix), n_clusters * TRAIN_ROWS_PER_LIST)
+    sample = np.sort(rng.choice(len(matrix), size=sample_size, replace=False))
+    points = np.asarray(matrix[sample], dtype=np.float32)
+    centroids = kmeans_plus_plus(points, n_clusters, rng)
+
+    for _ in range(iterations):
+        labels = assign(points, centroids)
+        counts = np.bincount(labels, minlength=n_clusters)
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        occupied = counts > 0
+        sums = np.add.reduceat(points[order], starts[occupied], axis=0)
+        centroids[occupied] = sums / counts[occupied, None]
+
+        empty = np.flatnonzero(~occupied)
+        if len(empty):
+            distances = ((points - centroids[labels]) ** 2).sum(axis=1)
+            centroids[empty] = points[np.argsort(distances)[::-1][:len(empty)]]
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file index over the rows of a vector matrix.
+
+    The rows are clustered with k-means and each row is filed under its
+    nearest centroid. A query only scores the rows in the posting lists of
+    its nprobe nearest centroids, so it scans roughly nprobe / lists of the
+    matrix; more probes find more of the true neighbours at more cost. Rows
+    added after training are filed under the existing centroids until the
+    matrix has grown enough that the centroids are retrained.
+    """
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray, trained_rows: Optional[int] = None):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.assignments = np.asarray(assignments, dtype=np.int32)
+        self.trained_rows = trained_rows if trained_rows is not None else len(self.assignments)
+        self._lists = None
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, n_lists: int = 0, iterations: int = 10) -> "IVFIndex":
+        centroids = kmeans(matrix, n_lists or default_list_count(len(matrix)), iterations)
+        return cls(centroids, assign(matrix, centroids))
+
+    def add(self, vectors: np.ndarray) -> None:
+        """File new rows (appended to the matrix) under their nearest centroids"""
+        self.assignments = np.concatenate([self.assignments, assign(vectors, self.centroids)])
+        self._lists = None
+
+    def needs_retrain(self, rows: int, growth: float) -> bool:
+        return rows >= self.trained_rows * growth
+
+    def _posting_lists(self) -> tuple:
+        """Rows sorted by list and where each list starts, rebuilt after adds"""
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind="stable").astype(np.int64)
+            counts = np.bincount(self.assignments, minlength=len(self.centroids))
+            self._lists = (order, np.concatenate([[0], np.cumsum(counts)]))
+        return self._lists
+
+    def probe(self, query_embedding: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows filed under the nprobe centroids nearest to the query, in row order"""
+        nprobe = max(1, min(nprobe, len(self.centroids)))
+        distances = np.einsum("ij,ij->i", self.centroids, self.centroids) - 2 * (self.centroids @ query_embedding)
+        nearest = np.argpartition(distances, nprobe - 1)[:nprobe]
+        order, offsets = self._posting_lists()
+        return np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in nearest]))
+
+    def stats(self) -> dict:
+        counts = np.bincount(self.assignments, minlength=len(self.centroids))
+        return {
+            "lists": len(self.centroids),
+            "trained_rows": self.trained_rows,
+            "rows": len(self.assignments),
+            "largest_list": int(counts.max()) if len(counts) else 0,
+            "empty_lists": int((counts == 0).sum()),
+        }
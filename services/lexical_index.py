@@ -0,0 +1,248 @@
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Changes since the last full write are appended to a log next to the index file
+LOG_SUFFIX = ".log"
+
+# English function words, which match nearly every chunk and say nothing about its topic
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers herself him himself his how i if in into is it its itself just me more most my myself no nor not
+now of off on once only or other our ours ourselves out over own same she should so some such than that the
+their theirs them themselves then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens without stopwords. Identifiers such as snake_case
+    names are kept whole and also split into their parts so both forms match.
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if "_" in token:
+            tokens.extend(part for part in token.split("_") if part and part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """
+    In-process BM25 inverted index over vault chunks.
+
+    Chunks are added and removed by the same IDs used in the vector store, so
+    lexical search stays in step with incremental index updates. Only chunk
+    text and metadata are persisted; postings are rebuilt when loading. A save
+    appends the chunks changed since the last one to a log, and the full file
+    is only rewritten by compact(), or once the log outgrows it.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.log_path = f"{path}{LOG_SUFFIX}" if path else None
+        self.k1 = k1
+        self.b = b
+        self.chunks: Dict[str, dict] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.lengths: Dict[str, int] = {}
+        self.total_length = 0
+        self.dirty = False
+        # Chunks added or removed since the last save, and whether the full file must be rewritten
+        self._changed: set = set()
+        self._rewrite = True
+        self._log_records = 0
+        self._lock = threading.RLock()
+        if path:
+            self.load()
+
+    def add(self, chunk_id: str, text: str, metadata: Optional[dict] = None) -> None:
+        with self._lock:
+            if chunk_id in self.chunks:
+                self.remove(chunk_id)
+            self.chunks[chunk_id] = {"text": text, "metadata": metadata or {}}
+            self._index(chunk_id, text)
+            self._changed.add(chunk_id)
+            self.dirty = True
+
+    def add_many(self, items: Iterable[Tuple[str, str, dict]]) -> None:
+        with self._lock:
+            for chunk_id, text, metadata in items:
+                self.add(chunk_id, text, metadata)
+
+    def _index(self, chunk_id: str, text: str) -> None:
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self.postings[term][chunk_id] = tf
+        length = sum(counts.values())
+        self.lengths[chunk_id] = length
+        self.total_length += length
+
+    def remove(self, chunk_id: str) -> bool:
+        with self._lock:
+            chunk = self.chunks.pop(chunk_id, None)
+            if chunk is None:
+                return False
+            for term in set(tokenize(chunk["text"])):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self.postings[term]
+            self.total_length -= self.lengths.pop(chunk_id, 0)
+            self._changed.add(chunk_id)
+            self.dirty = True
+            return True
+
+    def get(self, chunk_id: str) -> Optional[dict]:
+        return self.chunks.get(chunk_id)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        accept: Optional[Callable[[dict], bool]] = None,
+        min_score: float = 0.0,
+    ) -> List[Tuple[str, float]]:
+        """
+        Return (chunk_id, score) pairs for chunks sharing at least one term with
+        the query and scoring at least min_score. With accept, only chunks whose
+        metadata it accepts are scored.
+        """
+        with self._lock:
+            n = len(self.chunks)
+            if not n:
+                return []
+            avg_length = self.total_length / n
+            scores: Dict[str, float] = defaultdict(float)
+            accepted: Dict[str, bool] = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    if accept is not None:
+                        if chunk_id not in accepted:
+                            accepted[chunk_id] = accept(self.chunks[chunk_id]["metadata"])
+                        if not accepted[chunk_id]:
+                            continue
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / avg_length)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            return [(chunk_id, score) for chunk_id, score in ranked[:top_k] if score >= min_score]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.chunks = {}
+            self.postings = defaultdict(dict)
+            self.lengths = {}
+            self.total_length = 0
+            self._changed = set()
+            self._rewrite = True
+            self.dirty = True
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def load(self) -> None:
+        """
+        Load chunks from disk, replay the log and rebuild postings (starts
+        empty if missing or unreadable)
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION:
+                return
+            chunks = data.get("chunks", {})
+            records, truncated = 0, False
+            if os.path.exists(self.log_path):
+                with open(self.log_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # A save interrupted mid-line: rewrite the file so later records aren't appended after it
+                            truncated = True
+                            break
+                        if record.get("removed"):
+                            chunks.pop(record["id"], None)
+                        else:
+                            chunks[record["id"]] = {"text": record["text"], "metadata": record["metadata"]}
+                        records += 1
+            with self._lock:
+                self.clear()
+                self.chunks = chunks
+                for chunk_id, chunk in self.chunks.items():
+                    self._index(chunk_id, chunk["text"])
+                self._rewrite = truncated
+                self._log_records = records
+                self.dirty = truncated
+        except Exception as e:
+            print(f"Could not read lexical index, starting fresh: {e}")
+
+    def save(self) -> None:
+        """
+        Append the changed chunks to the log, skipped when nothing changed.
+        The full file is rewritten after clear() or once the log holds more
+        records than the index has chunks.
+        """
+        if not self.path or not self.dirty:
+            return
+        with self._lock:
+            if self._rewrite or self._log_records + len(self._changed) > max(len(self.chunks), 1000):
+                self.compact()
+                return
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                for chunk_id in self._changed:
+                    chunk = self.chunks.get(chunk_id)
+                    if chunk is None:
+                        record = {"id": chunk_id, "removed": True}
+                    else:
+                        record = {"id": chunk_id, "text": chunk["text"], "metadata": chunk["metadata"]}
+                    f.write(json.dumps(record) + "\n")
+            self._log_records += len(self._changed)
+            self._changed = set()
+            self.dirty = False
+
+    def compact(self) -> None:
+        """Write the whole index atomically and drop the log"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.VERSION, "chunks": self.chunks}, f)
+            os.replace(tmp_path, self.path)
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+            self._changed = set()
+            self._rewrite = False
+            self._log_records = 0
+            self.dirty = False
+
+    def stats(self) -> dict:
+        return {
+            "chunks": len(self.chunks),
+            "terms": len(self.postings),
+            "avg_chunk_tokens": round(self.total_length / len(self.chunks), 1) if self.chunks else 0,
+            "log_records": self._log_records,
+        }
@@ -3,6 +3,8 @@ from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from core.config import config
 from utils.prompt_templates import CHAT_SYSTEM_PROMPT
 from core.conversation import conversation_manager
+from services.async_runtime import runtime
+from core.startup import LazyService
 
 class LLMService:
     def __init__(self):
@@ -21,12 +23,24 @@ class LLMService:
         """
         Directly invoke the LLM with a list of message objects.
         """
-        return self.llm.invoke(messages)
+        return runtime.run(self.ainvoke(messages))
+
+    async def ainvoke(self, messages):
+        """
+        Async invoke, on the shared event loop and its pooled HTTP client.
+        """
+        return await self.llm.ainvoke(messages)
 
     def invoke_context(self, prompt: str): #Stateless
         """
         Directly invoke the LLM with a single prompt string, always with system prompt and recent context.
         """
+        return runtime.run(self.ainvoke_context(prompt))
+
+    async def ainvoke_context(self, prompt: str):
+        """
+        Async invoke_context.
+        """
         messages = [SystemMessage(content=self.system_prompt)]
         recent_messages = conversation_manager.get_history()
         if recent_messages:
@@ -34,7 +48,7 @@ class LLMService:
             print(f"Recent messages: {recent_messages}")
         messages.append((HumanMessage(content=prompt)))
         print(f"LLM Invoked: {messages}")
-        response = self.llm.invoke(
+        response = await self.llm.ainvoke(
             messages
         )
         print("\nLLM Response: ", response)
@@ -43,5 +57,11 @@ class LLMService:
         """
         Directly invoke the llm with just a single prompt string.
         """
-        return self.llm.invoke([HumanMessage(content=prompt)])
-llm_service = LLMService()
\ No newline at end of file
+        return runtime.run(self.ainvoke_prompt(prompt))
+
+    async def ainvoke_prompt(self, prompt: str):
+        """
+        Async invoke_prompt.
+        """
+        return await self.llm.ainvoke([HumanMessage(content=prompt)])
+llm_service = LazyService("llm_service", LLMService)
\ No newline at end of file
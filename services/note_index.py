@@ -0,0 +1,102 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+RETRIEVAL_STRATEGIES = ("flat", "two_stage")
+NOTE_VECTOR_MODES = ("mean", "headings")
+
+
+class NoteIndex:
+    """
+    One unit vector per note, the first stage of two-stage retrieval.
+
+    A note's vector is the mean of its chunk embeddings or an embedding of
+    its title and headings, so a search can pick the notes a query is about
+    by cosine similarity before looking at individual chunks. The vectors are
+    stacked into a matrix on the first search after a change and persisted as
+    a .npz of paths and vectors.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.vectors: Dict[str, np.ndarray] = {}
+        self.dirty = False
+        self._matrix = None
+        self._paths: List[str] = []
+        self._lock = threading.RLock()
+        if path:
+            self.load()
+
+    def update(self, path: str, vector) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        with self._lock:
+            if norm == 0:
+                self.vectors.pop(path, None)
+            else:
+                self.vectors[path] = vector / norm
+            self._matrix = None
+            self.dirty = True
+
+    def remove(self, path: str) -> None:
+        with self._lock:
+            if self.vectors.pop(path, None) is not None:
+                self._matrix = None
+                self.dirty = True
+
+    def search(self, query_embedding, top_k: int) -> List[Tuple[str, float]]:
+        """The top_k notes most similar to the query, with their cosine similarity"""
+        with self._lock:
+            if self._matrix is None:
+                self._paths = list(self.vectors)
+                self._matrix = np.vstack(list(self.vectors.values())) if self.vectors else None
+            matrix, paths = self._matrix, self._paths
+        if matrix is None:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        top_k = min(top_k, len(paths))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(paths[i], float(scores[i])) for i in best]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.vectors = {}
+            self._matrix = None
+            self.dirty = True
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def load(self) -> None:
+        """Load the vectors from disk (starts empty if missing or unreadable)"""
+        self.vectors = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                self.vectors = dict(zip(data["paths"].tolist(), data["vectors"]))
+        except Exception as e:
+            print(f"Could not read note index, starting fresh: {e}")
+
+    def save(self) -> None:
+        """Write the vectors atomically, skipped when nothing changed"""
+        if not self.path or not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            paths = list(self.vectors)
+            vectors = np.vstack([self.vectors[p] for p in paths]) if paths else np.zeros((0, 0), dtype=np.float32)
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, paths=np.array(paths, dtype=str), vectors=vectors)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def stats(self) -> dict:
+        return {"notes": len(self.vectors)}
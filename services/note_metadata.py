@@ -0,0 +1,160 @@
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List, Optional, Union
+
+import yaml
+from llama_index.core.vector_stores.types import FilterCondition, FilterOperator, MetadataFilter, MetadataFilters
+
+FRONTMATTER = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.DOTALL)
+
+# Frontmatter type of the notes written by ObsidianService.save_session_notes
+SESSION_NOTE_TYPE = "learning_session_summary"
+
+# Prefixes of the per-tag and per-folder-level keys that filters match on
+TAG_KEY_PREFIX = "tag_"
+FOLDER_KEY_PREFIX = "folder_"
+
+DateLike = Union[datetime, date, str, float, int]
+
+
+def parse_frontmatter(content: str) -> dict:
+    """The YAML frontmatter of a note as a dict, empty if there is none or it doesn't parse"""
+    match = FRONTMATTER.match(content)
+    if not match:
+        return {}
+    try:
+        data = yaml.safe_load(match.group(1))
+    except yaml.YAMLError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def normalize_tag(tag: str) -> str:
+    """Obsidian tags compare case-insensitively and without the leading #"""
+    return re.sub(r"\s+", "-", str(tag).strip().lstrip("#").strip().lower())
+
+
+def tag_key(tag: str) -> str:
+    return TAG_KEY_PREFIX + re.sub(r"[^\w/-]", "-", normalize_tag(tag))
+
+
+def _tags(value) -> List[str]:
+    if isinstance(value, str):
+        value = re.split(r"[,\s]+", value)
+    if not isinstance(value, (list, tuple)):
+        return []
+    return list(dict.fromkeys(tag for tag in (normalize_tag(v) for v in value if v is not None) if tag))
+
+
+def normalize_folder(folder: str) -> str:
+    return "/".join(part for part in re.split(r"[\\/]+", folder or "") if part and part != ".")
+
+
+def to_timestamp(value: DateLike) -> Optional[float]:
+    """Seconds since the epoch for a datetime, date, ISO string or number, None if it can't be read"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).timestamp()
+    return None
+
+
+def note_metadata(path: str, content: str, vault_root: Optional[str] = None, mtime: Optional[float] = None) -> dict:
+    """
+    Filterable metadata of a note: tags, type and creation time from its
+    frontmatter, and its folder within the vault.
+
+    Values are flat strings and numbers so Chroma can index them. Each tag
+    becomes a tag_<name> key set to 1 and each folder level a folder_<depth>
+    key, which turns "has any of these tags" and "is under this folder" into
+    equality checks. created falls back to the file's modification time.
+    """
+    frontmatter = parse_frontmatter(content)
+    relative = os.path.relpath(path, vault_root) if vault_root else path
+    folder = normalize_folder(os.path.dirname(relative))
+    tags = _tags(frontmatter.get("tags", frontmatter.get("tag")))
+
+    created = to_timestamp(frontmatter.get("created")) if "created" in frontmatter else None
+    if created is None:
+        created = mtime if mtime is not None else os.path.getmtime(path)
+
+    metadata = {
+        "folder": folder,
+        "note_type": str(frontmatter.get("type") or "note"),
+        "tags": ",".join(tags),
+        "created": float(created),
+    }
+    parts = folder.split("/") if folder else []
+    for depth in range(1, len(parts) + 1):
+        metadata[f"{FOLDER_KEY_PREFIX}{depth}"] = "/".join(parts[:depth])
+    for tag in tags:
+        metadata[tag_key(tag)] = 1
+    return metadata
+
+
+def filter_keys(metadata: dict) -> List[str]:
+    """Keys that only exist for filtering, kept out of embedded text and LLM context"""
+    return [
+        key for key in metadata
+        if key in ("folder", "note_type", "tags", "created")
+        or key.startswith(TAG_KEY_PREFIX) or key.startswith(FOLDER_KEY_PREFIX)
+    ]
+
+
+@dataclass
+class SearchFilters:
+    """
+    Restricts a search to part of the vault, every field that is set must match.
+
+    tags matches notes with any of the tags, folder is a folder prefix relative
+    to the vault, created_after / created_before bound the creation date, and
+    exclude_sessions leaves out the session summaries the assistant writes.
+    """
+    tags: List[str] = field(default_factory=list)
+    folder: Optional[str] = None
+    created_after: Optional[DateLike] = None
+    created_before: Optional[DateLike] = None
+    exclude_sessions: bool = False
+
+    def is_empty(self) -> bool:
+        return self.to_metadata_filters() is None
+
+    def to_metadata_filters(self) -> Optional[MetadataFilters]:
+        """The filters as llama_index MetadataFilters (Chroma where clauses), None when nothing is filtered"""
+        clauses = []
+        tags = _tags(list(self.tags or []))
+        if len(tags) == 1:
+            clauses.append(MetadataFilter(key=tag_key(tags[0]), value=1))
+        elif tags:
+            clauses.append(MetadataFilters(
+                filters=[MetadataFilter(key=tag_key(tag), value=1) for tag in tags],
+                condition=FilterCondition.OR,
+            ))
+
+        folder = normalize_folder(self.folder)
+        if folder:
+            depth = len(folder.split("/"))
+            clauses.append(MetadataFilter(key=f"{FOLDER_KEY_PREFIX}{depth}", value=folder))
+
+        for bound, operator in ((self.created_after, FilterOperator.GTE), (self.created_before, FilterOperator.LTE)):
+            if bound is not None:
+                timestamp = to_timestamp(bound)
+                if timestamp is None:
+                    raise ValueError(f"Unreadable date filter: {bound!r}")
+                clauses.append(MetadataFilter(key="created", value=timestamp, operator=operator))
+
+        if self.exclude_sessions:
+            clauses.append(MetadataFilter(key="note_type", value=SESSION_NOTE_TYPE, operator=FilterOperator.NE))
+
+        return MetadataFilters(filters=clauses) if clauses else None
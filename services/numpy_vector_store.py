@@ -0,0 +1,810 @@
+import os
+import json
+import shutil
+import functools
+import threading
+from typing import Any, List, Optional
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode, MetadataMode, NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+
+from services.ivf_index import IVFIndex
+
+EMBEDDINGS_FILE = "embeddings.npy"
+NORMS_FILE = "norms.npy"
+METADATA_FILE = "metadata.json"
+INT8_CODES_FILE = "int8_codes.npy"
+INT8_SCALES_FILE = "int8_scales.npy"
+BINARY_CODES_FILE = "binary_codes.npy"
+IVF_CENTROIDS_FILE = "ivf_centroids.npy"
+IVF_ASSIGNMENTS_FILE = "ivf_assignments.npy"
+# Rows added since the last full write: their embeddings, and a log of the added rows and deleted IDs
+TAIL_EMBEDDINGS_FILE = "tail_embeddings.bin"
+LOG_FILE = "log.jsonl"
+QUANTIZATION_MODES = ("none", "int8", "binary")
+INDEX_TYPES = ("flat", "ivf")
+
+# Rows scored per block when the matrix is stored as float16
+SCORE_BLOCK_ROWS = 65536
+
+# Filters leaving at most this share of the rows are scored row by row instead of scanning the matrix
+SELECTIVE_FILTER_FRACTION = 0.125
+
+# Number of set bits in every byte value, for Hamming distances on packed codes
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple:
+    """Symmetric per-row int8 codes and the scale that maps them back to floats"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def binarize(matrix: np.ndarray) -> np.ndarray:
+    """1-bit sign codes packed 8 dimensions per byte"""
+    return np.packbits(np.asarray(matrix) > 0, axis=1)
+
+
+def _matches(value: Any, operator: FilterOperator, expected: Any) -> bool:
+    if operator == FilterOperator.EQ:
+        return value == expected
+    if operator == FilterOperator.NE:
+        return value != expected
+    if operator == FilterOperator.IN:
+        return value in expected
+    if operator == FilterOperator.NIN:
+        return value not in expected
+    if operator == FilterOperator.CONTAINS:
+        return value is not None and expected in value
+    if value is None:
+        return False
+    if operator == FilterOperator.GT:
+        return value > expected
+    if operator == FilterOperator.GTE:
+        return value >= expected
+    if operator == FilterOperator.LT:
+        return value < expected
+    if operator == FilterOperator.LTE:
+        return value <= expected
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+class StackedRows:
+    """
+    Row blocks stacked end to end without copying them together, e.g. the
+    memory-mapped base file, the memory-mapped tail and the rows added since.
+    Supports the lookups the store needs: len, row slices, integer row arrays
+    and matrix @ vector. Appended rows are merged into the last block only
+    when it is already in memory.
+    """
+
+    def __init__(self, parts: List[np.ndarray]):
+        self.parts = [part for part in parts if len(part)]
+
+    @property
+    def dtype(self):
+        return self.parts[0].dtype
+
+    @property
+    def shape(self) -> tuple:
+        return (len(self),) + self.parts[0].shape[1:]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(int(part.nbytes) for part in self.parts)
+
+    def __len__(self) -> int:
+        return sum(len(part) for part in self.parts)
+
+    def append(self, rows: np.ndarray) -> None:
+        if not len(rows):
+            return
+        if self.parts and not isinstance(self.parts[-1], np.memmap):
+            self.parts[-1] = np.concatenate([self.parts[-1], rows])
+        else:
+            self.parts.append(rows)
+
+    def __getitem__(self, key) -> np.ndarray:
+        if isinstance(key, slice):
+            start, stop, _ = key.indices(len(self))
+            pieces, offset = [], 0
+            for part in self.parts:
+                if start < offset + len(part) and stop > offset:
+                    pieces.append(part[max(start - offset, 0):stop - offset])
+                offset += len(part)
+            if not pieces:
+                return np.zeros((0, self.shape[1]), dtype=self.dtype)
+            return np.concatenate(pieces) if len(pieces) > 1 else np.asarray(pieces[0])
+        rows = np.asarray(key)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        out = np.empty((len(rows),) + self.shape[1:], dtype=self.dtype)
+        offset = 0
+        for part in self.parts:
+            inside = (rows >= offset) & (rows < offset + len(part))
+            if inside.any():
+                out[inside] = part[rows[inside] - offset]
+            offset += len(part)
+        return out
+
+    def __matmul__(self, other: np.ndarray) -> np.ndarray:
+        return np.concatenate([part @ other for part in self.parts])
+
+
+def _synchronized(method):
+    """Run a store method under the store's lock, as lookups may run from several threads"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def metadata_matches(metadata: dict, filters: Optional[MetadataFilters]) -> bool:
+    """Evaluate llama_index MetadataFilters against a flat metadata dict"""
+    if filters is None or not filters.filters:
+        return True
+    results = []
+    for f in filters.filters:
+        if isinstance(f, MetadataFilters):
+            results.append(metadata_matches(metadata, f))
+        else:
+            results.append(_matches(metadata.get(f.key), f.operator, f.value))
+    if filters.condition == FilterCondition.OR:
+        return any(results)
+    return all(results)
+
+
+class NumpyVectorStore(BasePydanticVectorStore):
+    """
+    Brute-force vector store on a contiguous NumPy matrix.
+
+    Embeddings live in a memory-mapped .npy file (float32 or float16) with
+    precomputed squared norms and a JSON sidecar holding chunk IDs, text and
+    metadata, so a cold start only maps the files instead of loading them.
+    Saves are append-only: added rows go to a tail file and a log that also
+    records deleted IDs, both replayed on load, and the base files are only
+    rewritten by compact() or once the log outgrows them. Queries are a
+    single matrix-vector product plus argpartition top-k.
+    Scores use exp(-squared L2 distance), the same scale ChromaVectorStore
+    reports, so VECTOR_SIMILARITY_THRESHOLD means the same for both backends.
+
+    With quantization set to "int8" or "binary", queries scan compact codes
+    held alongside the matrix (a quarter or a thirty-second of float32) and
+    only the top top_k * rerank_multiplier candidates are re-scored exactly
+    from the memory-mapped floats, so the full matrix is never paged in and
+    the returned scores are exact.
+
+    With index_type "ivf", stores of at least ivf_min_rows rows are also
+    clustered into an inverted-file index (see IVFIndex) and queries only
+    score the rows of the ivf_nprobe nearest clusters, which makes lookups
+    sub-linear at some cost in recall. Centroids are persisted with the
+    matrix and retrained once it has grown by ivf_retrain_growth. Training
+    happens on save or compaction, never inside a query, and queries use the
+    flat scan (or the old clusters) until the new ones are ready.
+    """
+
+    stores_text: bool = True
+    persist_dir: str
+    dtype: str = "float32"
+    quantization: str = "none"
+    rerank_multiplier: int = 10
+    index_type: str = "flat"
+    ivf_lists: int = 0
+    ivf_nprobe: int = 8
+    ivf_min_rows: int = 20000
+    ivf_retrain_growth: float = 2.0
+
+    _matrix: Optional[StackedRows] = PrivateAttr(default=None)
+    _norms: Optional[np.ndarray] = PrivateAttr(default=None)
+    _alive: Optional[np.ndarray] = PrivateAttr(default=None)
+    _codes: Optional[StackedRows] = PrivateAttr(default=None)
+    _scales: Optional[np.ndarray] = PrivateAttr(default=None)
+    _rows: List[dict] = PrivateAttr(default_factory=list)
+    _id_to_row: dict = PrivateAttr(default_factory=dict)
+    _pending: List[np.ndarray] = PrivateAttr(default_factory=list)
+    _ivf: Optional[IVFIndex] = PrivateAttr(default=None)
+    _file_rows: Optional[dict] = PrivateAttr(default=None)
+    # Rows already on disk, IDs of those deleted since the last save, and the base / log sizes
+    _persisted_rows: int = PrivateAttr(default=0)
+    _deleted: List[str] = PrivateAttr(default_factory=list)
+    _base_rows: int = PrivateAttr(default=0)
+    _log_rows: int = PrivateAttr(default=0)
+    _rewrite: bool = PrivateAttr(default=True)
+    _generation: int = PrivateAttr(default=0)
+    _dirty: bool = PrivateAttr(default=False)
+    _lock: Any = PrivateAttr(default_factory=threading.RLock)
+
+    def __init__(
+        self,
+        persist_dir: str,
+        dtype: str = "float32",
+        quantization: str = "none",
+        rerank_multiplier: int = 10,
+        index_type: str = "flat",
+        **kwargs: Any,
+    ):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization {quantization!r}, expected one of {QUANTIZATION_MODES}")
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+        super().__init__(
+            persist_dir=persist_dir,
+            dtype=dtype,
+            quantization=quantization,
+            rerank_multiplier=rerank_multiplier,
+            index_type=index_type,
+            **kwargs,
+        )
+        self._load()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NumpyVectorStore"
+
+    @staticmethod
+    def exists(persist_dir: str) -> bool:
+        return os.path.exists(os.path.join(persist_dir, METADATA_FILE))
+
+    @staticmethod
+    def destroy(persist_dir: str) -> None:
+        """Delete a persisted store from disk"""
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+    @property
+    def client(self) -> Any:
+        return self
+
+    def _load(self) -> None:
+        self._rows = []
+        self._id_to_row = {}
+        self._pending = []
+        self._matrix = None
+        self._norms = None
+        self._codes = None
+        self._scales = None
+        self._ivf = None
+        self._file_rows = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._persisted_rows = 0
+        self._deleted = []
+        self._base_rows = 0
+        self._log_rows = 0
+        self._rewrite = True
+        if not self.exists(self.persist_dir):
+            return
+        with open(os.path.join(self.persist_dir, METADATA_FILE), 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+        self._generation = sidecar.get("generation", 0)
+        self._rows = sidecar["rows"]
+        self._id_to_row = {row["id"]: i for i, row in enumerate(self._rows)}
+        self._alive = np.ones(len(self._rows), dtype=bool)
+        self._base_rows = len(self._rows)
+        self._persisted_rows = len(self._rows)
+        if not self._rows:
+            return
+        base = np.load(os.path.join(self.persist_dir, EMBEDDINGS_FILE), mmap_mode="r")
+        self._matrix = StackedRows([base])
+        self._norms = np.load(os.path.join(self.persist_dir, NORMS_FILE), mmap_mode="r")
+        self._rewrite = False
+        self._load_codes()
+        self._load_ivf(sidecar.get("ivf_trained_rows"))
+        self._rewrite = self._replay_log(base.shape[1]) or self._rewrite
+
+    def _replay_log(self, dim: int) -> bool:
+        """
+        Apply the rows added and deleted since the base was written, returns
+        whether the next save must rewrite everything (the log was cut off,
+        or left over from an earlier base)
+        """
+        log_path = os.path.join(self.persist_dir, LOG_FILE)
+        tail_path = os.path.join(self.persist_dir, TAIL_EMBEDDINGS_FILE)
+        if not os.path.exists(log_path):
+            return False
+        row_bytes = dim * np.dtype(self.dtype).itemsize
+        available = os.path.getsize(tail_path) // row_bytes if os.path.exists(tail_path) else 0
+        added, alive, truncated = [], [], False
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    truncated = True
+                    break
+                if record.get("generation") != self._generation or len(added) + len(record.get("rows", [])) > available:
+                    truncated = True
+                    break
+                for node_id in record.get("deleted", []):
+                    self._tombstone_row(self._id_to_row.pop(node_id, None), alive)
+                for row in record.get("rows", []):
+                    self._tombstone_row(self._id_to_row.get(row["id"]), alive)
+                    self._id_to_row[row["id"]] = len(self._rows) + len(added)
+                    added.append(row)
+                    alive.append(True)
+                self._log_rows += len(record.get("rows", [])) + len(record.get("deleted", []))
+        if added:
+            tail = np.memmap(tail_path, dtype=self.dtype, mode="r", shape=(len(added), dim))
+            self._rows.extend(added)
+            self._alive = np.concatenate([self._alive, np.asarray(alive, dtype=bool)])
+            self._fold(tail)
+        self._persisted_rows = len(self._rows)
+        # Bytes past the logged rows are from an interrupted save, appending after them would misalign rows
+        return truncated or available != len(added)
+
+    def _tombstone_row(self, row: Optional[int], tail_alive: List[bool]) -> None:
+        """Mark a row dead while replaying the log, whether it is in the base or the tail read so far"""
+        if row is None:
+            return
+        if row < len(self._alive):
+            self._alive[row] = False
+        else:
+            tail_alive[row - len(self._alive)] = False
+
+    def _load_codes(self) -> None:
+        """Map persisted codes, or derive them once from the matrix if missing or stale"""
+        if self.quantization == "none":
+            return
+        files = [INT8_CODES_FILE, INT8_SCALES_FILE] if self.quantization == "int8" else [BINARY_CODES_FILE]
+        paths = [os.path.join(self.persist_dir, name) for name in files]
+        if all(os.path.exists(path) for path in paths):
+            arrays = [np.load(path, mmap_mode="r") for path in paths]
+            if all(len(array) == len(self._matrix) for array in arrays):
+                self._codes = StackedRows([arrays[0]])
+                self._scales = arrays[1] if len(arrays) > 1 else None
+                return
+        codes, self._scales = self._encode(self._matrix)
+        self._codes = StackedRows([codes])
+        self._rewrite = self._dirty = True
+
+    def _load_ivf(self, trained_rows: Optional[int]) -> None:
+        """Map the persisted clustering if it matches the matrix, otherwise it is trained with the next save"""
+        if self.index_type != "ivf" or trained_rows is None:
+            return
+        paths = [os.path.join(self.persist_dir, name) for name in (IVF_CENTROIDS_FILE, IVF_ASSIGNMENTS_FILE)]
+        if all(os.path.exists(path) for path in paths):
+            centroids, assignments = (np.load(path) for path in paths)
+            if len(assignments) == len(self._matrix):
+                self._ivf = IVFIndex(centroids, assignments, trained_rows)
+                return
+        # The clustering is missing or stale, write it with the next save
+        self._rewrite = True
+
+    def train_ivf(self, force: bool = False) -> bool:
+        """
+        (Re)train the clustering once the store is big enough, or has grown
+        enough since training (with force, whenever it is big enough).
+        k-means runs on a snapshot of the matrix without holding the lock, so
+        queries keep using the old lists, or the flat scan, until the new
+        ones are swapped in. Returns whether new lists were installed.
+        """
+        with self._lock:
+            self._materialize()
+            if self.index_type != "ivf" or self._matrix is None or len(self._matrix) < self.ivf_min_rows:
+                return False
+            if not force and self._ivf is not None and not self._ivf.needs_retrain(
+                    len(self._matrix), self.ivf_retrain_growth):
+                return False
+            snapshot, generation = StackedRows(list(self._matrix.parts)), self._generation
+        trained = IVFIndex.train(snapshot, self.ivf_lists)
+        with self._lock:
+            self._materialize()
+            if self._generation != generation or self._matrix is None or len(self._matrix) < len(snapshot):
+                # Rewritten meanwhile, so the rows were renumbered; the next save trains again
+                return False
+            # Rows added during training are filed under the new centroids
+            trained.add(self._matrix[len(snapshot):])
+            self._ivf = trained
+            # Every row's list may have changed
+            self._rewrite = self._dirty = True
+            return True
+
+    def _encode(self, matrix: np.ndarray) -> tuple:
+        codes, scales = [], []
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = matrix[start:start + SCORE_BLOCK_ROWS]
+            if self.quantization == "int8":
+                block_codes, block_scales = quantize_int8(block)
+                scales.append(block_scales)
+            else:
+                block_codes = binarize(block)
+            codes.append(block_codes)
+        return np.vstack(codes), (np.concatenate(scales) if scales else None)
+
+    def count(self) -> int:
+        """Number of live chunks (not __len__, which would make an empty store falsy)"""
+        return int(self._alive.sum())
+
+    @_synchronized
+    def dimension(self) -> Optional[int]:
+        self._materialize()
+        return int(self._matrix.shape[1]) if self._matrix is not None and self.count() else None
+
+    @_synchronized
+    def node_ids(self) -> List[str]:
+        return list(self._id_to_row)
+
+    @_synchronized
+    def get_embeddings(self, node_ids: List[str]) -> np.ndarray:
+        """Exact (unquantized) embeddings of the given nodes, one row per ID in order"""
+        self._materialize()
+        if not node_ids:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(self._matrix[[self._id_to_row[node_id] for node_id in node_ids]], dtype=np.float32)
+
+    @_synchronized
+    def _materialize(self) -> None:
+        """Fold vectors added since the last query into the matrix"""
+        if not self._pending:
+            return
+        self._fold(np.vstack(self._pending).astype(self.dtype))
+        self._pending = []
+
+    def _fold(self, added: np.ndarray) -> None:
+        """Stack rows after the matrix, with their norms, codes and lists; the matrix itself is not copied"""
+        added_norms = np.einsum("ij,ij->i", added.astype(np.float32), added.astype(np.float32))
+        if self._matrix is None:
+            self._matrix, self._norms = StackedRows([added]), added_norms
+        else:
+            self._matrix.append(added)
+            self._norms = np.concatenate([self._norms, added_norms])
+        if self.quantization != "none":
+            codes, scales = self._encode(added)
+            if self._codes is None:
+                self._codes = StackedRows([codes])
+            else:
+                self._codes.append(codes)
+            if scales is not None:
+                self._scales = scales if self._scales is None else np.concatenate([self._scales, scales])
+        if self._ivf is not None:
+            self._ivf.add(added)
+
+    @_synchronized
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+        # Re-adding an existing ID replaces it
+        self._tombstone([node.node_id for node in nodes if node.node_id in self._id_to_row])
+        start = len(self._rows)
+        for i, node in enumerate(nodes):
+            self._rows.append({
+                "id": node.node_id,
+                "doc_id": node.ref_doc_id,
+                "text": node.get_content(metadata_mode=MetadataMode.NONE),
+                "metadata": node.metadata,
+            })
+            self._id_to_row[node.node_id] = start + i
+        self._file_rows = None
+        self._pending.append(np.asarray([node.get_embedding() for node in nodes], dtype=np.float32))
+        self._alive = np.concatenate([self._alive, np.ones(len(nodes), dtype=bool)])
+        self._dirty = True
+        return [node.node_id for node in nodes]
+
+    @_synchronized
+    def _tombstone(self, node_ids: List[str]) -> None:
+        for node_id in node_ids:
+            row = self._id_to_row.pop(node_id, None)
+            if row is not None:
+                self._alive[row] = False
+                if row < self._persisted_rows:
+                    self._deleted.append(node_id)
+                self._dirty = True
+
+    @_synchronized
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._tombstone([
+            row["id"] for i, row in enumerate(self._rows)
+            if self._alive[i] and row["doc_id"] == ref_doc_id
+        ])
+
+    @_synchronized
+    def delete_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Optional[MetadataFilters] = None,
+        **delete_kwargs: Any,
+    ) -> None:
+        if filters is None:
+            self._tombstone(list(node_ids or []))
+            return
+        wanted = set(node_ids) if node_ids else None
+        self._tombstone([
+            row["id"] for i, row in enumerate(self._rows)
+            if self._alive[i]
+            and (wanted is None or row["id"] in wanted)
+            and metadata_matches(row["metadata"], filters)
+        ])
+
+    def clear(self) -> None:
+        self._tombstone(list(self._id_to_row))
+
+    def _to_node(self, row: dict) -> TextNode:
+        node = TextNode(id_=row["id"], text=row["text"], metadata=row["metadata"])
+        if row.get("doc_id"):
+            node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id=row["doc_id"])
+        return node
+
+    @_synchronized
+    def get_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Optional[MetadataFilters] = None,
+    ) -> List[BaseNode]:
+        if node_ids:
+            rows = [self._id_to_row[node_id] for node_id in node_ids if node_id in self._id_to_row]
+        else:
+            rows = np.flatnonzero(self._alive).tolist()
+        return [
+            self._to_node(self._rows[i]) for i in rows
+            if metadata_matches(self._rows[i]["metadata"], filters)
+        ]
+
+    def _rows_of_files(self, paths: List[str]) -> np.ndarray:
+        """Rows (live or not) of the given files, from a filepath index built on first use"""
+        if self._file_rows is None:
+            self._file_rows = {}
+            for i, row in enumerate(self._rows):
+                self._file_rows.setdefault(row["metadata"].get("filepath"), []).append(i)
+        return np.asarray([i for path in paths for i in self._file_rows.get(path, ())], dtype=np.int64)
+
+    @staticmethod
+    def _file_filter(filters: Optional[MetadataFilters]) -> Optional[List[str]]:
+        """The files an AND of filters is restricted to by a filepath EQ or IN filter, None if it isn't"""
+        if filters is None or filters.condition == FilterCondition.OR:
+            return None
+        for f in filters.filters:
+            if isinstance(f, MetadataFilter) and f.key == "filepath":
+                if f.operator == FilterOperator.EQ:
+                    return [f.value]
+                if f.operator == FilterOperator.IN:
+                    return list(f.value)
+        return None
+
+    def _candidate_mask(self, query: VectorStoreQuery) -> np.ndarray:
+        mask = self._alive.copy()
+        if query.filters is None and not query.doc_ids and not query.node_ids:
+            return mask
+        files = self._file_filter(query.filters)
+        if files is not None:
+            # Only the rows of those files need their metadata checked
+            rows = self._rows_of_files(files)
+            narrowed = np.zeros_like(mask)
+            narrowed[rows] = mask[rows]
+            mask = narrowed
+        doc_ids = set(query.doc_ids or [])
+        node_ids = set(query.node_ids or [])
+        for i in np.flatnonzero(mask):
+            row = self._rows[i]
+            if (doc_ids and row["doc_id"] not in doc_ids) or (node_ids and row["id"] not in node_ids):
+                mask[i] = False
+            elif not metadata_matches(row["metadata"], query.filters):
+                mask[i] = False
+        return mask
+
+    @staticmethod
+    def _dots(matrix: np.ndarray, query_embedding: np.ndarray) -> np.ndarray:
+        """matrix @ query, converting non-float32 storage block by block"""
+        if matrix.dtype == np.float32:
+            return matrix @ query_embedding
+        dots = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            dots[start:start + len(block)] = block @ query_embedding
+        return dots
+
+    def _distances(self, query_embedding: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Squared L2 distance from the query to every row, or to the given rows"""
+        matrix, norms = (self._matrix, self._norms) if rows is None else (self._matrix[rows], self._norms[rows])
+        dots = self._dots(matrix, query_embedding)
+        return np.maximum(norms - 2 * dots + query_embedding @ query_embedding, 0.0)
+
+    def _approximate_distances(self, query_embedding: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Distance estimate from the quantized codes, lower is closer"""
+        codes = self._codes if rows is None else self._codes[rows]
+        if self.quantization == "int8":
+            scales, norms = (self._scales, self._norms) if rows is None else (self._scales[rows], self._norms[rows])
+            dots = self._dots(codes, query_embedding) * scales
+            return norms - 2 * dots
+        query_bits = binarize(query_embedding[None, :])[0]
+        hamming = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = np.bitwise_xor(codes[start:start + SCORE_BLOCK_ROWS], query_bits)
+            hamming[start:start + len(block)] = POPCOUNT[block].sum(axis=1)
+        return hamming
+
+    def _probe(self, query_embedding: np.ndarray, mask: np.ndarray, k: int, nprobe: int) -> Optional[np.ndarray]:
+        """
+        Candidate rows: every match of a selective filter, or the live rows of
+        the IVF lists; None for a full scan (no IVF, or too few candidates)
+        """
+        selected = np.flatnonzero(mask)
+        if len(selected) <= len(mask) * SELECTIVE_FILTER_FRACTION:
+            return selected
+        if self._ivf is None:
+            return None
+        rows = self._ivf.probe(query_embedding, nprobe)
+        rows = rows[mask[rows]]
+        # Heavily filtered queries may have their matches outside the probed lists
+        return rows if len(rows) >= k else None
+
+    def _top_k(self, query_embedding: np.ndarray, mask: np.ndarray, k: int, nprobe: int = None) -> tuple:
+        """Row indices and squared distances of the k nearest live rows"""
+        rows = self._probe(query_embedding, mask, k, nprobe or self.ivf_nprobe)
+        if self.quantization == "none":
+            if rows is not None:
+                distances = self._distances(query_embedding, rows)
+                top = np.argpartition(distances, k - 1)[:k]
+                top = top[np.argsort(distances[top])]
+                return rows[top], distances[top]
+            distances = self._distances(query_embedding)
+            distances[~mask] = np.inf
+            top = np.argpartition(distances, k - 1)[:k]
+            top = top[np.argsort(distances[top])]
+            return top, distances[top]
+
+        # Shortlist on the codes, then re-rank the shortlist with the exact vectors
+        if rows is not None:
+            approximate = self._approximate_distances(query_embedding, rows)
+            n_candidates = min(k * self.rerank_multiplier, len(rows))
+            candidates = np.sort(rows[np.argpartition(approximate, n_candidates - 1)[:n_candidates]])
+        else:
+            approximate = self._approximate_distances(query_embedding)
+            approximate[~mask] = np.inf
+            n_candidates = min(k * self.rerank_multiplier, int(mask.sum()))
+            candidates = np.sort(np.argpartition(approximate, n_candidates - 1)[:n_candidates])
+        vectors = np.asarray(self._matrix[candidates], dtype=np.float32)
+        exact = np.maximum(
+            self._norms[candidates] - 2 * (vectors @ query_embedding) + query_embedding @ query_embedding, 0.0
+        )
+        order = np.argsort(exact)[:k]
+        return candidates[order], exact[order]
+
+    @_synchronized
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """Nearest rows to the query embedding, nprobe may be passed to override ivf_nprobe"""
+        self._materialize()
+        if self._matrix is None or query.query_embedding is None:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        mask = self._candidate_mask(query)
+        k = min(query.similarity_top_k, int(mask.sum()))
+        if k <= 0:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        top, distances = self._top_k(
+            np.asarray(query.query_embedding, dtype=np.float32), mask, k, kwargs.get("nprobe")
+        )
+
+        nodes = [self._to_node(self._rows[i]) for i in top]
+        return VectorStoreQueryResult(
+            nodes=nodes,
+            similarities=np.exp(-distances).tolist(),
+            ids=[node.node_id for node in nodes],
+        )
+
+    def persist(self, persist_path: Optional[str] = None, fs: Any = None) -> None:
+        """
+        Append the rows added and deleted since the last save to the log. The
+        whole store is rewritten instead when it has no base yet, its
+        clustering changed, or the log holds more rows than the base. A due
+        clustering is trained first, outside the lock (see train_ivf).
+        """
+        self.train_ivf()
+        self._persist(persist_path)
+
+    @_synchronized
+    def _persist(self, persist_path: Optional[str] = None) -> None:
+        if not self._dirty:
+            return
+        self._materialize()
+        persist_dir = persist_path or self.persist_dir
+        added = np.flatnonzero(self._alive[self._persisted_rows:]) + self._persisted_rows
+        # Re-added IDs replace their old row on load without being listed as deleted
+        readded = {self._rows[i]["id"] for i in added}
+        deleted = [node_id for node_id in self._deleted if node_id not in readded]
+        changes = len(added) + len(deleted)
+        if (self._rewrite or persist_dir != self.persist_dir
+                or self._log_rows + changes > max(self._base_rows, 1000)):
+            self._write_base(persist_dir)
+            return
+        if not changes:
+            self._dirty = False
+            return
+
+        record = {"generation": self._generation, "deleted": deleted, "rows": [self._rows[i] for i in added]}
+        if len(added):
+            # Embeddings first: rows the log doesn't list are ignored on load
+            with open(os.path.join(persist_dir, TAIL_EMBEDDINGS_FILE), 'ab') as f:
+                np.ascontiguousarray(self._matrix[added], dtype=self.dtype).tofile(f)
+        with open(os.path.join(persist_dir, LOG_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+        self._log_rows += changes
+        self._persisted_rows = len(self._rows)
+        self._deleted = []
+        self._dirty = False
+
+    def _write_base(self, persist_dir: str) -> None:
+        """Write the live rows as the new base files, dropping deleted ones and the log"""
+        os.makedirs(persist_dir, exist_ok=True)
+        live = np.flatnonzero(self._alive)
+        rows = [self._rows[i] for i in live]
+        if self._matrix is not None:
+            matrix = np.ascontiguousarray(self._matrix[live], dtype=self.dtype)
+            norms = np.ascontiguousarray(self._norms[live], dtype=np.float32)
+        else:
+            matrix = np.zeros((0, 0), dtype=self.dtype)
+            norms = np.zeros(0, dtype=np.float32)
+        arrays = [(EMBEDDINGS_FILE, matrix), (NORMS_FILE, norms)]
+        if self._codes is not None and len(rows):
+            if self.quantization == "int8":
+                arrays += [(INT8_CODES_FILE, self._codes[live]), (INT8_SCALES_FILE, self._scales[live])]
+            else:
+                arrays.append((BINARY_CODES_FILE, self._codes[live]))
+        ivf = self._ivf if len(rows) else None
+        if ivf is not None:
+            arrays += [(IVF_CENTROIDS_FILE, ivf.centroids), (IVF_ASSIGNMENTS_FILE, ivf.assignments[live])]
+
+        # Write everything to temporary files first, then swap them in
+        for name, array in arrays:
+            with open(os.path.join(persist_dir, name + ".tmp"), 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+        with open(os.path.join(persist_dir, METADATA_FILE + ".tmp"), 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": 1,
+                "dtype": self.dtype,
+                "ivf_trained_rows": ivf.trained_rows if ivf is not None else None,
+                # Log records name the base they extend, a log left behind by a crash is ignored
+                "generation": self._generation + 1,
+                "rows": rows,
+            }, f)
+        for name in [name for name, _ in arrays] + [METADATA_FILE]:
+            os.replace(os.path.join(persist_dir, name + ".tmp"), os.path.join(persist_dir, name))
+        for name in (LOG_FILE, TAIL_EMBEDDINGS_FILE):
+            if os.path.exists(os.path.join(persist_dir, name)):
+                os.remove(os.path.join(persist_dir, name))
+        # Codes left over from another quantization mode (or a dropped clustering) would be stale
+        written = {name for name, _ in arrays}
+        for name in (INT8_CODES_FILE, INT8_SCALES_FILE, BINARY_CODES_FILE, IVF_CENTROIDS_FILE, IVF_ASSIGNMENTS_FILE):
+            if name not in written and os.path.exists(os.path.join(persist_dir, name)):
+                os.remove(os.path.join(persist_dir, name))
+        if persist_dir != self.persist_dir:
+            return
+
+        # Map the new files instead of keeping the compacted copy in memory
+        self._load()
+        self._dirty = False
+
+    def compact(self) -> None:
+        """Rewrite the base files without deleted rows or a log, and retrain the clustering on the rows left"""
+        with self._lock:
+            self._rewrite = self._dirty = True
+            self._persist()
+        if self.train_ivf(force=True):
+            self._persist()
+
+    @_synchronized
+    def stats(self) -> dict:
+        self._materialize()
+        return {
+            "rows": self.count(),
+            "tombstones": int((~self._alive).sum()),
+            "dtype": self.dtype,
+            "quantization": self.quantization,
+            "matrix_bytes": int(self._matrix.nbytes) if self._matrix is not None else 0,
+            "log_rows": self._log_rows,
+            "code_bytes": sum(int(a.nbytes) for a in (self._codes, self._scales) if a is not None),
+            "index_type": self.index_type,
+            "ivf": self._ivf.stats() if self._ivf is not None else None,
+        }
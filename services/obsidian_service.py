@@ -1,8 +1,11 @@
 import re
+import asyncio
 from typing import List, Dict, Optional
 from pathlib import Path
 from datetime import datetime
 from core.config import config
+from services.async_runtime import runtime
+from core.startup import LazyService
 
 class ObsidianService:
     def __init__(self):
@@ -62,16 +65,31 @@ class ObsidianService:
         session_name: str = None,
         topics: List[str] = None,
         referenced_files: List[str] = None
-    ) -> str:
+    ) -> List[str]:
         """
-        Save session summary to daily organized folder structure with backlinks
+        Save session summary to daily organized folder structure with backlinks.
+        Returns the files written: the summary note first, then the backlinked
+        notes (empty if nothing was saved).
+        """
+        return runtime.run(self.asave_session_notes(session_summary, session_name, topics, referenced_files))
+    
+    async def asave_session_notes(
+        self,
+        session_summary: str,
+        session_name: str = None,
+        topics: List[str] = None,
+        referenced_files: List[str] = None
+    ) -> List[str]:
+        """
+        Async save_session_notes: file I/O runs in worker threads, and the
+        referenced files are located and backlinked concurrently
         """
         if not session_summary:
             print("❌ No session summary to save")
-            return ""
+            return []
         
         # Create daily folder
-        daily_folder = self.create_daily_folder()
+        daily_folder = await asyncio.to_thread(self.create_daily_folder)
         
         # Generate unique filename for this session
         filename = self.generate_session_filename(session_name)
@@ -106,61 +124,80 @@ tags: {tags_yaml}
         full_content = note_header + session_summary + referenced_section
         
         try:
-            with open(summary_path, 'w', encoding='utf-8') as f:
-                f.write(full_content)
+            await asyncio.to_thread(summary_path.write_text, full_content, encoding='utf-8')
+            
+            saved_files = [str(summary_path)]
             
             # Add backlinks to referenced files
             if referenced_files:
-                self._add_backlinks_to_referenced_files(referenced_files, filename, daily_folder.name)
+                backlinked = await self._aadd_backlinks_to_referenced_files(referenced_files, filename, daily_folder.name)
+                saved_files.extend(str(path) for path in backlinked)
             
             print(f"Saved session summary: {filename}")
             if referenced_files:
                 print(f"Added backlinks to {len(referenced_files)} files")
-            return str(summary_path)
+            return saved_files
             
         except Exception as e:
             print(f"Failed to save session summary: {e}")
-            return ""
+            return []
     
-    def _add_backlinks_to_referenced_files(self, referenced_files: List[str], session_filename: str, daily_folder_name: str):
-        """Add backlinks to the original files that were referenced"""
-        session_link = f"[[{config.OBSIDIAN_DAILY_NOTES_FOLDER}/{daily_folder_name}/{session_filename.replace('.md', '')}]]"
-        
-        for ref_filename in referenced_files:
-            try:
-                # Find the actual file path
-                ref_file_path = self._find_file_in_vault(ref_filename)
-                if not ref_file_path:
-                    print(f"Could not find file: {ref_filename}")
-                    continue
-                
-                # Read current content
-                with open(ref_file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Check if backlink already exists
-                if session_link in content:
-                    continue
-                
-                # Add backlink section
-                backlink_section = f"\n\n## References\n\n- {session_link}\n"
-                
-                # Check if "Learning Sessions" section already exists
-                if "## References" in content:
-                    # Add to existing section
-                    content = content.replace("## References", f"## References\n\n- {session_link}")
-                else:
-                    # Add new section at the end
-                    content += backlink_section
-                
-                # Write back to file
-                with open(ref_file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                
-                print(f"Added backlink to {ref_filename}")
-                
-            except Exception as e:
-                print(f"❌ Failed to add backlink to {ref_filename}: {e}")
+    def _session_link(self, session_filename: str, daily_folder_name: str) -> str:
+        return f"[[{config.OBSIDIAN_DAILY_NOTES_FOLDER}/{daily_folder_name}/{session_filename.replace('.md', '')}]]"
+    
+    async def _aadd_backlinks_to_referenced_files(self, referenced_files: List[str], session_filename: str, daily_folder_name: str) -> List[Path]:
+        """Add backlinks to the original files that were referenced, returns the files that were modified"""
+        session_link = self._session_link(session_filename, daily_folder_name)
+        paths = await asyncio.gather(*(
+            asyncio.to_thread(self._find_file_in_vault, ref_filename) for ref_filename in referenced_files
+        ))
+        
+        # Two references can resolve to the same note, update each file once
+        targets = {}
+        for ref_filename, ref_file_path in zip(referenced_files, paths):
+            if not ref_file_path:
+                print(f"Could not find file: {ref_filename}")
+            else:
+                targets.setdefault(ref_file_path, ref_filename)
+        
+        added = await asyncio.gather(*(
+            asyncio.to_thread(self._add_backlink, ref_file_path, ref_filename, session_link)
+            for ref_file_path, ref_filename in targets.items()
+        ))
+        return [path for path, was_added in zip(targets, added) if was_added]
+    
+    def _add_backlink(self, ref_file_path: Path, ref_filename: str, session_link: str) -> bool:
+        """Append the session link to one note's References section, returns whether the file changed"""
+        try:
+            # Read current content
+            with open(ref_file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            
+            # Check if backlink already exists
+            if session_link in content:
+                return False
+            
+            # Add backlink section
+            backlink_section = f"\n\n## References\n\n- {session_link}\n"
+            
+            # Check if "Learning Sessions" section already exists
+            if "## References" in content:
+                # Add to existing section
+                content = content.replace("## References", f"## References\n\n- {session_link}")
+            else:
+                # Add new section at the end
+                content += backlink_section
+            
+            # Write back to file
+            with open(ref_file_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            
+            print(f"Added backlink to {ref_filename}")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Failed to add backlink to {ref_filename}: {e}")
+            return False
 
     def _find_file_in_vault(self, filename: str) -> Optional[Path]:
         """Find a file in the Obsidian vault by filename"""
@@ -231,4 +268,4 @@ tags: {tags_yaml}
             "created": datetime.fromtimestamp(session_path.stat().st_ctime),
             "file_path": str(session_path)
         }
-obsidian_service = ObsidianService()
+obsidian_service = LazyService("obsidian_service", ObsidianService)
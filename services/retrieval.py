@@ -0,0 +1,69 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass
+class SearchHit:
+    """A retrieved chunk with the score from whichever retriever produced it"""
+    chunk_id: str
+    text: str
+    metadata: dict = field(default_factory=dict)
+    score: float = 0.0
+
+
+def reciprocal_rank_fusion(rankings: List[List[SearchHit]], k: int = 60) -> List[SearchHit]:
+    """
+    Merge ranked hit lists with reciprocal rank fusion.
+
+    Each hit scores sum(1 / (k + rank)) over the lists it appears in, so chunks
+    found by several retrievers rise to the top regardless of score scales.
+    """
+    fused: Dict[str, SearchHit] = {}
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            fused.setdefault(hit.chunk_id, hit)
+            scores[hit.chunk_id] = scores.get(hit.chunk_id, 0.0) + 1.0 / (k + rank)
+    return [
+        SearchHit(chunk_id, fused[chunk_id].text, fused[chunk_id].metadata, score)
+        for chunk_id, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+
+# Question scaffolding and filler words dropped from the keyword variant of a query
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "could", "did", "do", "does",
+    "explain", "for", "from", "give", "how", "i", "in", "is", "it", "me", "my", "of", "on",
+    "or", "please", "should", "tell", "that", "the", "this", "to", "was", "what", "when",
+    "where", "which", "who", "why", "will", "with", "would", "you", "about", "notes",
+}
+
+# Separators between the sub-topics of a compound question ("X vs Y", "X and Y")
+COMPOUND_SPLIT = re.compile(r"\s*(?:,|;|\bvs\.?|\bversus\b|\band\b|\bor\b|\bcompared to\b)\s*", re.IGNORECASE)
+
+
+def _keywords(text: str) -> str:
+    return " ".join(word for word in re.findall(r"\w+", text) if word.lower() not in STOPWORDS)
+
+
+def expand_query(query: str, max_variants: int = 3) -> List[str]:
+    """
+    Cheap query variants for recall: the query itself, its keywords without
+    question scaffolding, and the keywords of each side of a compound question.
+    No model is called, so the variants can be retrieved in parallel with the
+    original.
+    """
+    variants = [query, _keywords(query)]
+    parts = [_keywords(part) for part in COMPOUND_SPLIT.split(query)]
+    if len([part for part in parts if part]) > 1:
+        variants.extend(parts)
+
+    unique = []
+    seen = set()
+    for variant in variants:
+        key = " ".join(variant.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(variant.strip())
+    return unique[:max_variants]
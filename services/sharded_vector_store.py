@@ -0,0 +1,269 @@
+import os
+import re
+import zlib
+import threading
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+
+from services.note_metadata import FOLDER_KEY_PREFIX, normalize_folder
+
+SHARDING_MODES = ("none", "folder", "hash")
+
+# Shard of the notes at the top of the vault in folder mode
+ROOT_SHARD = "root"
+
+
+def shard_name(top_folder: str) -> str:
+    """A top-level folder as a shard name that is safe in collection and directory names"""
+    return re.sub(r"[^a-z0-9_-]+", "-", top_folder.lower()).strip("-_") or ROOT_SHARD
+
+
+def shard_for_path(path: str, vault_root: Optional[str], sharding: str, hash_buckets: int = 8) -> str:
+    """
+    The shard a vault file belongs to: its top-level folder in folder mode,
+    or a stable hash of its vault-relative path in hash mode.
+    """
+    relative = normalize_folder(os.path.relpath(path, vault_root) if vault_root else path)
+    if sharding == "hash":
+        return f"h{zlib.crc32(relative.encode('utf-8')) % hash_buckets:02d}"
+    parts = relative.split("/")
+    return shard_name(parts[0]) if len(parts) > 1 else ROOT_SHARD
+
+
+def store_count(store: BasePydanticVectorStore) -> int:
+    """Chunks in a single store, Chroma (whose client is the collection) or numpy"""
+    if hasattr(store, "count"):
+        return store.count()
+    return store.client.count()
+
+
+def store_dimension(store: BasePydanticVectorStore) -> Optional[int]:
+    """Embedding dimension of the stored vectors, read from the store itself (None if it is empty)"""
+    if hasattr(store, "dimension"):
+        return store.dimension()
+    embeddings = store.client.get(limit=1, include=["embeddings"])["embeddings"]
+    return len(embeddings[0]) if embeddings is not None and len(embeddings) else None
+
+
+def store_node_ids(store: BasePydanticVectorStore) -> List[str]:
+    if hasattr(store, "node_ids"):
+        return store.node_ids()
+    return store.client.get(include=[])["ids"]
+
+
+def store_embeddings(store: BasePydanticVectorStore, node_ids: List[str]) -> np.ndarray:
+    """Stored embeddings of the given nodes, one float32 row per ID in order"""
+    if hasattr(store, "get_embeddings"):
+        return store.get_embeddings(node_ids)
+    records = store.client.get(ids=list(node_ids), include=["embeddings"])
+    by_id = dict(zip(records["ids"], records["embeddings"]))
+    return np.asarray([by_id[node_id] for node_id in node_ids], dtype=np.float32)
+
+
+class ShardedVectorStore(BasePydanticVectorStore):
+    """
+    Vector store split into one store per shard (top-level folder or hash bucket).
+
+    Nodes are routed to the shard of their file, and deletes only touch the
+    shards holding the deleted IDs, so an edit re-writes one small store
+    instead of the whole index. Queries fan out to every shard concurrently
+    (or, in folder mode, only to the shard a folder filter points at) and the
+    per-shard top-k lists are merged by score. Scores are comparable across
+    shards because every shard uses the same backend and distance.
+    """
+
+    stores_text: bool = True
+    is_embedding_query: bool = True
+    sharding: str = "folder"
+
+    _shards: Dict[str, BasePydanticVectorStore] = PrivateAttr(default_factory=dict)
+    _shard_of_node: Optional[Dict[str, str]] = PrivateAttr(default=None)
+    _route: Callable[[BaseNode], str] = PrivateAttr()
+    _open_shard: Callable[[str], BasePydanticVectorStore] = PrivateAttr()
+    _executor: Optional[Executor] = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.RLock)
+
+    def __init__(
+        self,
+        shards: Dict[str, BasePydanticVectorStore],
+        route: Callable[[BaseNode], str],
+        open_shard: Callable[[str], BasePydanticVectorStore],
+        sharding: str = "folder",
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(sharding=sharding, **kwargs)
+        self._shards = dict(shards)
+        self._route = route
+        self._open_shard = open_shard
+        self._executor = executor
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ShardedVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return self
+
+    @property
+    def shards(self) -> Dict[str, BasePydanticVectorStore]:
+        with self._lock:
+            return dict(self._shards)
+
+    def _shard(self, name: str) -> BasePydanticVectorStore:
+        with self._lock:
+            if name not in self._shards:
+                self._shards[name] = self._open_shard(name)
+            return self._shards[name]
+
+    def _locate(self) -> Dict[str, str]:
+        """Node ID -> shard, listed from the shards on first use and kept up to date afterwards"""
+        with self._lock:
+            if self._shard_of_node is None:
+                self._shard_of_node = {
+                    node_id: name for name, store in self._shards.items() for node_id in store_node_ids(store)
+                }
+            return self._shard_of_node
+
+    def count(self) -> int:
+        return sum(store_count(store) for store in self.shards.values())
+
+    def dimension(self) -> Optional[int]:
+        return next((d for d in (store_dimension(store) for store in self.shards.values()) if d), None)
+
+    def node_ids(self) -> List[str]:
+        return list(self._locate())
+
+    def get_embeddings(self, node_ids: List[str]) -> np.ndarray:
+        located = self._locate()
+        by_shard: Dict[str, List[int]] = {}
+        for i, node_id in enumerate(node_ids):
+            by_shard.setdefault(located[node_id], []).append(i)
+        embeddings = None
+        for name, positions in by_shard.items():
+            shard_embeddings = store_embeddings(self._shards[name], [node_ids[i] for i in positions])
+            if embeddings is None:
+                embeddings = np.empty((len(node_ids), shard_embeddings.shape[1]), dtype=np.float32)
+            embeddings[positions] = shard_embeddings
+        return embeddings if embeddings is not None else np.zeros((0, 0), dtype=np.float32)
+
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        by_shard: Dict[str, List[BaseNode]] = {}
+        for node in nodes:
+            by_shard.setdefault(self._route(node), []).append(node)
+        with self._lock:
+            located = self._locate()
+            for name, shard_nodes in by_shard.items():
+                self._shard(name).add(shard_nodes, **add_kwargs)
+                for node in shard_nodes:
+                    located[node.node_id] = name
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        for store in self.shards.values():
+            store.delete(ref_doc_id, **delete_kwargs)
+        with self._lock:
+            self._shard_of_node = None
+
+    def delete_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Optional[MetadataFilters] = None,
+        **delete_kwargs: Any,
+    ) -> None:
+        if node_ids is None or filters is not None:
+            for store in self.shards.values():
+                store.delete_nodes(node_ids=node_ids, filters=filters, **delete_kwargs)
+            with self._lock:
+                self._shard_of_node = None
+            return
+        with self._lock:
+            located = self._locate()
+            by_shard: Dict[str, List[str]] = {}
+            for node_id in node_ids:
+                name = located.pop(node_id, None)
+                if name is not None:
+                    by_shard.setdefault(name, []).append(node_id)
+            for name, shard_ids in by_shard.items():
+                self._shards[name].delete_nodes(node_ids=shard_ids, **delete_kwargs)
+
+    def clear(self) -> None:
+        for store in self.shards.values():
+            store.clear()
+        with self._lock:
+            self._shard_of_node = None
+
+    def get_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Optional[MetadataFilters] = None,
+    ) -> List[BaseNode]:
+        return [
+            node for store in self.shards.values()
+            for node in store.get_nodes(node_ids=node_ids, filters=filters)
+        ]
+
+    def _query_shards(self, filters: Optional[MetadataFilters]) -> Dict[str, BasePydanticVectorStore]:
+        """Shards that can hold matches; a folder filter in folder mode selects a single shard"""
+        shards = self.shards
+        if self.sharding != "folder" or filters is None or filters.condition == FilterCondition.OR:
+            return shards
+        for f in filters.filters:
+            if (
+                isinstance(f, MetadataFilter)
+                and f.key.startswith(FOLDER_KEY_PREFIX)
+                and f.operator == FilterOperator.EQ
+                and isinstance(f.value, str)
+            ):
+                name = shard_name(f.value.split("/")[0])
+                return {name: shards[name]} if name in shards else {}
+        return shards
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        shards = list(self._query_shards(query.filters).values())
+        if not shards:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+        if self._executor is None or len(shards) == 1:
+            results = [store.query(query, **kwargs) for store in shards]
+        else:
+            results = list(self._executor.map(lambda store: store.query(query, **kwargs), shards))
+
+        # Each shard returned its own top-k, the overall top-k is among them
+        merged = [
+            (similarity, node)
+            for result in results
+            for node, similarity in zip(result.nodes or [], result.similarities or [])
+        ]
+        merged.sort(key=lambda pair: pair[0], reverse=True)
+        merged = merged[:query.similarity_top_k]
+        return VectorStoreQueryResult(
+            nodes=[node for _, node in merged],
+            similarities=[similarity for similarity, _ in merged],
+            ids=[node.node_id for _, node in merged],
+        )
+
+    def persist(self, persist_path: Optional[str] = None, fs: Any = None) -> None:
+        """Persist every shard; unchanged numpy shards skip the write"""
+        for store in self.shards.values():
+            store.persist(persist_path=None)
+
+    def stats(self) -> dict:
+        shards = {}
+        for name, store in sorted(self.shards.items()):
+            shard_stats = store.stats() if hasattr(store, "stats") else {}
+            shards[name] = {"chunks": store_count(store), **shard_stats}
+        return {"sharding": self.sharding, "shard_count": len(shards), "shards": shards}
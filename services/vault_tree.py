@@ -0,0 +1,181 @@
+import os
+import json
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def _join(directory: str, name: str) -> str:
+    return f"{directory}/{name}" if directory else name
+
+
+def _parent(relative: str) -> str:
+    return relative.rsplit("/", 1)[0] if "/" in relative else ""
+
+
+class VaultTree:
+    """
+    Merkle tree of the vault's markdown files, persisted next to the index.
+
+    Every folder (keyed by its vault-relative path, "" for the root) records
+    the (mtime_ns, size) of its notes and its subfolders, and a hash over
+    both that covers the subfolders' hashes. Comparing the tree of the last
+    index update with a fresh scan descends only into folders whose hash
+    differs, so an unchanged vault is recognised from the root hash and an
+    edit is traced to the folders and files it touched. Hidden folders and
+    files are skipped, like the indexer's glob.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None, root: Optional[str] = None):
+        self.path = path
+        self.root = root
+        self.dirs: Dict[str, dict] = {}
+        self.dirty = False
+        if path:
+            self.load()
+
+    @classmethod
+    def scan(cls, root: str) -> "VaultTree":
+        """Stat every note under root and hash the folders bottom-up"""
+        tree = cls(root=root)
+        if os.path.isdir(root):
+            tree._scan_dir(root, "")
+        tree.dirty = True
+        return tree
+
+    def _scan_dir(self, directory: str, relative: str) -> str:
+        files, subdirs = {}, []
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                elif entry.name.endswith(".md"):
+                    stat = entry.stat()
+                    files[entry.name] = [stat.st_mtime_ns, stat.st_size]
+            except OSError:
+                continue
+        subdirs.sort()
+        for name in subdirs:
+            self._scan_dir(os.path.join(directory, name), _join(relative, name))
+        self.dirs[relative] = {"files": files, "subdirs": subdirs}
+        return self._rehash(relative)
+
+    def _rehash(self, relative: str) -> str:
+        node = self.dirs[relative]
+        content = json.dumps(
+            [sorted(node["files"].items()), [(name, self.dirs[_join(relative, name)]["hash"]) for name in node["subdirs"]]]
+        )
+        node["hash"] = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        return node["hash"]
+
+    @property
+    def root_hash(self) -> Optional[str]:
+        node = self.dirs.get("")
+        return node["hash"] if node else None
+
+    def relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def absolute(self, relative: str) -> str:
+        return os.path.normpath(os.path.join(self.root, *relative.split("/")))
+
+    def paths(self) -> List[str]:
+        """Absolute paths of every note in the tree"""
+        return [self.absolute(_join(directory, name)) for directory, node in self.dirs.items() for name in node["files"]]
+
+    def diff(self, current: "VaultTree") -> Tuple[List[str], List[str]]:
+        """
+        Folders whose hash changed and the notes in them that were added,
+        edited or removed between this tree and current, as absolute paths.
+        Subtrees with equal hashes are not visited.
+        """
+        changed_dirs, changed_files = [], []
+        stack = [""]
+        while stack:
+            relative = stack.pop()
+            old, new = self.dirs.get(relative), current.dirs.get(relative)
+            if old and new and old["hash"] == new["hash"]:
+                continue
+            changed_dirs.append(current.absolute(relative))
+            old_files = old["files"] if old else {}
+            new_files = new["files"] if new else {}
+            for name in sorted(old_files.keys() | new_files.keys()):
+                if old_files.get(name) != new_files.get(name):
+                    changed_files.append(current.absolute(_join(relative, name)))
+            subdirs = set(old["subdirs"] if old else []) | set(new["subdirs"] if new else [])
+            stack.extend(_join(relative, name) for name in sorted(subdirs, reverse=True))
+        return changed_dirs, changed_files
+
+    def forget(self, paths: Iterable[str]) -> None:
+        """
+        Drop notes from the tree (e.g. re-indexed outside a full update), so
+        the next diff reports them as changed and they are checked again.
+        """
+        touched = set()
+        for path in paths:
+            directory, _, name = self.relative(path).rpartition("/")
+            node = self.dirs.get(directory)
+            if node and node["files"].pop(name, None) is not None:
+                touched.add(directory)
+        # Re-hash from the deepest folder up so parents see their children's new hashes
+        pending = set(touched)
+        for directory in list(touched):
+            while directory:
+                directory = _parent(directory)
+                pending.add(directory)
+        for directory in sorted(pending, key=lambda d: d.count("/") + bool(d), reverse=True):
+            if directory in self.dirs:
+                self._rehash(directory)
+        if touched:
+            self.dirty = True
+
+    def adopt(self, other: "VaultTree") -> None:
+        """Take over another tree's folders, e.g. the scan an update was based on"""
+        self.root = other.root
+        self.dirs = other.dirs
+        self.dirty = True
+
+    def clear(self) -> None:
+        self.dirs = {}
+        self.dirty = True
+
+    def load(self) -> None:
+        """Load the tree from disk (starts empty if missing or unreadable)"""
+        self.dirs = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("version") == self.VERSION:
+                self.root = data.get("root")
+                self.dirs = data.get("dirs", {})
+        except Exception as e:
+            print(f"Could not read vault tree, checking every file: {e}")
+
+    def save(self) -> None:
+        """Write the tree atomically, skipped when nothing changed"""
+        if not self.path or not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.VERSION, "root": self.root, "dirs": self.dirs}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def stats(self) -> dict:
+        return {
+            "folders": len(self.dirs),
+            "files": sum(len(node["files"]) for node in self.dirs.values()),
+            "root_hash": self.root_hash,
+        }
@@ -0,0 +1,302 @@
+import os
+import time
+import queue
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from typing import Callable, Dict, List, Optional
+
+# inotify event flags (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MODIFY
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _is_watched_path(root: str, path: str) -> bool:
+    """Markdown files outside hidden folders (.obsidian, .trash), matching what the indexer globs"""
+    parts = os.path.relpath(path, root).split(os.sep)
+    return path.endswith(".md") and not any(part.startswith(".") for part in parts)
+
+
+class _InotifyBackend:
+    """Recursive directory watch using Linux inotify through libc"""
+
+    def __init__(self, root: str):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+        self.overflowed = False
+        for directory, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            self._add_watch(directory)
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self.watches[wd] = directory
+
+    def poll(self, timeout: float) -> List[str]:
+        """Wait up to timeout seconds and return paths that changed"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changed = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, the caller has to rescan
+                self.overflowed = True
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                self.watches.pop(wd, None)
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not name.startswith("."):
+                    # Watch new folders and pick up files created in them before the watch existed
+                    for sub_directory, dirnames, filenames in os.walk(path):
+                        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                        self._add_watch(sub_directory)
+                        changed.extend(os.path.join(sub_directory, f) for f in filenames)
+                elif mask & (IN_MOVED_FROM | IN_DELETE):
+                    # Files under a moved or deleted folder don't get their own events
+                    self.overflowed = True
+                continue
+            changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    """Portable fallback that compares file mtimes and sizes on an interval"""
+
+    def __init__(self, root: str, interval: float):
+        self.root = root
+        self.interval = interval
+        self.overflowed = False
+        self.snapshot = self._scan()
+        self.last_scan = time.monotonic()
+
+    def _scan(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                if filename.endswith(".md"):
+                    path = os.path.join(directory, filename)
+                    try:
+                        stat = os.stat(path)
+                        snapshot[path] = (stat.st_mtime, stat.st_size)
+                    except OSError:
+                        continue
+        return snapshot
+
+    def poll(self, timeout: float) -> List[str]:
+        time.sleep(timeout)
+        if time.monotonic() - self.last_scan < self.interval:
+            return []
+        current = self._scan()
+        self.last_scan = time.monotonic()
+        changed = [path for path, info in current.items() if self.snapshot.get(path) != info]
+        changed.extend(path for path in self.snapshot if path not in current)
+        self.snapshot = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class VaultWatcher:
+    """
+    Background watcher that keeps the index in step with edits made in Obsidian.
+
+    Uses inotify on Linux and falls back to polling elsewhere. Bursts of events
+    are debounced: changed paths are collected until the vault has been quiet
+    for debounce_seconds (or max_delay_seconds have passed), then handed to
+    on_change on a separate worker thread so chat is never blocked.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        on_change: Callable[[List[str]], object],
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 30.0,
+        poll_interval: float = 5.0,
+        use_inotify: bool = True,
+        on_rescan: Optional[Callable[[], object]] = None,
+    ):
+        self.root = root
+        self.on_change = on_change
+        self.on_rescan = on_rescan
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend_name = None
+
+        # path -> time of the first event not yet handed to the indexer
+        self._pending: Dict[str, float] = {}
+        self._last_event = 0.0
+        self._batches: "queue.Queue[tuple]" = queue.Queue()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._backend = None
+
+        self.events = 0
+        self.batches_indexed = 0
+        self.files_indexed = 0
+        self.errors = 0
+        self.last_index_seconds = 0.0
+        self.last_lag_seconds = 0.0
+        self._in_progress_since: Optional[float] = None
+
+    def _make_backend(self):
+        if self.use_inotify:
+            try:
+                backend = _InotifyBackend(self.root)
+                self.backend_name = "inotify"
+                return backend
+            except Exception as e:
+                print(f"inotify unavailable ({e}), polling the vault instead")
+        self.backend_name = "polling"
+        return _PollingBackend(self.root, self.poll_interval)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        self._backend = self._make_backend()
+        self._threads = [
+            threading.Thread(target=self._watch_loop, name="vault-watcher", daemon=True),
+            threading.Thread(target=self._index_loop, name="vault-indexer", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._batches.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        if self._backend:
+            self._backend.close()
+            self._backend = None
+
+    def _watch_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                changed = self._backend.poll(timeout=0.5)
+            except Exception as e:
+                print(f"Vault watcher error: {e}")
+                self.errors += 1
+                time.sleep(1)
+                continue
+
+            now = time.monotonic()
+            with self._lock:
+                for path in changed:
+                    if _is_watched_path(self.root, path):
+                        self._pending.setdefault(os.path.normpath(path), now)
+                        self._last_event = now
+                        self.events += 1
+
+            if self._backend.overflowed:
+                self._backend.overflowed = False
+                self._batches.put(("rescan", [], now))
+
+            self._flush_if_quiet(now)
+
+    def _flush_if_quiet(self, now: float) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            oldest = min(self._pending.values())
+            quiet = now - self._last_event >= self.debounce_seconds
+            overdue = now - oldest >= self.max_delay_seconds
+            if not (quiet or overdue):
+                return
+            paths = list(self._pending)
+            self._pending = {}
+        self._batches.put(("upsert", paths, oldest))
+
+    def _index_loop(self) -> None:
+        while not self._stop.is_set():
+            item = self._batches.get()
+            if item is None:
+                break
+            kind, paths, first_event = item
+            start = time.monotonic()
+            self._in_progress_since = first_event
+            try:
+                if kind == "rescan":
+                    if self.on_rescan:
+                        self.on_rescan()
+                else:
+                    self.on_change(paths)
+                    self.files_indexed += len(paths)
+                self.batches_indexed += 1
+            except Exception as e:
+                print(f"Vault watcher indexing error: {e}")
+                self.errors += 1
+            finally:
+                end = time.monotonic()
+                self.last_index_seconds = end - start
+                self.last_lag_seconds = end - first_event
+                self._in_progress_since = None
+
+    def stats(self) -> dict:
+        """Queue depth and how far behind the vault the index currently is"""
+        now = time.monotonic()
+        with self._lock:
+            pending_files = len(self._pending)
+            oldest = min(self._pending.values()) if self._pending else None
+        candidates = [t for t in (oldest, self._in_progress_since) if t is not None]
+        return {
+            "backend": self.backend_name,
+            "running": bool(self._threads),
+            "pending_files": pending_files,
+            "queued_batches": self._batches.qsize(),
+            "lag_seconds": round(now - min(candidates), 2) if candidates else 0.0,
+            "last_lag_seconds": round(self.last_lag_seconds, 2),
+            "last_index_seconds": round(self.last_index_seconds, 2),
+            "events": self.events,
+            "batches_indexed": self.batches_indexed,
+            "files_indexed": self.files_indexed,
+            "errors": self.errors,
+        }
@@ -1,25 +1,117 @@
 import os
 import glob
-from typing import List 
+import time
+import shutil
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
 from dotenv import load_dotenv
+import numpy as np
 
-from llama_index.core import VectorStoreIndex, Document, StorageContext
-from llama_index.embeddings.voyageai import VoyageEmbedding
-from llama_index.vector_stores.chroma import ChromaVectorStore
+from llama_index.core import VectorStoreIndex, StorageContext
 from llama_index.core.node_parser import SimpleNodeParser
-import chromadb
+from llama_index.core.schema import MetadataMode, NodeRelationship, QueryBundle, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.types import (
+    FilterCondition, FilterOperator, MetadataFilter, MetadataFilters, VectorStoreQuery
+)
 
 from core.config import config
+from core.startup import LazyService, startup_timer
+from services.index_manifest import IndexManifest
+from services.embedding_cache import EmbeddingCache, QueryEmbeddingLRU
+from services.cached_embedding import CachedEmbedding
+from services.embedding_providers import (
+    batch_query_embedder, create_embed_model, embedding_namespace, is_local_provider
+)
+from services.embedding_pipeline import EmbeddingPipeline
+from services.ingestion import VaultIngestor, batched, note_outline
+from services.lexical_index import LOG_SUFFIX, BM25Index
+from services.retrieval import SearchHit, expand_query, reciprocal_rank_fusion
+from services.vault_watcher import VaultWatcher
+from services.vault_tree import VaultTree
+from services.note_index import NOTE_VECTOR_MODES, RETRIEVAL_STRATEGIES, NoteIndex
+from services.numpy_vector_store import NumpyVectorStore, metadata_matches
+from services.async_runtime import runtime
+from services.dedup import ChunkDeduplicator
+from services.context_packer import pack_context
+from services.note_metadata import SearchFilters
+from services.index_versions import IndexVersions
+from services.sharded_vector_store import (
+    SHARDING_MODES, ShardedVectorStore, shard_for_path, store_count, store_dimension, store_embeddings,
+    store_node_ids
+)
+from services.index_maintenance import IdleScheduler, directory_size
+from services.index_snapshot import (
+    SNAPSHOT_FORMAT, incompatibilities, read_header, read_snapshot, to_absolute, to_relative, write_snapshot
+)
 
 load_dotenv()
 
+
+@dataclass
+class IndexState:
+    """One version of the index: its vector store and the files that describe it, swapped as a unit"""
+    version: int
+    vector_store: object
+    obsidian_index: VectorStoreIndex
+    manifest: IndexManifest
+    lexical_index: BM25Index
+    dedup_index: Optional[ChunkDeduplicator]
+    vault_tree: VaultTree
+    note_index: Optional[NoteIndex]
+
+
 class VectorStoreService:
-    def __init__(self):
+    def __init__(self, build_missing: bool = True):
 
-        # Initialize Voyage AI embeddings with voyage-3-lite
-        self.embed_model = VoyageEmbedding(
-            voyage_api_key=config.VOYAGE_API_KEY,
-            model_name=config.EMBED_MODEL
+        # Embedding model from the configured provider (Voyage AI, or a local one)
+        self.embed_model = create_embed_model()
+        
+        # Collections are named after the model, so vectors of different models never mix
+        self.embedding_namespace = embedding_namespace(self.embed_model)
+        
+        # Scores depend on the model, local models need a lower cut-off
+        self.similarity_threshold = (
+            config.LOCAL_SIMILARITY_THRESHOLD if is_local_provider() else config.VECTOR_SIMILARITY_THRESHOLD
+        )
+        
+        # Several queries are embedded in a single request
+        self._embed_query_batch = batch_query_embedder(self.embed_model)
+        
+        # Batched, concurrent, rate-limited embedding for index builds (local models aren't rate limited)
+        local = is_local_provider()
+        self.embedding_pipeline = EmbeddingPipeline(
+            embed_fn=self.embed_model.get_text_embedding_batch,
+            batch_tokens=config.EMBED_BATCH_TOKENS,
+            batch_max_items=config.EMBED_BATCH_MAX_ITEMS,
+            max_concurrency=config.EMBED_MAX_CONCURRENCY,
+            requests_per_minute=None if local else config.EMBED_REQUESTS_PER_MINUTE,
+            tokens_per_minute=None if local else config.EMBED_TOKENS_PER_MINUTE,
+            max_retries=config.EMBED_MAX_RETRIES
+        )
+        
+        # Serve previously embedded chunks and queries from disk
+        self.embedding_cache = None
+        if config.EMBEDDING_CACHE_ENABLED:
+            with startup_timer.phase("embedding cache"):
+                self.embedding_cache = EmbeddingCache(
+                    os.path.join(config.CHROMA_PERSIST_DIR, config.EMBEDDING_CACHE_FILE),
+                    max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES
+                )
+            self.embed_model = CachedEmbedding(
+                self.embed_model,
+                self.embedding_cache,
+                batch_embed=self.embedding_pipeline.embed,
+                batch_query_embed=self._embed_query_batch
+            )
+        
+        # Recent query embeddings, so repeated questions skip the embedding call
+        self.query_cache = QueryEmbeddingLRU(
+            max_entries=config.QUERY_CACHE_SIZE,
+            ttl_seconds=config.QUERY_CACHE_TTL_SECONDS
         )
         
         self.obsidian_path = config.OBSIDIAN_VAULT_PATH
@@ -30,168 +122,1334 @@ class VectorStoreService:
             chunk_overlap=config.NODE_CHUNK_OVERLAP
         )
         
-        # Initialize ChromaDB client
-        self.chroma_client = chromadb.PersistentClient(path="./chroma_db")
+        # Streaming read -> parse -> chunk stage feeding the embedding pipeline
+        self.ingestor = VaultIngestor(
+            node_parser=self.node_parser,
+            chunk_size=config.NODE_CHUNK_SIZE,
+            chunk_overlap=config.NODE_CHUNK_OVERLAP,
+            read_workers=config.INGEST_READ_WORKERS,
+            chunk_workers=config.INGEST_CHUNK_WORKERS,
+            queue_size=config.INGEST_QUEUE_SIZE,
+            process_min_files=config.INGEST_PROCESS_MIN_FILES,
+            vault_root=self.obsidian_path
+        )
+        
+        # Initialize ChromaDB client (only needed by the Chroma backend)
+        self.chroma_client = None
+        if config.VECTOR_BACKEND == "chroma":
+            self._get_chroma_client()
+        
+        # Which index version searches are served from, swapped by full rebuilds
+        self.index_versions = IndexVersions(
+            os.path.join(config.CHROMA_PERSIST_DIR, config.INDEX_VERSIONS_FILE)
+        )
+        
+        # Query embeddings run here so a slow embedding API can be timed out
+        self._query_executor = ThreadPoolExecutor(max_workers=2)
+        
+        # Fans out the lookups of search_obsidian_many
+        self._search_executor = ThreadPoolExecutor(max_workers=config.SEARCH_MAX_WORKERS)
+        
+        # Optionally one collection per top-level folder or hash bucket, searched concurrently
+        if config.SHARDING not in SHARDING_MODES:
+            raise ValueError(f"Unknown sharding {config.SHARDING!r}, expected one of {SHARDING_MODES}")
+        self._shard_executor = None
+        if config.SHARDING != "none":
+            self._shard_executor = ThreadPoolExecutor(max_workers=config.SHARD_SEARCH_WORKERS)
         
-        # Initialize indexes (will be None if paths don't exist)
-        self.obsidian_index = None
+        # Optionally a note-level index that narrows dense search to the closest notes first
+        if config.RETRIEVAL_STRATEGY not in RETRIEVAL_STRATEGIES:
+            raise ValueError(f"Unknown retrieval strategy {config.RETRIEVAL_STRATEGY!r}, expected one of {RETRIEVAL_STRATEGIES}")
+        if config.NOTE_VECTOR not in NOTE_VECTOR_MODES:
+            raise ValueError(f"Unknown note vector {config.NOTE_VECTOR!r}, expected one of {NOTE_VECTOR_MODES}")
         
-        # Try to load existing index or build new one
-        self._initialize_obsidian_index()
+        # Serializes index updates (builds, upserts and the vault watcher)
+        self._index_lock = threading.RLock()
+        self.watcher = None
+        
+        # Index maintenance, run on request or in the background once searches and updates go quiet
+        self._last_activity = time.monotonic()
+        self.maintenance = None
+        self.last_maintenance: Optional[dict] = None
+        
+        # Chunks embedded, reused and removed by the last index update
+        self.last_update: Optional[dict] = None
+        self.last_vault_check_ms: Optional[float] = None
+        
+        # Active index version (None until one is loaded or built)
+        self.state: Optional[IndexState] = None
+        
+        # Try to load existing index or build new one (unless it's about to be imported)
+        with startup_timer.phase("index load"):
+            self._initialize_obsidian_index(build_missing)
+    
+    # The active version's parts; searches read these, index updates take a state explicitly
+    @property
+    def vector_store(self):
+        return self.state.vector_store if self.state else None
+    
+    @property
+    def obsidian_index(self) -> Optional[VectorStoreIndex]:
+        return self.state.obsidian_index if self.state else None
     
-    def _initialize_obsidian_index(self):
+    @property
+    def manifest(self) -> Optional[IndexManifest]:
+        return self.state.manifest if self.state else None
+    
+    @property
+    def lexical_index(self) -> Optional[BM25Index]:
+        return self.state.lexical_index if self.state else None
+    
+    @property
+    def dedup_index(self) -> Optional[ChunkDeduplicator]:
+        return self.state.dedup_index if self.state else None
+    
+    def _initialize_obsidian_index(self, build_missing: bool = True):
         """Initialize Obsidian index - try to load existing or build new"""
         try:
-            # Try to load existing collection
-            collection = self.chroma_client.get_collection(config.CHROMA_COLLECTION_NAME)
-            vector_store = ChromaVectorStore(chroma_collection=collection)
-            
-            # Create StorageContext from existing vector store
-            storage_context = StorageContext.from_defaults(vector_store=vector_store)
-            
-            # Create index from existing vector store with StorageContext
-            self.obsidian_index = VectorStoreIndex.from_vector_store(
-                vector_store=vector_store,
-                storage_context=storage_context,
-                embed_model=self.embed_model
-            )
+            # Try to load the active index version
+            state = self._open_index_state(self.index_versions.active_version, create=False)
+            if state.manifest.store != self._store_id(state.version):
+                raise ValueError("index manifest describes a different vector store")
+            if state.version == 0 and config.EMBEDDING_PROVIDER != "voyage":
+                raise ValueError("the unversioned index was embedded with Voyage")
+            if not len(state.lexical_index) and state.manifest.chunk_count():
+                self._backfill_lexical_index(state)
+            if state.note_index is not None and not len(state.note_index) and state.manifest.chunk_count():
+                self._backfill_note_index(state)
+            self.state = state
             
         except Exception as e:
-            if self.build_obsidian_index():
+            if not build_missing:
+                pass  # Left to the caller, e.g. a snapshot import
+            elif self.build_obsidian_index(full_rebuild=True):
                 pass  # Index built successfully
             else:
                 pass  # Search will be unavailable
     
-    def _load_obsidian_documents(self) -> List[Document]:
-        """Load all markdown files from Obsidian vault"""
+    def _list_vault_files(self) -> List[str]:
+        """List all markdown files in the Obsidian vault"""
         if not self.obsidian_path or not os.path.exists(self.obsidian_path):
             return []
+        return [
+            os.path.normpath(md_file)
+            for md_file in glob.iglob(f"{self.obsidian_path}/**/*.md", recursive=True)
+        ]
+    
+    def _collection_name(self, version: int) -> str:
+        """Vector collection of an index version and embedding model, version 0 keeps the unversioned name"""
+        if version == 0:
+            return config.CHROMA_COLLECTION_NAME
+        return f"{config.CHROMA_COLLECTION_NAME}_{self.embedding_namespace}_v{version}"
+    
+    def _store_id(self, version: int) -> str:
+        """Identifies a version's vector store in its manifest and the version pointer"""
+        store_id = f"{config.VECTOR_BACKEND}:{self._collection_name(version)}"
+        if config.SHARDING == "folder":
+            return f"{store_id}/folder"
+        if config.SHARDING == "hash":
+            return f"{store_id}/hash{config.SHARD_HASH_BUCKETS}"
+        return store_id
+    
+    def _state_dir(self, version: int) -> str:
+        """Where a version keeps its manifest, lexical and dedup indexes"""
+        if version == 0:
+            return config.CHROMA_PERSIST_DIR
+        return os.path.join(config.CHROMA_PERSIST_DIR, f"index_v{version}")
+    
+    def _numpy_store_dir(self, collection: str) -> str:
+        return os.path.join(config.CHROMA_PERSIST_DIR, "numpy", collection)
+    
+    def _open_vector_store(self, collection: str, create: bool):
+        """Open a collection with the configured vector store backend, raises if it doesn't exist and create is False"""
+        if config.VECTOR_BACKEND == "numpy":
+            store_dir = self._numpy_store_dir(collection)
+            if not create and not NumpyVectorStore.exists(store_dir):
+                raise FileNotFoundError(store_dir)
+            return NumpyVectorStore(
+                persist_dir=store_dir,
+                dtype=config.NUMPY_VECTOR_DTYPE,
+                quantization=config.VECTOR_QUANTIZATION,
+                rerank_multiplier=config.QUANTIZATION_RERANK_MULTIPLIER,
+                index_type=config.NUMPY_INDEX_TYPE,
+                ivf_lists=config.IVF_LISTS,
+                ivf_nprobe=config.IVF_NPROBE,
+                ivf_min_rows=config.IVF_MIN_CHUNKS,
+                ivf_retrain_growth=config.IVF_RETRAIN_GROWTH,
+            )
         
-        documents = []
+        from llama_index.vector_stores.chroma import ChromaVectorStore
         
-        for md_file in glob.glob(f"{self.obsidian_path}/**/*.md", recursive=True):
-            try:
-                with open(md_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                    # Skip empty files
-                    if not content.strip():
-                        continue
-                    
-                    # Skip very short files (less than 10 characters)
-                    if len(content.strip()) < 10:
-                        continue
-                    
-                    # Create document with metadata
-                    doc = Document(
-                        text=content,
-                        metadata={
-                            'filename': os.path.basename(md_file),
-                            'filepath': md_file,
-                            'file_type': 'markdown',
-                            'source': 'obsidian'
-                        }
-                    )
-                    documents.append(doc)
-                
-            except Exception as e:
-                continue
+        if create:
+            collection = self._get_chroma_client().get_or_create_collection(collection)
+        else:
+            collection = self._get_chroma_client().get_collection(collection)
+        return ChromaVectorStore(chroma_collection=collection)
+    
+    def _shard_collection(self, collection: str, shard: str) -> str:
+        return f"{collection}__{shard}"
+    
+    def _list_shards(self, backend: str, collection: str) -> List[str]:
+        """Names of the shards stored for a sharded collection"""
+        prefix = self._shard_collection(collection, "")
+        if backend == "numpy":
+            numpy_dir = self._numpy_store_dir("")
+            names = os.listdir(numpy_dir) if os.path.isdir(numpy_dir) else []
+            names = [name for name in names if NumpyVectorStore.exists(self._numpy_store_dir(name))]
+        else:
+            # Older chromadb versions list names, newer ones collection objects
+            names = [getattr(c, "name", c) for c in self._get_chroma_client().list_collections()]
+        return sorted(name[len(prefix):] for name in names if name.startswith(prefix))
+    
+    def shard_of(self, path: str) -> str:
+        """The shard a vault file is stored in"""
+        return shard_for_path(path, self.obsidian_path, config.SHARDING, config.SHARD_HASH_BUCKETS)
+    
+    def _open_sharded_store(self, collection: str, create: bool) -> ShardedVectorStore:
+        """Open the shards of a collection, raises if there are none and create is False"""
+        shards = {
+            shard: self._open_vector_store(self._shard_collection(collection, shard), create=False)
+            for shard in self._list_shards(config.VECTOR_BACKEND, collection)
+        }
+        if not shards and not create:
+            raise FileNotFoundError(f"no shards of {collection}")
+        return ShardedVectorStore(
+            shards=shards,
+            route=lambda node: self.shard_of(node.metadata.get("filepath", "")),
+            open_shard=lambda shard: self._open_vector_store(self._shard_collection(collection, shard), create=True),
+            sharding=config.SHARDING,
+            executor=self._shard_executor,
+        )
+    
+    def _get_chroma_client(self):
+        """The ChromaDB client, created (and chromadb imported) on first use"""
+        if self.chroma_client is None:
+            with startup_timer.phase("chroma client"):
+                import chromadb
+                self.chroma_client = chromadb.PersistentClient(path=config.CHROMA_PERSIST_DIR)
+        return self.chroma_client
+    
+    def _drop_vector_store(self, store_id: str) -> None:
+        """Delete a vector store and everything in it, by the store ID recorded when it was built"""
+        backend, collection = store_id.split(":", 1)
+        if "/" in collection:
+            # Sharded, drop every shard
+            collection = collection.split("/", 1)[0]
+            for shard in self._list_shards(backend, collection):
+                self._drop_vector_store(f"{backend}:{self._shard_collection(collection, shard)}")
+            return
+        if backend == "numpy":
+            NumpyVectorStore.destroy(self._numpy_store_dir(collection))
+            return
+        try:
+            self._get_chroma_client().delete_collection(collection)
+        except:
+            pass
+    
+    def _open_index_state(self, version: int, create: bool) -> IndexState:
+        """Open (or with create, start empty) the vector store and state files of an index version"""
+        state_dir = self._state_dir(version)
+        if config.SHARDING != "none":
+            vector_store = self._open_sharded_store(self._collection_name(version), create)
+        else:
+            vector_store = self._open_vector_store(self._collection_name(version), create)
         
-        return documents
+        # Manifest of indexed files, used for incremental updates
+        manifest = IndexManifest(os.path.join(state_dir, config.INDEX_MANIFEST_FILE))
+        
+        # BM25 index over the same chunks, for exact-term and offline search
+        lexical_index = BM25Index(os.path.join(state_dir, config.LEXICAL_INDEX_FILE))
+        
+        # Duplicate chunks across the vault are embedded and stored once
+        dedup_index = None
+        if config.DEDUP_ENABLED:
+            dedup_index = ChunkDeduplicator(
+                os.path.join(state_dir, config.DEDUP_INDEX_FILE),
+                threshold=config.DEDUP_NEAR_THRESHOLD,
+                num_perm=config.DEDUP_NUM_PERM,
+                bands=config.DEDUP_LSH_BANDS,
+                shingle_size=config.DEDUP_SHINGLE_SIZE
+            )
+        
+        # Vault tree as of the last full update, to find changed files without checking each one
+        vault_tree = VaultTree(os.path.join(state_dir, config.VAULT_TREE_FILE))
+        
+        # One vector per note, the first stage of two-stage retrieval
+        note_index = None
+        if config.RETRIEVAL_STRATEGY == "two_stage":
+            note_index = NoteIndex(os.path.join(state_dir, config.NOTE_INDEX_FILE))
+        
+        if create:
+            vault_tree.clear()
+            if note_index is not None:
+                note_index.clear()
+            manifest.clear()
+            manifest.store = self._store_id(version)
+            lexical_index.clear()
+            if dedup_index is not None:
+                dedup_index.clear()
+        
+        # Create StorageContext from the vector store
+        storage_context = StorageContext.from_defaults(vector_store=vector_store)
+        obsidian_index = VectorStoreIndex.from_vector_store(
+            vector_store=vector_store,
+            storage_context=storage_context,
+            embed_model=self.embed_model
+        )
+        return IndexState(
+            version, vector_store, obsidian_index, manifest, lexical_index, dedup_index, vault_tree, note_index
+        )
+    
+    def _drop_index_version(self, version: int, store_id: str) -> None:
+        """Delete a version's vector store and state files"""
+        self._drop_vector_store(store_id)
+        if version == 0:
+            for name in (config.INDEX_MANIFEST_FILE, config.LEXICAL_INDEX_FILE, config.LEXICAL_INDEX_FILE + LOG_SUFFIX,
+                         config.DEDUP_INDEX_FILE, config.VAULT_TREE_FILE, config.NOTE_INDEX_FILE):
+                path = os.path.join(config.CHROMA_PERSIST_DIR, name)
+                if os.path.exists(path):
+                    os.remove(path)
+        else:
+            shutil.rmtree(self._state_dir(version), ignore_errors=True)
+    
+    def _chunk_count(self) -> int:
+        return store_count(self.vector_store)
+    
+    def _delete_chunks(self, state: IndexState, chunk_ids: List[str]) -> None:
+        """Remove chunks from the vector store and the lexical index by ID"""
+        if state.dedup_index is not None:
+            # Groups whose canonical copy goes are re-pointed to another copy, matched by its text
+            text_of = lambda chunk_id: (state.lexical_index.get(chunk_id) or {}).get("text")
+            for chunk_id in chunk_ids:
+                state.dedup_index.remove(chunk_id, text_of)
+        if chunk_ids:
+            state.vector_store.delete_nodes(node_ids=list(chunk_ids))
+            for chunk_id in chunk_ids:
+                state.lexical_index.remove(chunk_id)
+            # Deletes leave tombstones in the store until it is compacted
+            state.manifest.deleted_chunks += len(chunk_ids)
+    
+    def _backfill_lexical_index(self, state: IndexState) -> None:
+        """Populate the lexical index from chunks already stored in the vector store"""
+        state.lexical_index.add_many(
+            (node.node_id, node.get_content(), node.metadata)
+            for node in state.vector_store.get_nodes(node_ids=None)
+        )
+        state.lexical_index.save()
+    
+    def _backfill_note_index(self, state: IndexState) -> None:
+        """Compute note vectors for an index built without them, from the stored chunks"""
+        paths = state.manifest.paths()
+        for start in range(0, len(paths), 500):
+            self._update_note_vectors(state, paths[start:start + 500])
+        state.note_index.save()
+    
+    def _update_note_vectors(self, state: IndexState, paths: List[str]) -> None:
+        """Recompute the note-level vectors of the given files after their chunks changed"""
+        if state.note_index is None:
+            return
+        chunk_ids = {}
+        for path in paths:
+            entry = state.manifest.get(path)
+            ids = entry.get("chunk_ids", []) if entry else []
+            if ids:
+                chunk_ids[path] = ids
+            else:
+                state.note_index.remove(path)
+        if not chunk_ids:
+            return
+        try:
+            if config.NOTE_VECTOR == "headings":
+                outlines = []
+                for path in chunk_ids:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        outlines.append(note_outline(path, f.read()))
+                vectors = self._embed_texts(outlines)
+            else:
+                # Mean of the stored chunk embeddings, no embedding calls
+                embeddings = store_embeddings(state.vector_store, [c for ids in chunk_ids.values() for c in ids])
+                offsets = np.cumsum([0] + [len(ids) for ids in chunk_ids.values()])
+                vectors = [embeddings[start:end].mean(axis=0) for start, end in zip(offsets, offsets[1:])]
+        except Exception as e:
+            print(f"Could not update note vectors: {e}")
+            return
+        for path, vector in zip(chunk_ids, vectors):
+            state.note_index.update(path, vector)
     
-    def build_obsidian_index(self) -> bool:
-        """Build vector index for Obsidian vault"""
-        # Load documents
-        documents = self._load_obsidian_documents()
+    def _save_index_state(self, state: IndexState) -> None:
+        """Persist the vector store (Chroma writes through), manifest and lexical index after an update"""
+        state.vector_store.persist(persist_path=None)
+        state.manifest.save()
+        state.lexical_index.save()
+        if state.dedup_index is not None:
+            state.dedup_index.save()
+        state.vault_tree.save()
+        if state.note_index is not None:
+            state.note_index.save()
+    
+    def build_obsidian_index(self, full_rebuild: bool = False) -> bool:
+        """
+        Bring the Obsidian vector index up to date with the vault.
         
-        if not documents:
+        By default only new or changed files are re-embedded and chunks of
+        removed files are deleted. A full rebuild re-embeds everything into a
+        new index version while searches keep using the current one, then
+        switches over atomically; it only happens when requested or when there
+        is no existing vector store to update. Changed files are found by
+        comparing a fresh scan of the vault with the Merkle tree saved by the
+        last update, so an unchanged vault costs one directory walk.
+        """
+        if not self.obsidian_path:
             return False
         
+        with self._index_lock:
+            started = time.perf_counter()
+            tree = VaultTree.scan(os.path.normpath(self.obsidian_path))
+            self.last_vault_check_ms = round((time.perf_counter() - started) * 1000, 2)
+            if not tree.paths():
+                return False
+            return self._update_index(tree, full_rebuild)
+    
+    def _update_index(self, tree: VaultTree, full_rebuild: bool) -> bool:
         try:
-            # Clear existing collection
-            try:
-                self.chroma_client.delete_collection(config.CHROMA_COLLECTION_NAME)
-            except:
-                pass
+            # A store the manifest doesn't describe (e.g. built before incremental
+            # indexing) can't be matched to files and must be rebuilt
+            state = self.state
+            untracked = state is not None and state.manifest.store != self._store_id(state.version)
+            if full_rebuild or state is None or untracked:
+                return self._rebuild_index(tree)
             
-            # Create ChromaDB collection and vector store
-            collection = self.chroma_client.get_or_create_collection(config.CHROMA_COLLECTION_NAME)
-            vector_store = ChromaVectorStore(chroma_collection=collection)
+            vault_files = tree.paths()
+            if state.vault_tree.root_hash is None or state.vault_tree.root != tree.root:
+                # No tree from an earlier update, compare every file with the manifest
+                removed = set(state.manifest.paths()) - set(vault_files)
+            else:
+                changed_dirs, vault_files = state.vault_tree.diff(tree)
+                if not vault_files:
+                    print(f"Index is up to date with the vault (checked in {self.last_vault_check_ms} ms)")
+                    # Don't leave the previous update's diff in the stats
+                    self.last_update = {
+                        "files": 0,
+                        "chunks_embedded": 0,
+                        "chunks_reused": 0,
+                        "chunks_removed": 0,
+                        "duplicates_skipped": 0,
+                    }
+                    return True
+                print(f"{len(vault_files)} changed files in {len(changed_dirs)} folders")
+                removed = set(vault_files) - set(tree.paths())
             
-            # Create StorageContext with the vector store
-            storage_context = StorageContext.from_defaults(vector_store=vector_store)
+            # Drop chunks of files that no longer exist
+            chunks_removed = self._remove_files(state, removed)
+            self._index_files(state, [path for path in vault_files if path not in removed], chunks_removed)
+            self._adopt_tree(state, tree)
+            self._save_index_state(state)
+            return True
             
-            # Build index with StorageContext
-            self.obsidian_index = VectorStoreIndex.from_documents(
-                documents,
-                storage_context=storage_context,
-                node_parser=self.node_parser,
-                embed_model=self.embed_model,
-                show_progress=False
-            )
+        except Exception as e:
+            print(f"Index build error: {e}")
+            return False
+    
+    def _rebuild_index(self, tree: VaultTree) -> bool:
+        """Build every file into a new shadow version, then make it the active one"""
+        version = self.index_versions.next_version()
+        store_id = self._store_id(version)
+        
+        # Leftovers of a rebuild that was interrupted before it was activated
+        self._drop_index_version(version, store_id)
+        shadow = self._open_index_state(version, create=True)
+        try:
+            self._index_files(shadow, tree.paths())
+            self._adopt_tree(shadow, tree)
+            self._save_index_state(shadow)
+        except Exception:
+            self._drop_index_version(version, store_id)
+            raise
+        
+        self._activate_version(shadow, store_id)
+        return True
+    
+    def _adopt_snapshot_tree(self, state: IndexState, tree: VaultTree) -> None:
+        """Adopt a scan for an imported index, minus files whose stat differs from the snapshot's so they are checked"""
+        def unchanged(path):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            return state.manifest.is_unchanged(path, stat.st_mtime, stat.st_size)
+        self._adopt_tree(state, tree)
+        state.vault_tree.forget([path for path in tree.paths() if not unchanged(path)])
+    
+    def _adopt_tree(self, state: IndexState, tree: VaultTree) -> None:
+        """Record the scan an update was based on, minus files that failed to index so they are retried"""
+        state.vault_tree.adopt(tree)
+        state.vault_tree.forget([path for path in tree.paths() if state.manifest.get(path) is None])
+    
+    def _activate_version(self, shadow: IndexState, store_id: str) -> None:
+        """Serve a completed shadow version, keeping the current one for rollback"""
+        if self.index_versions.active is None and self.state is not None:
+            # Serving an index from before versioning, keep it as the previous version
+            self.index_versions.active = {"version": self.state.version, "store": self.state.manifest.store}
+        retired = self.index_versions.activate(shadow.version, store_id)
+        self.state = shadow
+        print(f"Index version {shadow.version} is now active")
+        
+        if retired:
+            self._drop_index_version(retired["version"], retired["store"])
+    
+    def _snapshot_header(self) -> dict:
+        """What a snapshot's vectors and chunk IDs depend on, checked before importing it"""
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "manifest_version": IndexManifest.VERSION,
+            "embedding_provider": config.EMBEDDING_PROVIDER,
+            "embed_model": self.embedding_namespace,
+            "chunk_size": config.NODE_CHUNK_SIZE,
+            "chunk_overlap": config.NODE_CHUNK_OVERLAP,
+        }
+    
+    def export_snapshot(self, path: str) -> dict:
+        """
+        Write the active index (chunks, embeddings, manifest and dedup index)
+        to a compressed snapshot archive that import_snapshot() can load on
+        another machine, returns the snapshot header. Paths are stored
+        relative to the vault.
+        """
+        if self.state is None:
+            raise RuntimeError("no index to export")
+        root = self.obsidian_path
+        
+        def relative_metadata(metadata: dict) -> dict:
+            if metadata.get("filepath"):
+                return {**metadata, "filepath": to_relative(metadata["filepath"], root)}
+            return metadata
+        
+        with self._index_lock:
+            state = self.state
+            self._save_index_state(state)
+            node_ids = store_node_ids(state.vector_store)
             
-            return True
+            def pages():
+                for start in range(0, len(node_ids), config.INGEST_BATCH_CHUNKS):
+                    page_ids = node_ids[start:start + config.INGEST_BATCH_CHUNKS]
+                    nodes = {node.node_id: node for node in state.vector_store.get_nodes(node_ids=page_ids)}
+                    chunks = [
+                        {
+                            "id": node_id,
+                            "text": nodes[node_id].get_content(),
+                            "metadata": relative_metadata(nodes[node_id].metadata),
+                            "doc_id": to_relative(nodes[node_id].ref_doc_id, root) if nodes[node_id].ref_doc_id else None,
+                        }
+                        for node_id in page_ids
+                    ]
+                    yield chunks, store_embeddings(state.vector_store, page_ids)
             
+            header = write_snapshot(
+                path,
+                {**self._snapshot_header(), "source_backend": config.VECTOR_BACKEND, "created_at": time.time()},
+                pages(),
+                {to_relative(file_path, root): entry for file_path, entry in state.manifest.files.items()},
+                state.dedup_index.path if state.dedup_index is not None else None,
+            )
+        print(f"Exported {header['chunks']} chunks of {len(state.manifest.files)} files to {path}")
+        return header
+    
+    def import_snapshot(self, path: str) -> bool:
+        """
+        Load a snapshot into a new index version of the configured backend and
+        make it active, without any embedding calls. Returns False when the
+        snapshot was made with a different embedding model, chunking or format.
+        Files edited since the snapshot are picked up by the next index update.
+        """
+        problems = incompatibilities(read_header(path), self._snapshot_header())
+        if problems:
+            print("Snapshot is not compatible with this index:")
+            for problem in problems:
+                print(f"  {problem}")
+            return False
+        header, chunks, embeddings, manifest_files, dedup = read_snapshot(path)
+        root = self.obsidian_path
+        
+        with self._index_lock:
+            version = self.index_versions.next_version()
+            store_id = self._store_id(version)
+            self._drop_index_version(version, store_id)
+            shadow = self._open_index_state(version, create=True)
+            try:
+                for start in range(0, len(chunks), config.INGEST_BATCH_CHUNKS):
+                    nodes = []
+                    for chunk, embedding in zip(chunks[start:start + config.INGEST_BATCH_CHUNKS],
+                                                embeddings[start:start + config.INGEST_BATCH_CHUNKS]):
+                        metadata = dict(chunk["metadata"])
+                        if metadata.get("filepath"):
+                            metadata["filepath"] = to_absolute(metadata["filepath"], root)
+                        node = TextNode(id_=chunk["id"], text=chunk["text"], metadata=metadata,
+                                        embedding=embedding.tolist())
+                        if chunk.get("doc_id"):
+                            node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(
+                                node_id=to_absolute(chunk["doc_id"], root)
+                            )
+                        nodes.append(node)
+                    # Nodes that already carry embeddings are stored without re-embedding
+                    shadow.obsidian_index.insert_nodes(nodes)
+                    shadow.lexical_index.add_many((node.node_id, node.get_content(), node.metadata) for node in nodes)
+                shadow.manifest.files = {to_absolute(relative, root): entry for relative, entry in manifest_files.items()}
+                if dedup is not None and shadow.dedup_index is not None:
+                    os.makedirs(os.path.dirname(shadow.dedup_index.path), exist_ok=True)
+                    with open(shadow.dedup_index.path, 'wb') as f:
+                        f.write(dedup)
+                    shadow.dedup_index.load()
+                if shadow.note_index is not None:
+                    self._backfill_note_index(shadow)
+                if root:
+                    self._adopt_snapshot_tree(shadow, VaultTree.scan(os.path.normpath(root)))
+                self._save_index_state(shadow)
+            except Exception:
+                self._drop_index_version(version, store_id)
+                raise
+            self._activate_version(shadow, store_id)
+        print(f"Imported {header['chunks']} chunks of {len(manifest_files)} files from {path}")
+        return True
+    
+    def rollback_index(self) -> bool:
+        """Serve the previous index version again, returns False if there is none to roll back to"""
+        with self._index_lock:
+            previous = self.index_versions.previous
+            if previous is None:
+                return False
+            try:
+                state = self._open_index_state(previous["version"], create=False)
+                if state.manifest.store != previous["store"]:
+                    raise ValueError(f"previous version was built with {previous['store']}")
+            except Exception as e:
+                print(f"Cannot roll back to index version {previous['version']}: {e}")
+                return False
+            self.index_versions.rollback()
+            self.state = state
+            print(f"Index version {state.version} is now active")
+            return True
+    
+    def rebuild_shard(self, shard: str) -> bool:
+        """
+        Re-chunk and re-embed the files of one shard in place, the other
+        shards are not touched. Returns False when the index isn't sharded.
+        """
+        if config.SHARDING == "none" or self.state is None:
+            return False
+        try:
+            with self._index_lock:
+                state = self.state
+                self._remove_files(state, [path for path in state.manifest.paths() if self.shard_of(path) == shard])
+                self._index_files(state, [path for path in self._list_vault_files() if self.shard_of(path) == shard])
+                self._save_index_state(state)
+            return True
         except Exception as e:
+            print(f"Shard rebuild error: {e}")
             return False
     
-    def search_obsidian(self, query: str) -> tuple[List[str], List[str]]:
-        """Search Obsidian vault and return results + referenced filenames"""
-        # If no index, try to build it
-        if not self.obsidian_index:
-            if not self.build_obsidian_index():
-                return [], []
+    def upsert_documents(self, paths: List[str]) -> bool:
+        """
+        Re-index specific files, e.g. a newly saved note and the files that got backlinks.
+        Paths that no longer exist are removed from the index.
+        """
+        if self.obsidian_index is None:
+            return self.build_obsidian_index()
+        
+        paths = [os.path.normpath(str(path)) for path in paths if path]
+        try:
+            with self._index_lock:
+                state = self.state
+                chunks_removed = self._remove_files(state, [path for path in paths if not os.path.exists(path)])
+                self._index_files(state, [path for path in paths if os.path.exists(path)], chunks_removed)
+                # Checked again at the next full update, which only trusts its own scans
+                state.vault_tree.forget(paths)
+                self._save_index_state(state)
+            return True
+        except Exception as e:
+            print(f"Index update error: {e}")
+            return False
+    
+    def delete_documents(self, paths: List[str]) -> bool:
+        """Remove specific files from the index"""
+        if self.obsidian_index is None:
+            return False
         
         try:
-            retriever = self.obsidian_index.as_retriever(
-                similarity_top_k=config.VECTOR_SEARCH_TOP_K
+            with self._index_lock:
+                state = self.state
+                paths = [os.path.normpath(str(path)) for path in paths if path]
+                # Nothing to index, just records the removed chunks in last_update
+                self._index_files(state, [], self._remove_files(state, paths))
+                state.vault_tree.forget(paths)
+                self._save_index_state(state)
+            return True
+        except Exception as e:
+            print(f"Index update error: {e}")
+            return False
+    
+    def start_watcher(self) -> bool:
+        """Start re-indexing vault edits in the background, returns False if there is no vault"""
+        if self.watcher is not None:
+            return True
+        if not self.obsidian_path or not os.path.isdir(self.obsidian_path):
+            return False
+        self.watcher = VaultWatcher(
+            self.obsidian_path,
+            on_change=self.upsert_documents,
+            on_rescan=self.build_obsidian_index,
+            debounce_seconds=config.WATCH_DEBOUNCE_SECONDS,
+            max_delay_seconds=config.WATCH_MAX_DELAY_SECONDS,
+            poll_interval=config.WATCH_POLL_INTERVAL_SECONDS
+        )
+        self.watcher.start()
+        return True
+    
+    def stop_watcher(self) -> None:
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+    
+    def maintain_index(self, compact: Optional[bool] = None) -> Optional[dict]:
+        """
+        Clean up and compact the active index, returns a report with its health before and after.
+        
+        Files that left the vault are dropped, chunks that no file refers to
+        any more are deleted from the vector store, lexical and dedup indexes,
+        and files whose chunks went missing are re-indexed. The store is then
+        compacted when compact is True, or when it is None and the share of
+        deleted chunks has reached COMPACT_FRAGMENTATION_THRESHOLD. Returns
+        None when there is no index.
+        """
+        if self.state is None:
+            return None
+        started = time.perf_counter()
+        with self._index_lock:
+            before = self.index_health()
+            state = self.state
+            orphans = self._clean_orphans(state)
+            self._save_index_state(state)
+            
+            if compact is None:
+                compact = before["fragmentation"] >= config.COMPACT_FRAGMENTATION_THRESHOLD
+            compacted = compact and self._compact_index(state)
+            report = {
+                "before": before,
+                "after": self.index_health(),
+                **orphans,
+                "compacted": compacted,
+                "seconds": round(time.perf_counter() - started, 2),
+            }
+        self.last_maintenance = report
+        print(f"Index maintenance: {report['orphan_files']} removed files, {report['orphan_chunks']} orphaned and "
+              f"{report['missing_chunks']} missing chunks, {'compacted' if compacted else 'not compacted'}")
+        return report
+    
+    def _clean_orphans(self, state: IndexState) -> dict:
+        """Reconcile the manifest, stores and vault, returns how many files and chunks were out of step"""
+        orphan_files = [path for path in state.manifest.paths() if not os.path.exists(path)]
+        self._remove_files(state, orphan_files)
+        
+        manifest_ids = {
+            chunk_id for path in state.manifest.paths() for chunk_id in state.manifest.get(path).get("chunk_ids", [])
+        }
+        if state.dedup_index is not None:
+            # Sources of files that are gone, e.g. after a crash between the manifest and dedup writes
+            text_of = lambda chunk_id: (state.lexical_index.get(chunk_id) or {}).get("text")
+            for chunk_id in [c for c in list(state.dedup_index.canonical_of) if c not in manifest_ids]:
+                state.dedup_index.remove(chunk_id, text_of)
+        expected = manifest_ids
+        
+        stored = set(store_node_ids(state.vector_store))
+        orphan_chunks = stored - expected
+        if orphan_chunks:
+            state.vector_store.delete_nodes(node_ids=list(orphan_chunks))
+            state.manifest.deleted_chunks += len(orphan_chunks)
+        lexical_orphans = [chunk_id for chunk_id in list(state.lexical_index.chunks) if chunk_id not in expected]
+        for chunk_id in lexical_orphans:
+            state.lexical_index.remove(chunk_id)
+        
+        # Files with chunks missing from either store are indexed again from scratch
+        missing = expected - (stored & set(state.lexical_index.chunks))
+        damaged = [
+            path for path in state.manifest.paths()
+            if any(c in missing for c in state.manifest.get(path).get("chunk_ids", []))
+        ]
+        if damaged:
+            self._remove_files(state, damaged)
+            self._index_files(state, damaged)
+        return {
+            "orphan_files": len(orphan_files),
+            "orphan_chunks": len(orphan_chunks | set(lexical_orphans)),
+            "missing_chunks": len(missing),
+        }
+    
+    def _compact_index(self, state: IndexState) -> bool:
+        """
+        Drop the deleted chunks the vector store still holds. Numpy stores are
+        rewritten in place; Chroma collections are copied record by record into
+        a fresh collection, which replaces the active version without
+        re-embedding anything.
+        """
+        if state.manifest.store != self._store_id(state.version):
+            return False
+        # Fold the lexical index's change log back into its file
+        state.lexical_index.compact()
+        if config.VECTOR_BACKEND == "numpy":
+            stores = [state.vector_store]
+            if isinstance(state.vector_store, ShardedVectorStore):
+                stores = list(state.vector_store.shards.values())
+            for store in stores:
+                store.compact()
+            state.manifest.deleted_chunks = 0
+            state.manifest.save()
+            return True
+        
+        version = self.index_versions.next_version()
+        store_id = self._store_id(version)
+        self._drop_index_version(version, store_id)
+        source, target = self._collection_name(state.version), self._collection_name(version)
+        if isinstance(state.vector_store, ShardedVectorStore):
+            pairs = [(self._shard_collection(source, shard), self._shard_collection(target, shard))
+                     for shard in state.vector_store.shards]
+        else:
+            pairs = [(source, target)]
+        try:
+            client = self._get_chroma_client()
+            for source_name, target_name in pairs:
+                self._copy_collection(client.get_collection(source_name), client.get_or_create_collection(target_name))
+            state_dir = self._state_dir(version)
+            os.makedirs(state_dir, exist_ok=True)
+            for name in (config.LEXICAL_INDEX_FILE, config.DEDUP_INDEX_FILE, config.VAULT_TREE_FILE,
+                         config.NOTE_INDEX_FILE):
+                path = os.path.join(self._state_dir(state.version), name)
+                if os.path.exists(path):
+                    shutil.copyfile(path, os.path.join(state_dir, name))
+            manifest = IndexManifest(os.path.join(state_dir, config.INDEX_MANIFEST_FILE))
+            manifest.files, manifest.store = state.manifest.files, store_id
+            manifest.save()
+            compacted = self._open_index_state(version, create=False)
+        except Exception as e:
+            print(f"Index compaction error: {e}")
+            self._drop_index_version(version, store_id)
+            return False
+        
+        if self.index_versions.active is None:
+            # Serving an index from before versioning
+            self.index_versions.active = {"version": state.version, "store": self._store_id(state.version)}
+        replaced = self.index_versions.replace_active(version, store_id)
+        self.state = compacted
+        self._drop_index_version(replaced["version"], replaced["store"])
+        print(f"Index compacted into version {version}")
+        return True
+    
+    def _copy_collection(self, source, target, page_size: int = 1000) -> None:
+        """Copy every record (with its embedding) of one Chroma collection into another"""
+        offset = 0
+        while True:
+            page = source.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                return
+            target.add(ids=page["ids"], embeddings=page["embeddings"],
+                       documents=page["documents"], metadatas=page["metadatas"])
+            offset += len(page["ids"])
+    
+    def index_health(self) -> dict:
+        """Size, fragmentation and query latency of the active index"""
+        state = self.state
+        live = store_count(state.vector_store)
+        deleted = state.manifest.deleted_chunks
+        
+        # Time raw vector store queries with random unit vectors of the stored dimension,
+        # read from the store so maintenance never calls the embedding API
+        dimension = store_dimension(state.vector_store) if live else None
+        rng = np.random.default_rng(0)
+        timings = []
+        for _ in range(config.MAINTENANCE_LATENCY_SAMPLES if dimension else 0):
+            embedding = rng.standard_normal(dimension)
+            embedding /= np.linalg.norm(embedding)
+            query = VectorStoreQuery(query_embedding=embedding.tolist(), similarity_top_k=config.VECTOR_SEARCH_TOP_K)
+            started = time.perf_counter()
+            state.vector_store.query(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        
+        return {
+            "chunks": live,
+            "indexed_files": len(state.manifest.files),
+            "disk_bytes": directory_size(config.CHROMA_PERSIST_DIR),
+            "dimension": dimension,
+            "deleted_chunks": deleted,
+            "fragmentation": round(deleted / (live + deleted), 3) if live + deleted else 0.0,
+            "query_p50_ms": round(float(np.percentile(timings, 50)), 2) if timings else None,
+            "query_p95_ms": round(float(np.percentile(timings, 95)), 2) if timings else None,
+        }
+    
+    def start_maintenance(self) -> bool:
+        """Run maintain_index in the background whenever the assistant has been idle long enough"""
+        if self.maintenance is None:
+            self.maintenance = IdleScheduler(
+                self.maintain_index,
+                last_activity=lambda: self._last_activity,
+                idle_seconds=config.MAINTENANCE_IDLE_SECONDS,
+                interval_seconds=config.MAINTENANCE_INTERVAL_SECONDS
             )
+            self.maintenance.start()
+        return True
+    
+    def stop_maintenance(self) -> None:
+        if self.maintenance is not None:
+            self.maintenance.stop()
+            self.maintenance = None
+    
+    def _remove_files(self, state: IndexState, paths) -> int:
+        """Delete the chunks of the given files and forget them in the manifest, returns how many chunks went"""
+        chunks_removed = 0
+        for path in paths:
+            entry = state.manifest.remove(path)
+            if entry:
+                self._delete_chunks(state, entry.get("chunk_ids", []))
+                chunks_removed += len(entry.get("chunk_ids", []))
+            if state.note_index is not None:
+                state.note_index.remove(path)
+        return chunks_removed
+    
+    def _index_files(self, state: IndexState, paths: List[str], chunks_removed: int = 0) -> int:
+        """
+        Chunk and embed any of the given files that are new or changed, returns how many were re-indexed.
+        chunks_removed counts chunks of deleted files already dropped by _remove_files, for last_update.
+        
+        Files stream through the ingestor and are embedded and stored in batches,
+        so only one batch of chunks is held in memory at a time. Chunk IDs are
+        derived from their content, so for an edited file only chunks with new
+        IDs are embedded and stored, chunks whose IDs disappeared are deleted
+        and the rest are left in place.
+        """
+        self._last_activity = time.monotonic()
+        
+        def skip_unchanged(md_file, stat):
+            return state.manifest.is_unchanged(md_file, stat.st_mtime, stat.st_size)
+        
+        def needs_chunking(vault_file):
+            entry = state.manifest.get(vault_file.path)
+            if entry:
+                # Notes without a created date keep the one from when they were first indexed
+                vault_file.created = entry.get("created")
+            if entry and entry.get("content_hash") == vault_file.content_hash:
+                # Touched but not edited, just refresh the stat info
+                state.manifest.update(vault_file.path, vault_file.mtime, vault_file.size,
+                                     vault_file.content_hash, entry.get("chunk_ids", []), entry.get("created"))
+                return False
+            return True
+        
+        files_indexed = chunks_indexed = chunks_reused = duplicates_skipped = 0
+        self.embedding_pipeline.reset_stats()
+        chunked_files = self.ingestor.iter_files(paths, skip=skip_unchanged, needs_chunking=needs_chunking)
+        for batch in batched(chunked_files, config.INGEST_BATCH_CHUNKS):
+            # Diff each file's chunks against the ones it had. Vanished chunks go
+            # first, so an edited file isn't matched as a duplicate of itself
+            changed_nodes = []
+            for vault_file in batch:
+                entry = state.manifest.get(vault_file.path)
+                old_ids = set(entry.get("chunk_ids", [])) if entry else set()
+                new_ids = {node.node_id for node in vault_file.nodes}
+                removed = [chunk_id for chunk_id in old_ids if chunk_id not in new_ids]
+                self._delete_chunks(state, removed)
+                changed_nodes.extend(node for node in vault_file.nodes if node.node_id not in old_ids)
+                chunks_reused += len(new_ids & old_ids)
+                chunks_removed += len(removed)
             
-            # Retrieve raw nodes without postprocessor
-            raw_nodes = retriever.retrieve(query)
+            # Embed the batch in one pass so request batching still applies
+            to_embed = self._deduplicate(state, changed_nodes)
+            if to_embed:
+                embeddings = self._embed_texts(
+                    [node.get_content(metadata_mode=MetadataMode.EMBED) for node in to_embed]
+                )
+                for node, embedding in zip(to_embed, embeddings):
+                    node.embedding = embedding
+            # Duplicates are stored under their own ID and file, with their canonical copy's embedding
+            self._copy_embeddings(state, changed_nodes)
+            new_nodes = changed_nodes
             
-            if not raw_nodes:
-                print(f"No results found for query: '{query}'")
-                return [], []
+            # Nodes that already carry embeddings are stored without re-embedding
+            if new_nodes:
+                state.obsidian_index.insert_nodes(new_nodes)
+                state.lexical_index.add_many(
+                    (node.node_id, node.get_content(), node.metadata) for node in new_nodes
+                )
             
-            # Manual filtering - only keep nodes above threshold
-            results = []
-            referenced_files = set()
-            for node in raw_nodes:
-                score = getattr(node, 'score', None)
-                filename = node.metadata.get('filename', 'Unknown')
-                print(f"File: {filename}, score: {score}")
-                if score is not None and score >= config.VECTOR_SIMILARITY_THRESHOLD:
-                    referenced_files.add(filename)
-                    content = node.text[:500] + "..." if len(node.text) > 500 else node.text
-                    results.append(content)  # Only add content, not score, for LLM
+            for vault_file in batch:
+                created = vault_file.created if vault_file.created is not None else vault_file.mtime
+                state.manifest.update(vault_file.path, vault_file.mtime, vault_file.size,
+                                     vault_file.content_hash, [node.node_id for node in vault_file.nodes], created)
+            self._update_note_vectors(state, [vault_file.path for vault_file in batch])
+            files_indexed += len(batch)
+            chunks_indexed += len(to_embed)
+            duplicates_skipped += len(changed_nodes) - len(to_embed)
+        
+        self.last_update = {
+            "files": files_indexed,
+            "chunks_embedded": chunks_indexed,
+            "chunks_reused": chunks_reused,
+            "chunks_removed": chunks_removed,
+            "duplicates_skipped": duplicates_skipped,
+        }
+        if files_indexed or chunks_removed:
+            print(f"Indexed {files_indexed} changed files ({chunks_indexed} chunks embedded, {chunks_reused} unchanged "
+                  f"chunks reused, {chunks_removed} removed, {duplicates_skipped} duplicates skipped)")
+            stats = self.embedding_pipeline.stats()
+            if stats["chunks"]:
+                print(f"Embedded {stats['chunks']} chunks: {stats['chunks_per_sec']} chunks/s, "
+                      f"{stats['tokens_per_sec']} tokens/s, {stats['retries']} retries")
+        return files_indexed
+    
+    def _deduplicate(self, state: IndexState, nodes: list) -> list:
+        """Register nodes with the dedup index and return only those that need embedding"""
+        if state.dedup_index is None:
+            return nodes
+        return [
+            node for node in nodes
+            if state.dedup_index.add(node.node_id, node.get_content(), node.metadata.get('filename', 'Unknown')) == node.node_id
+        ]
+    
+    def _copy_embeddings(self, state: IndexState, nodes: list) -> None:
+        """Give duplicate nodes the embedding of their group's canonical copy, embedding any it can't be found for"""
+        duplicates = [node for node in nodes if node.embedding is None]
+        if not duplicates:
+            return
+        # The canonical copy is either in this batch or already stored
+        embeddings = {node.node_id: node.embedding for node in nodes if node.embedding is not None}
+        canonical = {node.node_id: state.dedup_index.group_of(node.node_id) for node in duplicates}
+        stored = [c for c in dict.fromkeys(canonical.values()) if c not in embeddings]
+        try:
+            if stored:
+                embeddings.update(zip(stored, store_embeddings(state.vector_store, stored).tolist()))
+        except KeyError:
+            pass
+        missing = []
+        for node in duplicates:
+            embedding = embeddings.get(canonical[node.node_id])
+            if embedding is None:
+                missing.append(node)
+            else:
+                node.embedding = embedding
+        if missing:
+            vectors = self._embed_texts([node.get_content(metadata_mode=MetadataMode.EMBED) for node in missing])
+            for node, embedding in zip(missing, vectors):
+                node.embedding = embedding
+    
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed chunk texts through the cache (if enabled) and the embedding pipeline"""
+        if isinstance(self.embed_model, CachedEmbedding):
+            return self.embed_model.embed_documents(texts)
+        return self.embedding_pipeline.embed(texts)
+    
+    def search_obsidian(
+        self, query: str, mode: str = None, filters: SearchFilters = None
+    ) -> tuple[List[str], List[str]]:
+        """
+        Search Obsidian vault and return results + referenced filenames.
+        
+        mode is "dense" (embeddings), "lexical" (BM25) or "hybrid" (both, merged
+        with reciprocal rank fusion), defaulting to config.SEARCH_MODE. If the
+        dense search fails or the embedding API times out, lexical results are
+        returned instead. filters (tags, folder, dates, session summaries)
+        restrict both retrievers before ranking; for Chroma they become a
+        where clause. Runs asearch_obsidian on the shared event loop.
+        """
+        return runtime.run(self.asearch_obsidian(query, mode, filters))
+    
+    async def asearch_obsidian(
+        self, query: str, mode: str = None, filters: SearchFilters = None
+    ) -> tuple[List[str], List[str]]:
+        """Async search_obsidian: awaits the query embedding, then looks it up in a worker thread"""
+        mode = mode or config.SEARCH_MODE
+        try:
+            embedding = None
+            if mode in ("dense", "hybrid"):
+                try:
+                    embedding = await asyncio.wait_for(
+                        self._aembed_query(query),
+                        timeout=config.QUERY_EMBED_TIMEOUT_SECONDS
+                    )
+                except Exception as e:
+                    print(f"Query embedding unavailable ({e!r}), falling back to lexical search")
+                    mode = "lexical"
+            hits = await asyncio.to_thread(self._search_hits, query, mode, embedding, filters)
             
             # Check if we have any results after filtering
-            if not results:
-                print(f"No results found above similarity threshold {config.VECTOR_SIMILARITY_THRESHOLD}")
+            if not hits:
+                print(f"No results found for query: '{query}'")
                 return [], []
             
-            return results, list(referenced_files)
+            return self._format_hits(hits)
         
         except Exception as e:
             print(f"Search error: {e}")
             return [], []
     
+    def search_obsidian_many(
+        self, queries: List[str], mode: str = None, expand: bool = None, filters: SearchFilters = None
+    ) -> dict:
+        """
+        Search several queries at once.
+        
+        All queries (and, with expand, their variants from expand_query) are
+        embedded in one batched request, then looked up concurrently. Returns
+        {"queries": [{"query", "variants", "results", "referenced_files"}, ...],
+        "results": [...], "referenced_files": [...]}, where the top-level
+        results merge every query's hits with reciprocal rank fusion and
+        contain each chunk once, packed into CONTEXT_TOKEN_BUDGET per query
+        so adding queries adds context instead of crowding out the first
+        query's. filters apply to every lookup.
+        """
+        mode = mode or config.SEARCH_MODE
+        expand = config.QUERY_EXPANSION_ENABLED if expand is None else expand
+        top_k = config.VECTOR_SEARCH_TOP_K
+        
+        variants = {
+            query: expand_query(query, config.QUERY_EXPANSION_MAX_VARIANTS) if expand else [query]
+            for query in queries
+        }
+        texts = list(dict.fromkeys(text for query in queries for text in variants[query]))
+        
+        embeddings = {}
+        if mode in ("dense", "hybrid") and texts:
+            try:
+                vectors = self._query_executor.submit(self._embed_queries, texts).result(
+                    timeout=config.QUERY_EMBED_TIMEOUT_SECONDS
+                )
+                embeddings = dict(zip(texts, vectors))
+            except Exception as e:
+                print(f"Query embedding unavailable ({e!r}), falling back to lexical search")
+                mode = "lexical"
+        
+        futures = {
+            text: self._search_executor.submit(self._search_hits, text, mode, embeddings.get(text), filters)
+            for text in texts
+        }
+        hits_by_text = {}
+        for text, future in futures.items():
+            try:
+                hits_by_text[text] = future.result()
+            except Exception as e:
+                print(f"Search error for '{text}': {e}")
+                hits_by_text[text] = []
+        
+        per_query = []
+        query_hits = []
+        for query in queries:
+            rankings = [hits_by_text[text] for text in variants[query]]
+            hits = rankings[0] if len(rankings) == 1 else self._collapse_duplicates(
+                reciprocal_rank_fusion(rankings, k=config.RRF_K)
+            )[:top_k]
+            results, referenced_files = self._format_hits(hits)
+            per_query.append({
+                "query": query,
+                "variants": variants[query],
+                "results": results,
+                "referenced_files": referenced_files,
+            })
+            query_hits.append(hits)
+        
+        merged = self._collapse_duplicates(reciprocal_rank_fusion(query_hits, k=config.RRF_K))[:top_k * len(queries)]
+        # Each query brings its own share of context, so related queries add to the primary one's
+        results, referenced_files = self._format_hits(merged, config.CONTEXT_TOKEN_BUDGET * len(queries))
+        return {"queries": per_query, "results": results, "referenced_files": referenced_files}
+    
+    def _search_hits(
+        self, query: str, mode: str = None, embedding: List[float] = None, filters: SearchFilters = None
+    ) -> List[SearchHit]:
+        """Top hits for one query in the given mode, falling back to lexical if dense search fails"""
+        self._last_activity = time.monotonic()
+        mode = mode or config.SEARCH_MODE
+        top_k = config.VECTOR_SEARCH_TOP_K
+        metadata_filters = filters.to_metadata_filters() if filters else None
+        
+        dense_hits, lexical_hits = [], []
+        # Extra candidates make up for fused and collapsed duplicates
+        widen = mode == "hybrid" or self.dedup_index is not None
+        candidates = top_k * config.HYBRID_CANDIDATE_MULTIPLIER if widen else top_k
+        if mode in ("dense", "hybrid"):
+            try:
+                dense_hits = self._dense_search(query, candidates, embedding, metadata_filters)
+            except Exception as e:
+                print(f"Dense search unavailable ({e!r}), falling back to lexical search")
+                mode = "lexical"
+        if mode in ("lexical", "hybrid"):
+            lexical_hits = self._lexical_search(query, candidates, metadata_filters)
+        
+        if mode == "hybrid":
+            hits = reciprocal_rank_fusion([dense_hits, lexical_hits], k=config.RRF_K)
+        else:
+            hits = dense_hits or lexical_hits
+        return self._collapse_duplicates(hits)[:top_k]
+    
+    def _collapse_duplicates(self, hits: List[SearchHit]) -> List[SearchHit]:
+        """Keep the best-ranked copy of each duplicate group, so copies don't take several slots"""
+        if self.dedup_index is None:
+            return hits
+        seen = set()
+        collapsed = []
+        for hit in hits:
+            group = self.dedup_index.group_of(hit.chunk_id)
+            if group not in seen:
+                seen.add(group)
+                collapsed.append(hit)
+        return collapsed
+    
+    def _format_hits(self, hits: List[SearchHit], token_budget: int = None) -> tuple[List[str], List[str]]:
+        """Context passages for the LLM, packed into token_budget (CONTEXT_TOKEN_BUDGET), and the files they came from"""
+        referenced_files = set()
+        for hit in hits:
+            # Deduplicated chunks report every file they appear in, for backlinks
+            sources = self.dedup_index.sources(hit.chunk_id) if self.dedup_index is not None else []
+            referenced_files.update(sources or [hit.metadata.get('filename', 'Unknown')])
+        # Only content, not scores, goes to the LLM
+        results = pack_context(hits, token_budget or config.CONTEXT_TOKEN_BUDGET)
+        return results, list(referenced_files)
+    
+    def _dense_search(
+        self, query: str, top_k: int, embedding: List[float] = None, filters: MetadataFilters = None
+    ) -> List[SearchHit]:
+        """Vector search over chunks matching filters, keeping only hits above the similarity threshold"""
+        # If no index, try to build it
+        if not self.obsidian_index:
+            if not self.build_obsidian_index():
+                raise RuntimeError("vector index unavailable")
+        
+        # Embed in a worker thread so a hanging embedding API can be abandoned
+        if embedding is None:
+            embedding = self._query_executor.submit(self._embed_query, query).result(
+                timeout=config.QUERY_EMBED_TIMEOUT_SECONDS
+            )
+        
+        # One version throughout, even if a rebuild is swapped in meanwhile
+        state = self.state
+        raw_nodes = None
+        if config.RETRIEVAL_STRATEGY == "two_stage" and state.note_index is not None and len(state.note_index):
+            # Pick the notes closest to the query, then search only their chunks
+            notes = [path for path, _ in state.note_index.search(embedding, config.NOTE_CANDIDATES)]
+            raw_nodes = self._retrieve(state, query, embedding, top_k, self._within_notes(filters, notes))
+            if len(raw_nodes) < top_k:
+                # Too few (matching) chunks in those notes, fall back to all of them
+                raw_nodes = None
+        if raw_nodes is None:
+            raw_nodes = self._retrieve(state, query, embedding, top_k, filters)
+        
+        # Manual filtering - only keep nodes above threshold
+        hits = []
+        for node in raw_nodes:
+            score = getattr(node, 'score', None)
+            filename = node.metadata.get('filename', 'Unknown')
+            print(f"File: {filename}, score: {score}")
+            if score is not None and score >= self.similarity_threshold:
+                hits.append(SearchHit(node.node_id, node.text, node.metadata, score))
+        
+        if raw_nodes and not hits:
+            print(f"No results found above similarity threshold {self.similarity_threshold}")
+        return hits
+    
+    def _retrieve(
+        self, state: IndexState, query: str, embedding: List[float], top_k: int, filters: MetadataFilters = None
+    ) -> list:
+        """Raw top-k chunk nodes of one vector query, without postprocessing"""
+        # Filters are applied by the vector store, before the top-k cut
+        retriever = state.obsidian_index.as_retriever(similarity_top_k=top_k, filters=filters)
+        return retriever.retrieve(QueryBundle(query_str=query, embedding=embedding))
+    
+    def _within_notes(self, filters: Optional[MetadataFilters], notes: List[str]) -> MetadataFilters:
+        """filters restricted to the chunks of the given notes"""
+        in_notes = MetadataFilter(key="filepath", operator=FilterOperator.IN, value=notes)
+        if filters is None:
+            return MetadataFilters(filters=[in_notes])
+        if filters.condition == FilterCondition.OR:
+            return MetadataFilters(filters=[filters, in_notes])
+        # Kept flat, so a folder filter can still pick a single shard
+        return MetadataFilters(filters=[*filters.filters, in_notes], condition=filters.condition)
+    
+    def _lexical_search(self, query: str, top_k: int, filters: MetadataFilters = None) -> List[SearchHit]:
+        """
+        BM25 search over the same chunks as the vector index, restricted to
+        chunks matching filters and keeping only hits above LEXICAL_MIN_SCORE
+        """
+        hits = []
+        # One version throughout, even if a rebuild is swapped in meanwhile
+        lexical_index = self.lexical_index
+        accept = (lambda metadata: metadata_matches(metadata, filters)) if filters else None
+        for chunk_id, score in lexical_index.search(query, top_k, accept, config.LEXICAL_MIN_SCORE):
+            chunk = lexical_index.get(chunk_id)
+            hits.append(SearchHit(chunk_id, chunk["text"], chunk["metadata"], score))
+        return hits
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing recent embeddings of the same normalized query"""
+        embedding = self.query_cache.get(query)
+        if embedding is None:
+            embedding = self.embed_model.get_query_embedding(query)
+            self.query_cache.put(query, embedding)
+        return embedding
+    
+    async def _aembed_query(self, query: str) -> List[float]:
+        embedding = self.query_cache.get(query)
+        if embedding is None:
+            embedding = await self.embed_model.aget_query_embedding(query)
+            self.query_cache.put(query, embedding)
+        return embedding
+    
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries, with every one missing from the LRU sent in a single request"""
+        embeddings = {query: self.query_cache.get(query) for query in queries}
+        missing = [query for query, embedding in embeddings.items() if embedding is None]
+        if missing:
+            if isinstance(self.embed_model, CachedEmbedding):
+                fresh = self.embed_model.embed_queries(missing)
+            else:
+                fresh = self._embed_query_batch(missing)
+            for query, embedding in zip(missing, fresh):
+                embeddings[query] = embedding
+                self.query_cache.put(query, embedding)
+        return [embeddings[query] for query in queries]
+    
+    def _shard_stats(self) -> Optional[dict]:
+        """Chunks, files and store stats of every shard, None when the index isn't sharded"""
+        if not isinstance(self.vector_store, ShardedVectorStore):
+            return None
+        stats = self.vector_store.stats()
+        files = Counter(self.shard_of(path) for path in self.manifest.paths())
+        for shard, shard_stats in stats["shards"].items():
+            shard_stats["files"] = files.get(shard, 0)
+        return stats
+    
     def get_index_stats(self) -> dict:
         """Get statistics about the current index"""
         if not self.obsidian_index:
             return {"status": "no_index", "documents": 0}
         
         try:
-            # Get collection info from ChromaDB
-            collection = self.chroma_client.get_collection(config.CHROMA_COLLECTION_NAME)
-            doc_count = collection.count()
+            # Get chunk count from the vector store
+            doc_count = self._chunk_count()
             
             return {
                 "status": "ready",
+                "backend": config.VECTOR_BACKEND,
+                "index_version": self.index_versions.stats(),
                 "documents": doc_count,
+                "indexed_files": len(self.manifest.files),
+                "vector_store": self.vector_store.stats() if isinstance(self.vector_store, NumpyVectorStore) else None,
+                "shards": self._shard_stats(),
+                "embedding_cache": self.embedding_cache.stats() if self.embedding_cache else None,
+                "embedding_pipeline": self.embedding_pipeline.stats(),
+                "last_update": self.last_update,
+                "vault_tree": {**self.state.vault_tree.stats(), "last_check_ms": self.last_vault_check_ms},
+                "query_cache": self.query_cache.stats(),
+                "lexical_index": self.lexical_index.stats(),
+                "dedup": self.dedup_index.stats() if self.dedup_index is not None else None,
+                "watcher": self.watcher.stats() if self.watcher else None,
+                "maintenance": {
+                    "scheduler": self.maintenance.stats() if self.maintenance else None,
+                    "last_run": self.last_maintenance,
+                },
                 "obsidian_path": self.obsidian_path
             }
         except Exception as e:
             return {"status": "error", "error": str(e), "documents": 0}
-vector_service = VectorStoreService()
\ No newline at end of file
+vector_service = LazyService("vector_service", VectorStoreService)
\ No newline at end of file